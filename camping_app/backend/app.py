@@ -1,28 +1,208 @@
 # Flask Backend - Quick Start Code Examples
 # File: app.py (Main Flask Application)
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, has_request_context, make_response, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from flask_cors import CORS
+
+try:
+    import orjson  # optional: faster JSON encoding for list endpoints
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional: Content-Encoding br for clients that accept it
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl  # not on Windows: there every process runs the housekeeping jobs
+except ImportError:
+    fcntl = None
+try:
+    from gevent import monkey as gevent_monkey  # optional: gevent workers (see gunicorn.conf.py)
+    from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+except ImportError:
+    gevent_monkey = None
 from datetime import datetime, date, timedelta
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_for_futures
+from functools import wraps
+import atexit
+import base64
 import bcrypt
+import bisect
+import csv
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import logging
+import logging.handlers
+import math
+import re
 import requests
+import requests.adapters
+import sys
+import tempfile
+import threading
+import time
 import os
+import queue
+import random
 
 # Initialize Flask app
 app = Flask(__name__)
 
 # Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+pymysql://root:@localhost/camping_booking_db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'mysql+pymysql://root:@localhost/camping_booking_db')
 # Struktur: 'mysql+pymysql://{username}:{password}@{host}/{database_name}'
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Connection pool of every engine (primary and replica)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),  # connections kept open per worker
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),  # extra connections allowed under bursts
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # reconnect before MySQL wait_timeout drops it
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1'  # test a connection before handing it out
+}
+
+# Small pool of its own for the short transactions that commit apart from the request's
+# session (idempotency keys, booking code blocks). Taking those from the main pool while
+# the session holds a connection can deadlock once every connection is in use.
+app.config['SQLALCHEMY_BINDS'] = {
+    'coordination': {
+        'url': app.config['SQLALCHEMY_DATABASE_URI'],
+        **app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+        'pool_size': int(os.environ.get('DB_COORDINATION_POOL_SIZE', 2)),
+        'max_overflow': int(os.environ.get('DB_COORDINATION_MAX_OVERFLOW', 4))
+    }
+}
+
+# Optional read replica: read_only routes send their SELECTs there
+if os.environ.get('DATABASE_REPLICA_URL'):
+    app.config['SQLALCHEMY_BINDS']['replica'] = {
+        'url': os.environ['DATABASE_REPLICA_URL'], **app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    }
+app.config['REPLICA_STICKY_SECONDS'] = 10  # after a user's own write, their reads stay on the primary this long
 app.config['JWT_SECRET_KEY'] = 'mysecret'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
 
+# Weather forecast (Open-Meteo) and forecast cache settings
+app.config['WEATHER_API_URL'] = os.environ.get('WEATHER_API_URL', 'https://api.open-meteo.com/v1/forecast')
+app.config['WEATHER_CACHE_TTL'] = 3 * 60 * 60  # seconds a cached forecast stays valid
+app.config['WEATHER_CACHE_TTL_JITTER'] = 0.1  # up to this share of the TTL is taken off at random
+app.config['WEATHER_STALE_TTL'] = 6 * 60 * 60  # seconds past expiry a forecast is still served while it is refreshed
+app.config['WEATHER_MEMORY_CACHE_SIZE'] = 512  # max forecasts kept in process memory
+app.config['WEATHER_BATCH_SIZE'] = 50  # max locations per Open-Meteo call
+
+# Open-Meteo calls run on a small worker pool over kept-alive connections
+app.config['WEATHER_HTTP_POOL_SIZE'] = 10  # kept-alive connections to Open-Meteo
+app.config['WEATHER_CONNECT_TIMEOUT'] = 3  # seconds
+app.config['WEATHER_READ_TIMEOUT'] = 10  # seconds
+app.config['WEATHER_FETCH_WORKERS'] = 8  # concurrent upstream fetches
+app.config['WEATHER_FETCH_MAX_QUEUE'] = 32  # waiting fetches before weather routes answer 503
+app.config['WEATHER_FETCH_WAIT'] = 2.0  # seconds a request waits for a fetch before answering 202
+
+# Background pre-warmer: fetches forecasts of active campsites before they expire
+app.config['WEATHER_PREWARM_INTERVAL'] = 5 * 60  # seconds between runs
+app.config['WEATHER_PREWARM_DAYS'] = 16  # days fetched per campsite (covers every `days` a client can ask for)
+app.config['WEATHER_REFRESH_AHEAD'] = 30 * 60  # refresh forecasts expiring within this many seconds
+app.config['WEATHER_PREWARM_MAX_LOCATIONS'] = 200  # campsites refreshed per run, the rest wait for the next one
+
+# Keyset pagination for admin list endpoints
+app.config['PAGE_SIZE_DEFAULT'] = 50
+app.config['PAGE_SIZE_MAX'] = 500
+app.config['BATCH_MAX_ITEMS'] = 1000  # max ids per batch admin request
+app.config['STREAM_BATCH_SIZE'] = 500  # rows fetched per round-trip when streaming
+app.config['EXPORT_BATCH_SIZE'] = 2000  # rows per server-side cursor fetch (and per chunk sent) in exports
+
+# In-memory campsite catalog; other workers' admin edits show up after this many seconds
+app.config['CATALOG_MAX_AGE'] = 60
+app.config['GEO_GRID_CELL_DEGREES'] = 0.25  # cell size of the nearby-search grid (~28 km)
+
+# Password hashing runs on a bounded worker pool instead of the request thread
+app.config['BCRYPT_ROUNDS'] = 12  # work factor for new hashes; older hashes are upgraded at login
+app.config['PASSWORD_HASH_WORKERS'] = 4  # concurrent bcrypt operations
+app.config['PASSWORD_HASH_MAX_QUEUE'] = 32  # waiting operations before login/register answer 503
+
+# Authorization: role comes from JWT claims, account status from a short-lived cache
+app.config['USER_STATUS_CACHE_TTL'] = 60  # seconds before a revoked user is cut off on other workers
+
+# Booking codes are handed out from blocks reserved in the booking_code_sequences table
+app.config['BOOKING_CODE_BLOCK_SIZE'] = 100  # codes per reservation (one DB round-trip per block)
+
+# Idempotency-Key support for retried POSTs (stored responses in the idempotency_keys table)
+app.config['IDEMPOTENCY_KEY_TTL'] = 24 * 60 * 60  # seconds a stored response can be replayed
+app.config['IDEMPOTENCY_PROCESSING_TIMEOUT'] = 60  # seconds before an unfinished request's key can be reused
+
+# Response compression and conditional GET for JSON responses
+app.config['COMPRESS_MIN_SIZE'] = 1024  # bytes; smaller bodies are sent as is
+app.config['COMPRESS_LEVEL'] = 6  # gzip level
+app.config['COMPRESS_BROTLI_QUALITY'] = 5  # brotli quality (0-11)
+# Answer 304 before the route runs when nothing was written since (see data_changes)
+app.config['CONDITIONAL_GET_SHORTCUT'] = os.environ.get('CONDITIONAL_GET_SHORTCUT', '1') == '1'
+app.config['CONDITIONAL_GET_MAX_AGE'] = 30  # seconds a 304 may be answered without running the route
+app.config['CONDITIONAL_GET_CACHE_SIZE'] = 10000  # (url, user) ETags remembered for that
+
+# Admin dashboard summary is cached for a few seconds and dropped on writes
+app.config['DASHBOARD_CACHE_TTL'] = 30  # seconds
+
+# Notifications: one poller thread per process pushes new rows to SSE and long-poll clients
+app.config['NOTIFICATION_POLL_INTERVAL'] = 1.0  # seconds between polls while anyone is listening
+app.config['NOTIFICATION_POLL_BATCH_SIZE'] = 500  # rows read per poll
+app.config['NOTIFICATION_GAP_TIMEOUT'] = 10  # seconds a skipped id is re-checked (transactions committing out of order)
+app.config['NOTIFICATION_QUEUE_SIZE'] = 100  # undelivered events per connection before it is closed
+app.config['NOTIFICATION_LONG_POLL_TIMEOUT'] = 25  # max seconds a long-poll request waits
+app.config['NOTIFICATION_STREAM_MAX_AGE'] = 5 * 60  # seconds an SSE connection stays open (reconnect re-checks the token)
+app.config['NOTIFICATION_HEARTBEAT'] = 15  # seconds between SSE keep-alive comments
+app.config['NOTIFICATION_UNREAD_CACHE_TTL'] = 30  # seconds other workers' mark-as-read may take to show up
+app.config['NOTIFICATION_MAX_LISTENERS'] = 500  # open streams + long-polls per process before new ones answer 503
+
+# Background housekeeping (auto-complete expired bookings, purge expired weather cache).
+# Every process that loads the app starts the scheduler; only the one holding the lock
+# file runs the jobs, so several WSGI workers on one host still run each job once.
+app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+app.config['SCHEDULER_LOCK_FILE'] = os.environ.get(
+    'SCHEDULER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'camping_backend_scheduler.lock'))
+app.config['HOUSEKEEPING_INTERVAL'] = 10 * 60  # seconds between runs of each job
+app.config['HOUSEKEEPING_BATCH_SIZE'] = 500  # rows changed per transaction
+
+# When True, a route that issues more SQL statements than its query_budget returns 500
+app.config['SQL_QUERY_BUDGET_STRICT'] = False
+
+# Observability: JSON log lines on stdout, Prometheus metrics on /metrics
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # if set, /metrics needs "Authorization: Bearer <token>"
+
+# Session that sends plain SELECTs to the replica while a read_only route runs.
+# Locking reads (FOR UPDATE), flushes and raw text() statements stay on the primary.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and has_request_context()
+            and g.get('db_read_replica')
+        ):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 jwt = JWTManager(app)
 CORS(app)
 
@@ -30,21 +210,1081 @@ CORS(app)
 # HELPER FUNCTIONS
 # ============================================
 
-# Auto-complete expired bookings (Booking checkout_date passed)
-def auto_complete_expired_bookings():
-    """Auto-complete bookings yang checkout_date sudah lewat"""
+# Structured logging. Request threads only put records on a queue; one
+# listener thread formats and writes them, so slow output never blocks a request.
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: time, level, event (the message) and any `extra` fields"""
+
+    STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self.STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging():
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonLogFormatter())
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flush what is still queued on shutdown
+
+    app_logger = logging.getLogger('camping_app')
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.setLevel(app.config['LOG_LEVEL'])
+    app_logger.propagate = False
+    return app_logger
+
+logger = configure_logging()
+
+# Prometheus metrics (text exposition format), kept in process memory
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    @staticmethod
+    def format_labels(names, values):
+        if not names:
+            return ''
+        pairs = []
+        for name, value in zip(names, values):
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{name}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, float):
+            return '+Inf' if value == float('inf') else repr(value)
+        return str(value)
+
+    def samples(self):
+        """[(suffix, label names, label values, value)]"""
+        with self._lock:
+            return [('', self.labelnames, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{self.format_labels(names, values)} {self.format_value(value)}')
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by `collect` returning {label values tuple: value}"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.collect is None:
+            return super().samples()
+        try:
+            values = self.collect()
+        except Exception:
+            return []
+        return [('', self.labelnames, key, value) for key, value in values.items()]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+        names = self.labelnames + ('le',)
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', names, key + ('+Inf' if bound == float('inf') else f'{bound:g}',), cumulative))
+            samples.append(('_sum', self.labelnames, key, float(total)))
+            samples.append(('_count', self.labelnames, key, count))
+        return samples
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+SQL_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200)
+
+http_requests_total = metrics.counter(
+    'http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status'))
+http_request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'Time to build the response (streamed bodies excluded)',
+    ('endpoint', 'method', 'status'))
+http_request_sql_statements = metrics.histogram(
+    'http_request_sql_statements', 'SQL statements issued per request', ('endpoint',), buckets=SQL_COUNT_BUCKETS)
+http_request_sql_duration = metrics.histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL per request', ('endpoint',))
+sql_statements_total = metrics.counter(
+    'sql_statements_total', 'SQL statements executed (requests and background jobs)')
+sql_statement_duration = metrics.histogram(
+    'sql_statement_duration_seconds', 'Duration of single SQL statements',
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 5))
+upstream_request_duration = metrics.histogram(
+    'upstream_request_duration_seconds', 'Calls to external services', ('service', 'outcome'))
+upstream_errors_total = metrics.counter(
+    'upstream_errors_total', 'Failed calls to external services', ('service', 'kind'))
+weather_cache_lookups = metrics.counter(
+    'weather_cache_lookups_total', 'Forecasts served, by cache tier and hit / stale / miss', ('tier', 'result'))
+weather_cache_staleness = metrics.histogram(
+    'weather_cache_staleness_seconds', 'How long past expires_at a stale forecast was when served',
+    buckets=(60, 300, 900, 1800, 3600, 7200, 14400, 21600))
+notifications_pushed_total = metrics.counter(
+    'notifications_pushed_total', 'Notifications handed to SSE / long-poll connections')
+
+def request_endpoint_label():
+    # Unmatched URLs share one label so random paths cannot blow up cardinality
+    return request.endpoint or 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Registered before the query budget hook, so it runs after it and sees the final status"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+
+    endpoint = request_endpoint_label()
+    labels = {'endpoint': endpoint, 'method': request.method, 'status': response.status_code}
+    http_requests_total.inc(**labels)
+    http_request_duration.observe(time.perf_counter() - started, **labels)
+    http_request_sql_statements.observe(g.get('sql_query_count', 0), endpoint=endpoint)
+    http_request_sql_duration.observe(g.get('sql_query_time', 0.0), endpoint=endpoint)
+    return response
+
+# Small in-process cache with expiry per entry and LRU eviction
+class TTLCache:
+    """Thread-safe TTL + LRU cache kept in process memory"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# Coalesce concurrent identical calls so only one of them does the work
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+# Count and time SQL statements issued while handling each request
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_sql_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_query_count = g.get('sql_query_count', 0) + 1
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def time_sql_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    sql_statements_total.inc()
+    sql_statement_duration.observe(elapsed)
+    if has_request_context():
+        g.sql_query_time = g.get('sql_query_time', 0.0) + elapsed
+
+def query_budget(max_queries):
+    """Declare the maximum number of SQL statements a route may issue per request"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            g.sql_query_budget = max_queries
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@app.after_request
+def report_sql_query_count(response):
+    """Expose the statement count (X-SQL-Query-Count) and enforce query budgets"""
+    count = g.get('sql_query_count', 0)
+    budget = g.get('sql_query_budget')
+    response.headers['X-SQL-Query-Count'] = str(count)
+
+    if budget is not None:
+        budget += g.get('sql_query_overhead', 0)
+        response.headers['X-SQL-Query-Budget'] = str(budget)
+        if count > budget:
+            logger.warning('query_budget_exceeded', extra={
+                'endpoint': request.endpoint, 'statements': count, 'budget': budget
+            })
+            if app.config['SQL_QUERY_BUDGET_STRICT']:
+                error = jsonify({
+                    'success': False,
+                    'message': f'Query budget exceeded: {count} statements (budget {budget})'
+                })
+                error.status_code = 500
+                error.headers['X-SQL-Query-Count'] = str(count)
+                error.headers['X-SQL-Query-Budget'] = str(budget)
+                return error
+
+    return response
+
+# bcrypt on a dedicated, bounded pool (bcrypt releases the GIL while hashing)
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already queued"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on its own thread pool so a login burst can use at most
+    `workers` CPU cores, and sheds load once `max_queue` jobs are waiting.
+    """
+
+    def __init__(self, workers, max_queue):
+        executor_class = ThreadPoolExecutor
+        if gevent_monkey is not None and gevent_monkey.is_module_patched('threading'):
+            # Patched threads are greenlets: hash on real OS threads so bcrypt does not block the hub
+            executor_class = NativeThreadPoolExecutor
+        self._executor = executor_class(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+
+        with self._pending_lock:
+            self._pending += 1
+
+        def release(_):
+            with self._pending_lock:
+                self._pending -= 1
+            self._slots.release()
+
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(release)
+        return future.result()
+
+    def hash(self, password, rounds):
+        return self._run(
+            lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+        )
+
+    def check(self, password, password_hash):
+        return self._run(
+            lambda: bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        )
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    @staticmethod
+    def rounds_of(password_hash):
+        """Work factor stored in a bcrypt hash ($2b$<rounds>$...)"""
+        try:
+            return int(password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return None
+
+password_hasher = PasswordHasher(
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_queue=app.config['PASSWORD_HASH_MAX_QUEUE']
+)
+
+def password_hasher_busy_response():
+    response = jsonify({'success': False, 'message': 'Server is busy, please try again'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+# Cached (is_active, registration_status) per user id, checked on every authorized request
+user_status_cache = TTLCache(maxsize=10000, ttl=app.config['USER_STATUS_CACHE_TTL'])
+
+def get_user_status(user_id):
+    """(is_active, registration_status) of a user, or None if the user does not exist"""
+    status = user_status_cache.get(user_id)
+    if status is None:
+        row = db.session.query(User.is_active, User.registration_status)\
+                        .filter(User.id == user_id).first()
+        if row is None:
+            return None
+        status = (bool(row.is_active), row.registration_status)
+        user_status_cache.set(user_id, status)
+    return status
+
+def invalidate_user_status(user_id):
+    """Call after changing a user's approval or active status"""
+    user_status_cache.delete(int(user_id))
+
+def role_required(*roles):
+    """
+    jwt_required() plus authorization without a users query:
+    role is read from the JWT 'role' claim (set by login), and the account must
+    still be active and approved (cached lookup, invalidated on status changes).
+    With no roles given, any logged in role is accepted.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            if roles and get_jwt().get('role') not in roles:
+                return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+
+            status = get_user_status(int(get_jwt_identity()))
+            if status is None or not status[0] or status[1] != 'approved':
+                return jsonify({'success': False, 'message': 'Account is deactivated or not approved'}), 403
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+admin_required = role_required('admin')
+login_required = role_required()
+
+# Read/write split: users who just wrote something read from the primary for a
+# while, so they see their own change even if the replica is lagging (per worker)
+recent_writers = TTLCache(maxsize=10000, ttl=app.config['REPLICA_STICKY_SECONDS'])
+
+def current_identity():
+    """JWT identity of the request, or None if no token was checked"""
     try:
-        today = date.today()
-        
-        Booking.query.filter(
-            Booking.booking_status == 'confirmed',
-            Booking.check_out_date < today
-        ).update({'booking_status': 'completed'})
-        
-        db.session.commit()
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+def read_only(fn):
+    """
+    Mark a route as read-only so its SELECTs may go to the replica.
+    Place it below the auth decorator so the caller's identity is known.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        identity = current_identity()
+        g.db_read_replica = identity is None or recent_writers.get(str(identity)) is None
+        return fn(*args, **kwargs)
+    return wrapper
+
+def read_engine():
+    """Engine for Core queries in a read_only route (the replica if there is one)"""
+    if g.get('db_read_replica'):
+        return db.engines.get('replica', db.engine)
+    return db.engine
+
+def coordination_engine():
+    """Engine for short transactions that must commit on their own, outside the request's session"""
+    return db.engines['coordination']
+
+@app.after_request
+def remember_recent_writer(response):
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        identity = current_identity()
+        if identity is not None:
+            recent_writers.set(str(identity), True)
+    return response
+
+# Conditional GET and compression for every JSON response.
+# Every GET 200 gets a body-hash ETag, and a matching If-None-Match gets a 304.
+# Every committed write transaction, in any worker, adds a row to data_changes
+# in the same transaction, so the newest row is a data version all workers see.
+# With CONDITIONAL_GET_SHORTCUT a GET first reads that version (one primary-key
+# lookup, in the snapshot the route then reads from) and gets its time as
+# Last-Modified. A GET whose If-None-Match equals the ETag we last sent for the
+# same URL and user, with no write since, is answered 304 before the route runs
+# (for CONDITIONAL_GET_MAX_AGE seconds at most).
+conditional_get_cache = TTLCache(
+    maxsize=app.config['CONDITIONAL_GET_CACHE_SIZE'],
+    ttl=app.config['CONDITIONAL_GET_MAX_AGE']
+)
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def note_write_statement(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        conn.info['data_changed'] = True
+
+@event.listens_for(Engine, 'commit')
+def record_data_change(conn):
+    """Runs just before the COMMIT: the data_changes row commits with the writes"""
+    if not conn.info.pop('data_changed', False):
+        return
+    # Straight on the DBAPI cursor, so the insert is not seen as another write
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"INSERT INTO data_changes (changed_at) VALUES ('{datetime.utcnow():%Y-%m-%d %H:%M:%S}')")
+    except Exception as e:
+        # Never fail the write itself; cached 304s end after CONDITIONAL_GET_MAX_AGE
+        logger.error('data_change_record_failed', extra={'error': str(e)})
+    finally:
+        cursor.close()
+
+@event.listens_for(Engine, 'rollback')
+def forget_uncommitted_writes(conn):
+    conn.info.pop('data_changed', None)
+
+def read_data_version():
+    """(id, changed_at) of the newest data_changes row; (0, None) before the first write"""
+    row = db.session.execute(
+        db.select(DataChange.id, DataChange.changed_at).order_by(DataChange.id.desc()).limit(1)
+    ).first()
+    return (row.id, row.changed_at) if row else (0, None)
+
+def conditional_get_key():
+    """Responses differ per user and role, so both are part of the key"""
+    try:
+        role = get_jwt().get('role')
+    except RuntimeError:
+        role = None
+    return (request.full_path, current_identity(), role)
+
+def matching_etag(etag):
+    """The variant of our ETag (plain or per content encoding) the client already has, if any"""
+    for candidate in (etag, f'{etag}-gzip', f'{etag}-br'):
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+def not_modified_response(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.before_request
+def answer_not_modified():
+    if not app.config['CONDITIONAL_GET_SHORTCUT'] or request.method != 'GET':
+        return None
+
+    try:
+        g.data_version, g.data_changed_at = read_data_version()
     except Exception as e:
         db.session.rollback()
-        print(f"Auto-complete error: {e}")
+        logger.warning('data_version_unavailable', extra={'error': str(e)})
+        return None
+    g.sql_query_overhead = 1  # the version lookup is not part of the route's query budget
+
+    if not request.if_none_match:
+        return None
+
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return None  # bad or expired token: let the route answer it
+
+    entry = conditional_get_cache.get(conditional_get_key())
+    if entry is None:
+        return None
+    etag, version = entry
+    if version != g.data_version:
+        return None
+
+    matched = matching_etag(etag)
+    if matched is None:
+        return None
+
+    # Same checks as role_required: a deactivated account gets the route's 403
+    identity = current_identity()
+    if identity is not None:
+        status = get_user_status(int(identity))
+        if status is None or not status[0] or status[1] != 'approved':
+            return None
+
+    return not_modified_response(matched)
+
+def choose_content_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(body, compresslevel=app.config['COMPRESS_LEVEL'])
+
+@app.after_request
+def finish_json_response(response):
+    """Strong ETag + 304 for GETs, then gzip/brotli above COMPRESS_MIN_SIZE"""
+    if response.direct_passthrough or response.is_streamed or response.mimetype != 'application/json':
+        return response
+
+    body = response.get_data()
+    etag = None
+
+    if request.method == 'GET' and response.status_code == 200:
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+            response.set_etag(etag)
+            response.headers.setdefault('Cache-Control', 'no-cache')
+        if g.get('data_version') is not None:
+            conditional_get_cache.set(conditional_get_key(), (etag, g.data_version))
+            response.last_modified = g.data_changed_at
+
+        matched = matching_etag(etag)
+        if matched is not None:
+            return not_modified_response(matched)
+
+    response.vary.add('Accept-Encoding')
+    if len(body) < app.config['COMPRESS_MIN_SIZE'] or 'Content-Encoding' in response.headers:
+        return response
+
+    encoding = choose_content_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if etag is not None:
+        response.set_etag(f'{etag}-{encoding}')  # strong ETags differ per encoding
+    return response
+
+# Keyset (cursor) pagination on (created_at, id), newest first
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Returns (created_at, id); raises ValueError on a malformed cursor"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def read_page_args():
+    """
+    Read limit/cursor query params.
+    Returns (limit, cursor); limit is None when the client did not ask for pages.
+    """
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+    if limit is None and not cursor:
+        return None, None
+
+    limit = limit or app.config['PAGE_SIZE_DEFAULT']
+    return max(1, min(limit, app.config['PAGE_SIZE_MAX'])), cursor
+
+def keyset_page(query, model, limit, cursor, entity=lambda row: row):
+    """
+    Fetch one page of query ordered by (created_at DESC, id DESC).
+    entity maps a result row to the model instance (for queries returning tuples).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = entity(rows[-1])
+    return rows, encode_cursor(last.created_at, last.id)
+
+def stream_json_list(key, rows, serialize):
+    """Stream {"success": true, key: [...]} one row at a time (constant memory)"""
+    def generate():
+        yield b'{"success":true,"%s":[' % key.encode('ascii')
+        separator = b''
+        for row in rows:
+            yield separator + dumps_json(serialize(row))
+            separator = b','
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+# JSON encoding for list endpoints: orjson when installed, else the json module
+if orjson is not None:
+    def dumps_json(value):
+        return orjson.dumps(value)
+else:
+    def dumps_json(value):
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Like jsonify, but encoded with dumps_json"""
+    return Response(dumps_json(payload), status=status, mimetype='application/json')
+
+def to_float(value):
+    return float(value) if value is not None else None
+
+def to_iso(value):
+    return value.isoformat() if value is not None else None
+
+# Column projections: list endpoints select only the columns their response
+# needs, as plain row tuples, instead of hydrating full ORM objects
+class Projection:
+    """
+    Response fields of a list endpoint. Each field is (name, columns, convert):
+    the value is convert(*column values), or the single column value as is
+    when convert is None. Clients can ask for a subset with ?fields=a,b,c.
+    """
+
+    def __init__(self, *fields):
+        self.fields = OrderedDict((name, (columns, convert)) for name, columns, convert in fields)
+
+    def requested_fields(self):
+        """Field names from ?fields= (all fields if absent); raises ValueError on unknown names"""
+        param = request.args.get('fields', '').strip()
+        if not param:
+            return list(self.fields)
+
+        names = list(OrderedDict.fromkeys(name.strip() for name in param.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}")
+        return names
+
+    def plan(self, names, extra_columns=()):
+        """
+        Returns (columns to select, row -> dict function) for the given field names.
+        extra_columns are selected too but not output (e.g. keyset cursor columns).
+        """
+        columns = []
+        positions = {}
+
+        def position(column):
+            if id(column) not in positions:
+                positions[id(column)] = len(columns)
+                columns.append(column)
+            return positions[id(column)]
+
+        steps = []
+        for name in names:
+            field_columns, convert = self.fields[name]
+            steps.append((name, [position(column) for column in field_columns], convert))
+        for column in extra_columns:
+            position(column)
+
+        def serialize(row):
+            item = {}
+            for name, indexes, convert in steps:
+                if convert is None:
+                    item[name] = row[indexes[0]]
+                else:
+                    item[name] = convert(*[row[i] for i in indexes])
+            return item
+
+        return columns, serialize
+
+def projected_field(name, *columns, convert=None):
+    return (name, columns, convert)
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+# Periodic background jobs, run on one daemon thread outside the request path
+class BackgroundScheduler:
+    """
+    Run registered jobs every `interval` seconds and keep metrics per job.
+    Started with a lock file, only the process holding an exclusive flock on it
+    runs the jobs; the others stand by and take over when that process exits.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_path = None
+        self._lock_file = None
+        self._lock_file_guard = threading.Lock()
+
+    def add_job(self, name, fn, interval):
+        """fn runs inside an app context and returns the number of rows it processed"""
+        self.jobs[name] = {
+            'fn': fn,
+            'interval': interval,
+            'next_run': time.monotonic(),
+            'metrics': {
+                'runs': 0,
+                'errors': 0,
+                'rows_processed': 0,
+                'last_rows_processed': 0,
+                'last_run_at': None,
+                'last_duration_ms': None,
+                'last_error': None
+            }
+        }
+
+    def run_job(self, name):
+        job = self.jobs[name]
+        metrics = job['metrics']
+        started = time.perf_counter()
+
+        with self._lock:
+            try:
+                with app.app_context():
+                    rows = job['fn']() or 0
+                metrics['rows_processed'] += rows
+                metrics['last_rows_processed'] = rows
+                metrics['last_error'] = None
+            except Exception as e:
+                rows = 0
+                metrics['errors'] += 1
+                metrics['last_error'] = str(e)
+                logger.exception('housekeeping_job_failed', extra={'job': name})
+            finally:
+                metrics['runs'] += 1
+                metrics['last_run_at'] = datetime.now().isoformat()
+                metrics['last_duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                job['next_run'] = time.monotonic() + job['interval']
+
+        return rows
+
+    def _hold_lock(self):
+        """True if this process may run the jobs, taking the lock file if it is free"""
+        with self._lock_file_guard:
+            if self._lock_path is None or fcntl is None or self._lock_file is not None:
+                return True
+            lock_file = open(self._lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        logger.info('housekeeping_lock_acquired', extra={'lock_file': self._lock_path, 'pid': os.getpid()})
+        return True
+
+    def _release_lock(self):
+        with self._lock_file_guard:
+            if self._lock_file is not None:
+                self._lock_file.close()  # closing the file drops the flock
+                self._lock_file = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self._hold_lock():
+                now = time.monotonic()
+                for name, job in list(self.jobs.items()):
+                    if job['next_run'] <= now:
+                        self.run_job(name)
+            self._stop.wait(1)
+        self._release_lock()
+
+    def start(self, lock_path=None):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if lock_path is not None and fcntl is None:
+            logger.warning('housekeeping_lock_unsupported', extra={'lock_file': lock_path})
+        self._lock_path = lock_path
+        self._stop.clear()
+        self._hold_lock()
+        self._thread = threading.Thread(target=self._loop, name='housekeeping', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=30)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_active(self):
+        """Running and holding the lock, i.e. this process is the one that runs the jobs"""
+        return self.is_running() and self._hold_lock()
+
+    def status(self):
+        return {
+            name: dict(job['metrics'], interval_seconds=job['interval'])
+            for name, job in self.jobs.items()
+        }
+
+scheduler = BackgroundScheduler()
+
+def effective_booking_status(status, check_out_date):
+    """
+    Status as readers should see it: a confirmed booking whose check-out date
+    has passed is completed, even before the housekeeping job has stored that.
+    """
+    if status == 'confirmed' and check_out_date and check_out_date < date.today():
+        return 'completed'
+    return status
+
+# Auto-complete expired bookings (Booking checkout_date passed)
+def auto_complete_expired_bookings(batch_size=None):
+    """
+    Auto-complete bookings yang checkout_date sudah lewat, in small batches.
+    Completed bookings free their nights, so every batch also takes its
+    bookings out of the occupancy index, in the same transaction (revenue
+    does not change: confirmed and completed both count).
+    """
+    batch_size = batch_size or app.config['HOUSEKEEPING_BATCH_SIZE']
+    today = date.today()
+    total = 0
+
+    while True:
+        try:
+            bookings = db.session.query(
+                Booking.id, Booking.campsite_id, Booking.check_in_date, Booking.check_out_date,
+                Booking.num_people, Booking.num_tents
+            ).filter(
+                Booking.booking_status == 'confirmed',
+                Booking.check_out_date < today
+            ).limit(batch_size).with_for_update().all()
+
+            ids = [booking.id for booking in bookings]
+            if not ids:
+                break
+
+            total += Booking.query.filter(
+                Booking.id.in_(ids),
+                Booking.booking_status == 'confirmed'
+            ).update({'booking_status': 'completed'}, synchronize_session=False)
+            apply_occupancy_deltas(booking_occupancy_deltas(bookings, -1))
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error('auto_complete_failed', extra={'error': str(e)})
+            raise
+
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+def purge_expired_weather_cache(batch_size=None):
+    """
+    Delete weather_cache rows that are past expires_at and the stale window,
+    in small batches (uses idx_expires)
+    """
+    batch_size = batch_size or app.config['HOUSEKEEPING_BATCH_SIZE']
+    cutoff = datetime.now() - timedelta(seconds=app.config['WEATHER_STALE_TTL'])
+    total = 0
+
+    while True:
+        try:
+            ids = [row.id for row in db.session.query(WeatherCache.id).filter(
+                WeatherCache.expires_at <= cutoff
+            ).limit(batch_size)]
+
+            if not ids:
+                break
+
+            total += WeatherCache.query.filter(WeatherCache.id.in_(ids))\
+                                       .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error('weather_cache_purge_failed', extra={'error': str(e)})
+            raise
+
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+def purge_expired_idempotency_keys(batch_size=None):
+    """Delete idempotency_keys rows past expires_at, in small batches"""
+    batch_size = batch_size or app.config['HOUSEKEEPING_BATCH_SIZE']
+    now = datetime.now()
+    total = 0
+
+    while True:
+        try:
+            ids = [row.id for row in db.session.query(IdempotencyKey.id).filter(
+                IdempotencyKey.expires_at <= now
+            ).limit(batch_size)]
+
+            if not ids:
+                break
+
+            total += IdempotencyKey.query.filter(IdempotencyKey.id.in_(ids))\
+                                         .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error('idempotency_key_purge_failed', extra={'error': str(e)})
+            raise
+
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+def purge_data_changes(batch_size=None):
+    """Delete data_changes rows below the newest one (only the newest is read), in small batches"""
+    batch_size = batch_size or app.config['HOUSEKEEPING_BATCH_SIZE']
+    newest = db.session.query(db.func.max(DataChange.id)).scalar()
+    total = 0
+
+    while newest is not None:
+        try:
+            ids = [row.id for row in db.session.query(DataChange.id).filter(
+                DataChange.id < newest
+            ).limit(batch_size)]
+
+            if not ids:
+                break
+
+            total += DataChange.query.filter(DataChange.id.in_(ids))\
+                                     .delete(synchronize_session=False)
+            # Dropping old versions changes no data, so it must not add a version itself
+            db.session.connection().info.pop('data_changed', None)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error('data_change_purge_failed', extra={'error': str(e)})
+            raise
+
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+scheduler.add_job('auto_complete_expired_bookings', auto_complete_expired_bookings,
+                  app.config['HOUSEKEEPING_INTERVAL'])
+scheduler.add_job('purge_expired_weather_cache', purge_expired_weather_cache,
+                  app.config['HOUSEKEEPING_INTERVAL'])
+scheduler.add_job('purge_expired_idempotency_keys', purge_expired_idempotency_keys,
+                  app.config['HOUSEKEEPING_INTERVAL'])
+scheduler.add_job('purge_data_changes', purge_data_changes,
+                  app.config['HOUSEKEEPING_INTERVAL'])
 
 # ============================================
 # DATABASE MODELS
@@ -109,6 +1349,16 @@ class Campsite(db.Model):
             'is_active': self.is_active
         }
 
+BOOKING_STATUSES = ('pending', 'confirmed', 'cancelled', 'completed')
+
+# Status changes an admin may make (cancelled and completed are final)
+BOOKING_STATUS_TRANSITIONS = {
+    'pending': ['confirmed', 'cancelled'],
+    'confirmed': ['cancelled', 'completed'],
+    'cancelled': [],
+    'completed': []
+}
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
     
@@ -125,7 +1375,7 @@ class Booking(db.Model):
     subtotal = db.Column(db.Numeric(10, 2), nullable=False)
     tax_amount = db.Column(db.Numeric(10, 2), default=0.00)
     total_price = db.Column(db.Numeric(10, 2), nullable=False)
-    booking_status = db.Column(db.Enum('pending', 'confirmed', 'cancelled', 'completed'), 
+    booking_status = db.Column(db.Enum(*BOOKING_STATUSES), 
                               nullable=False, default='pending')
     special_requests = db.Column(db.Text)
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
@@ -149,39 +1399,150 @@ class Booking(db.Model):
             'subtotal': float(self.subtotal),
             'tax_amount': float(self.tax_amount),
             'total_price': float(self.total_price),
-            'booking_status': self.booking_status,
+            'booking_status': effective_booking_status(self.booking_status, self.check_out_date),
             'special_requests': self.special_requests,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-# ============================================
-# 1. AUTHENTICATION ROUTES
-# ============================================
+class BookingCodeSequence(db.Model):
+    __tablename__ = 'booking_code_sequences'
 
-# 1.1 Register new client user (registration status: pending)
-@app.route('/api/auth/register', methods=['POST'])
-# No jwt_required() or authentication needed since here for registration
-def register():
-    try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['email', 'password', 'full_name', 'phone_number']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'message': f'{field} is required'}), 400
-        
+    # Next unreserved booking code sequence number per day
+    day = db.Column(db.Date, primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False, default=0)
+
+class DataChange(db.Model):
+    __tablename__ = 'data_changes'
+
+    # One row per committed write transaction; the newest id is the shared data version
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    changed_at = db.Column(db.DateTime, nullable=False)  # UTC
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    # Stored response of the first request made with an Idempotency-Key (per user)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    idem_key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    response_code = db.Column(db.Integer)  # NULL while the first request is still running
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idem_key', name='uq_user_idem_key'),
+        db.Index('idx_idempotency_expires', 'expires_at'),
+    )
+
+class WeatherCache(db.Model):
+    __tablename__ = 'weather_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    campsite_id = db.Column(db.Integer, db.ForeignKey('campsites.id'), nullable=False)
+    latitude = db.Column(db.Numeric(10, 8), nullable=False)
+    longitude = db.Column(db.Numeric(11, 8), nullable=False)
+    forecast_date = db.Column(db.Date, nullable=False)
+    temperature_min = db.Column(db.Numeric(5, 2))
+    temperature_max = db.Column(db.Numeric(5, 2))
+    temperature_avg = db.Column(db.Numeric(5, 2))
+    weather_code = db.Column(db.Integer)
+    weather_description = db.Column(db.String(255))
+    precipitation_probability = db.Column(db.Numeric(5, 2))
+    wind_speed = db.Column(db.Numeric(5, 2))
+    humidity = db.Column(db.Integer)
+    api_response = db.Column(db.JSON)
+    cached_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_weather_lookup', 'campsite_id', 'forecast_date', 'expires_at'),
+    )
+
+    def to_forecast_dict(self):
+        return {
+            'date': self.forecast_date.isoformat(),
+            'temperature_max': float(self.temperature_max) if self.temperature_max is not None else 25,
+            'temperature_min': float(self.temperature_min) if self.temperature_min is not None else 20,
+            'weather_code': self.weather_code if self.weather_code is not None else 0,
+            'precipitation_probability': float(self.precipitation_probability) if self.precipitation_probability is not None else 0,
+            'wind_speed': float(self.wind_speed) if self.wind_speed is not None else 0,
+        }
+
+class CampsiteOccupancy(db.Model):
+    __tablename__ = 'campsite_occupancy'
+
+    # One row per campsite per night, counting pending/confirmed bookings
+    campsite_id = db.Column(db.Integer, db.ForeignKey('campsites.id'), primary_key=True)
+    night_date = db.Column(db.Date, primary_key=True)
+    booked_people = db.Column(db.Integer, nullable=False, default=0)
+    booked_tents = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('idx_night', 'night_date'),
+    )
+
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+
+    # Written by the after_booking_insert and after_user_approval triggers
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    notification_type = db.Column(db.Enum('booking', 'payment', 'approval', 'weather_alert', 'system'),
+                                  nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    related_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('idx_user_created', 'user_id', 'created_at'),
+        db.Index('idx_user_read', 'user_id', 'is_read'),
+    )
+
+class RevenueDailyRollup(db.Model):
+    __tablename__ = 'revenue_daily_rollup'
+
+    # One row per campsite per booking day (created_at date), counting confirmed/completed bookings
+    campsite_id = db.Column(db.Integer, db.ForeignKey('campsites.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('idx_revenue_day', 'day'),
+    )
+
+# ============================================
+# 1. AUTHENTICATION ROUTES
+# ============================================
+
+# 1.1 Register new client user (registration status: pending)
+@app.route('/api/auth/register', methods=['POST'])
+# No jwt_required() or authentication needed since here for registration
+def register():
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['email', 'password', 'full_name', 'phone_number']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'success': False, 'message': f'{field} is required'}), 400
+        
         # Check if user exists
         if User.query.filter_by(email=data['email']).first():
             return jsonify({'success': False, 'message': 'Email already registered'}), 400
         
-        # Hash password
-        password_hash = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt())
+        # Hash password (on the password hashing pool)
+        password_hash = password_hasher.hash(data['password'], app.config['BCRYPT_ROUNDS'])
         
         # Create new user
         new_user = User(
             email=data['email'],
-            password_hash=password_hash.decode('utf-8'),
+            password_hash=password_hash,
             full_name=data['full_name'],
             phone_number=data['phone_number'],
             address=data.get('address', ''),
@@ -191,6 +1552,7 @@ def register():
         
         db.session.add(new_user)
         db.session.commit()
+        invalidate_dashboard_summary()
         
         return jsonify({
             'success': True,
@@ -198,6 +1560,9 @@ def register():
             'user_id': new_user.id
         }), 201
         
+    except PasswordHasherBusy:
+        return password_hasher_busy_response()
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -219,9 +1584,8 @@ def login():
         if not user:
             return jsonify({'success': False, 'message': 'Invalid email or password'}), 401
         
-        # Check password
-        if not bcrypt.checkpw(data['password'].encode('utf-8'), 
-                             user.password_hash.encode('utf-8')):
+        # Check password (on the password hashing pool)
+        if not password_hasher.check(data['password'], user.password_hash):
             return jsonify({'success': False, 'message': 'Invalid email or password'}), 401
         
         # Check if user is approved
@@ -235,6 +1599,20 @@ def login():
         if not user.is_active:
             return jsonify({'success': False, 'message': 'Account is deactivated'}), 403
         
+        # Upgrade the stored hash when the configured work factor changed
+        if PasswordHasher.rounds_of(user.password_hash) != app.config['BCRYPT_ROUNDS']:
+            try:
+                user.password_hash = password_hasher.hash(data['password'], app.config['BCRYPT_ROUNDS'])
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass  # Keep the old hash, try again on the next login
+            except Exception as e:
+                db.session.rollback()
+                logger.warning('password_rehash_failed', extra={'user_id': user.id, 'error': str(e)})
+        
+        # Prime the authorization cache with the status just checked
+        user_status_cache.set(user.id, (bool(user.is_active), user.registration_status))
+        
         # Create access token
         access_token = create_access_token(
             identity=str(user.id),
@@ -249,35 +1627,46 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        return password_hasher_busy_response()
+        
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # 1.3 Get logged in user profile information [by user_id from JWT]
 @app.route('/api/auth/profile', methods=['GET'])
-@jwt_required() # Authentication required
+@query_budget(3)
+@login_required # Authentication required
+@read_only
 def get_profile():
     try:
         # Read identity from JWT
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
-        total_trips = Booking.query.filter_by(user_id=user_id, booking_status='completed').count()
-        upcoming_trips = (
-            Booking.query
-            .filter(
-                Booking.user_id == user_id,
-                Booking.booking_status.in_(["pending", "confirmed", "cancelled"])
-            )
-            .count()
-        )
         
         if not user:
             return jsonify({'success': False, 'message': 'User not found'}), 404
         
+        # Both trip counts in one grouped aggregate
+        # (confirmed bookings past check-out count as completed, see effective_booking_status)
+        is_completed = db.or_(
+            Booking.booking_status == 'completed',
+            db.and_(Booking.booking_status == 'confirmed', Booking.check_out_date < date.today())
+        )
+        total_trips, upcoming_trips = db.session.query(
+            db.func.coalesce(db.func.sum(db.case((is_completed, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(db.case(
+                (db.and_(Booking.booking_status.in_(["pending", "confirmed", "cancelled"]),
+                         db.not_(is_completed)), 1),
+                else_=0
+            )), 0)
+        ).filter(Booking.user_id == user_id).one()
+        
         return jsonify({
             'success': True,
             'user': user.to_dict(),
-            'total_trips': total_trips,
-            'upcoming_trips': upcoming_trips
+            'total_trips': int(total_trips),
+            'upcoming_trips': int(upcoming_trips)
         }), 200
         
         
@@ -288,50 +1677,132 @@ def get_profile():
 # 2. CAMPSITE ROUTES
 # ============================================
 
+# Versioned in-memory snapshot of the campsite catalog with pre-serialized JSON
+class CampsiteCatalog:
+    """
+    Serves the public campsite list/detail without touching the database.
+    Each campsite is serialized once; the list body is the join of those
+    fragments. Admin writes call refresh_campsite(), which bumps the version.
+    The whole snapshot is reloaded after CATALOG_MAX_AGE seconds so edits
+    made on other workers show up too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self.version = 0
+        self.campsites = {}   # id -> dict (Campsite.to_dict)
+        self._fragments = {}  # id -> JSON bytes of one campsite
+        self.list_body = b''
+        self.list_etag = None
+        self._listeners = []
+
+    def add_listener(self, fn):
+        """fn(event, campsites) is called with 'reset' (all campsites) or 'update' (changed ones)"""
+        self._listeners.append(fn)
+
+    @staticmethod
+    def _encode(value):
+        return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def _publish(self, campsites, fragments):
+        active = [fragments[cid] for cid in sorted(campsites) if campsites[cid]['is_active']]
+        list_body = b'{"campsites":[' + b','.join(active) + b'],"success":true}'
+
+        self.campsites = campsites
+        self._fragments = fragments
+        self.list_body = list_body
+        self.list_etag = hashlib.sha1(list_body).hexdigest()
+        self.version += 1
+
+    def load(self):
+        """Rebuild the snapshot from the database"""
+        campsites = {c.id: c.to_dict() for c in Campsite.query.order_by(Campsite.id).all()}
+        fragments = {cid: self._encode(data) for cid, data in campsites.items()}
+
+        with self._lock:
+            self._publish(campsites, fragments)
+            self._loaded_at = time.monotonic()
+
+        for listener in self._listeners:
+            listener('reset', list(campsites.values()))
+
+    def ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > app.config['CATALOG_MAX_AGE']:
+            catalog_flight.do('catalog', self.load)
+
+    def refresh_campsite(self, campsite):
+        """Apply one created/updated campsite to the snapshot and bump the version"""
+        if self._loaded_at is None:
+            return  # Nothing cached yet; the first read loads everything
+
+        data = campsite.to_dict()
+        with self._lock:
+            campsites = dict(self.campsites)
+            fragments = dict(self._fragments)
+            campsites[campsite.id] = data
+            fragments[campsite.id] = self._encode(data)
+            self._publish(campsites, fragments)
+
+        for listener in self._listeners:
+            listener('update', [data])
+
+    def detail_body(self, campsite_id):
+        fragment = self._fragments.get(campsite_id)
+        if fragment is None:
+            return None
+        return b'{"campsite":' + fragment + b',"success":true}'
+
+    def all(self):
+        self.ensure_loaded()
+        return list(self.campsites.values())
+
+catalog_flight = SingleFlight()
+campsite_catalog = CampsiteCatalog()
+
+def conditional_json(body, etag=None):
+    """JSON bytes response with an ETag; 304 Not Modified if the client's copy is current"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag or hashlib.sha1(body).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Catalog-Version'] = str(campsite_catalog.version)
+    return response.make_conditional(request)
+
 # 2.1 Get list of all active campsites (not active campsites are hidden)
+# Served from the in-memory catalog; supports If-None-Match (304)
 @app.route('/api/campsites', methods=['GET'])
 @jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
 def get_campsites():
     try:
-        campsites = Campsite.query.filter_by(is_active=True).all() # Only active campsites
-        return jsonify({
-            'success': True,
-            'campsites': [campsite.to_dict() for campsite in campsites]
-        }), 200
+        campsite_catalog.ensure_loaded()
+        return conditional_json(campsite_catalog.list_body, campsite_catalog.list_etag)
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # 2.2 Get detailed information of a specific campsite [by campsite_id]
+# Served from the in-memory catalog; supports If-None-Match (304)
 @app.route('/api/campsites/<int:campsite_id>', methods=['GET'])
 @jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
 def get_campsite_detail(campsite_id):
     try:
-        campsite = Campsite.query.get(campsite_id)
+        campsite_catalog.ensure_loaded()
+        body = campsite_catalog.detail_body(campsite_id)
         
-        if not campsite:
+        if body is None:
             return jsonify({'success': False, 'message': 'Campsite not found'}), 404
         
-        return jsonify({
-            'success': True,
-            'campsite': campsite.to_dict()
-        }), 200
+        return conditional_json(body)
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # 2.3 Create a new campsite (admin only)
 @app.route('/api/admin/campsites', methods=['POST'])
-@jwt_required() # Admin authentication required
+@admin_required # Admin authentication required
 def create_campsite():
     try:
-        # Read identity from JWT
-        user = User.query.get(get_jwt_identity())
-        
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
         data = request.get_json()
 
         campsite = Campsite(
@@ -349,6 +1820,8 @@ def create_campsite():
 
         db.session.add(campsite)
         db.session.commit()
+        invalidate_dashboard_summary()
+        campsite_catalog.refresh_campsite(campsite)
 
         return jsonify({
             'success': True,
@@ -362,16 +1835,9 @@ def create_campsite():
 
 # 2.4 Update an existing campsite (admin only) [by campsite_id]
 @app.route('/api/admin/campsites/<int:campsite_id>', methods=['PUT'])
-@jwt_required() # Admin authentication required
+@admin_required # Admin authentication required
 def update_campsite(campsite_id):
     try:
-        # Read identity from JWT
-        user = User.query.get(get_jwt_identity())
-
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
         campsite = Campsite.query.get(campsite_id)
         if not campsite:
             return jsonify({'success': False, 'message': 'Not found'}), 404
@@ -390,6 +1856,8 @@ def update_campsite(campsite_id):
         campsite.is_active = data.get('is_active', campsite.is_active)
 
         db.session.commit()
+        invalidate_dashboard_summary()
+        campsite_catalog.refresh_campsite(campsite)
 
         return jsonify({
             'success': True,
@@ -403,22 +1871,17 @@ def update_campsite(campsite_id):
 
 # 2.5 Delete (deactivate, not delete fully) a campsite (admin only) [by campsite_id]
 @app.route('/api/admin/campsites/<int:campsite_id>', methods=['DELETE'])
-@jwt_required() # Admin authentication required
+@admin_required # Admin authentication required
 def delete_campsite(campsite_id):
     try:
-        # Read identity from JWT
-        user = User.query.get(get_jwt_identity())
-       
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
         campsite = Campsite.query.get(campsite_id)
         if not campsite:
             return jsonify({'success': False, 'message': 'Not found'}), 404
 
         campsite.is_active = False # Soft delete by deactivating (it's not removed from DB or deleted fully)
         db.session.commit() # Commit the change to the database
+        invalidate_dashboard_summary()
+        campsite_catalog.refresh_campsite(campsite)
         # Purposely not deleting fully to preserve historical booking data and integrity
 
         return jsonify({
@@ -432,17 +1895,10 @@ def delete_campsite(campsite_id):
 
 # 2.6 Get total number of active campsites (admin only)
 @app.route('/api/admin/campsites/total', methods=['GET'])
-@jwt_required() # Admin authentication required
+@admin_required # Admin authentication required
+@read_only
 def get_total_campsites():
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
         total_campsites = Campsite.query.filter_by(is_active=True).count() # Only count active campsites
         return jsonify({
             'success': True,
@@ -451,709 +1907,3287 @@ def get_total_campsites():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# ============================================
-# 3. WEATHER ROUTES
-# ============================================
+# Spatial index of active campsites for "near me" searches
+EARTH_RADIUS_KM = 6371.0088
 
-import requests
-from datetime import datetime, timedelta
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
 
-# 3.1 Get weather forecast for a campsite location (also uses free Public API) [by campsite_id]
-@app.route('/api/weather/forecast', methods=['GET'])
-@jwt_required() # Authentication or login required
-def get_weather_forecast():
+class CampsiteGridIndex:
+    """
+    Uniform latitude/longitude grid. A radius search only visits the cells
+    overlapping the search box, then ranks those candidates by haversine distance.
+    Kept in sync with the campsite catalog through its listeners.
+    """
+
+    def __init__(self, cell_degrees):
+        self.cell = cell_degrees
+        self.lon_cells = int(math.ceil(360 / cell_degrees))
+        self._lock = threading.Lock()
+        self._cells = {}  # (row, col) -> {campsite_id: (lat, lon)}
+        self._where = {}  # campsite_id -> (row, col)
+
+    def _key(self, lat, lon):
+        row = int(math.floor((lat + 90) / self.cell))
+        col = int(math.floor((lon + 180) / self.cell)) % self.lon_cells
+        return row, col
+
+    def _remove(self, campsite_id):
+        key = self._where.pop(campsite_id, None)
+        if key is not None:
+            cell = self._cells.get(key)
+            if cell is not None:
+                cell.pop(campsite_id, None)
+                if not cell:
+                    del self._cells[key]
+
+    def _add(self, campsite):
+        if not campsite['is_active']:
+            return
+        lat, lon = campsite['latitude'], campsite['longitude']
+        key = self._key(lat, lon)
+        self._cells.setdefault(key, {})[campsite['id']] = (lat, lon)
+        self._where[campsite['id']] = key
+
+    def on_catalog_change(self, event, campsites):
+        with self._lock:
+            if event == 'reset':
+                self._cells = {}
+                self._where = {}
+            for campsite in campsites:
+                self._remove(campsite['id'])
+                self._add(campsite)
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        dlat = radius_km / 111.32
+        cos_lat = math.cos(math.radians(min(89.0, abs(lat) + dlat)))
+        dlon = 180.0 if cos_lat <= 0 else min(180.0, radius_km / (111.32 * cos_lat))
+
+        row_min, col_min = self._key(max(-90.0, lat - dlat), lon - dlon)
+        row_max, col_max = self._key(min(90.0, lat + dlat), lon + dlon)
+        cols = self.lon_cells if dlon >= 180 else (col_max - col_min) % self.lon_cells + 1
+        cells_in_box = (row_max - row_min + 1) * cols
+
+        # Very large radius: walking the occupied cells is cheaper than the box
+        if cells_in_box >= len(self._cells):
+            return list(self._cells.values())
+
+        found = []
+        for row in range(row_min, row_max + 1):
+            for offset in range(cols):
+                cell = self._cells.get((row, (col_min + offset) % self.lon_cells))
+                if cell:
+                    found.append(cell)
+        return found
+
+    def search(self, lat, lon, radius_km, limit):
+        """[(distance_km, campsite_id)] within radius_km, nearest first"""
+        with self._lock:
+            cells = self._candidate_cells(lat, lon, radius_km)
+            candidates = [(cid, point) for cell in cells for cid, point in cell.items()]
+
+        matches = []
+        for cid, (clat, clon) in candidates:
+            distance = haversine_km(lat, lon, clat, clon)
+            if distance <= radius_km:
+                matches.append((distance, cid))
+        return heapq.nsmallest(limit, matches)
+
+campsite_geo_index = CampsiteGridIndex(app.config['GEO_GRID_CELL_DEGREES'])
+campsite_catalog.add_listener(campsite_geo_index.on_catalog_change)
+
+# 2.7 Search active campsites near a location, nearest first
+@app.route('/api/campsites/nearby', methods=['GET'])
+@jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
+def get_nearby_campsites():
     """
-    Get weather forecast for a campsite location
     Query params:
-        - campsite_id (required): ID of the campsite
-        - days (optional): Number of forecast days (default: 8, max: 16)
+        - lat, lon (required): search position
+        - radius_km (optional): default 50, max 20000
+        - limit (optional): default 20, max 100
     """
     try:
-        # Get query parameters
-        campsite_id = request.args.get('campsite_id', type=int)
-        days = request.args.get('days', default=8, type=int)
-        
-        # Validate parameters
-        if not campsite_id:
-            return jsonify({
-                'success': False, 
-                'message': 'campsite_id is required'
-            }), 400
-        
-        if days > 16:
-            days = 16  # Open-Meteo API maximum
-        
-        # Get campsite from database
-        campsite = Campsite.query.get(campsite_id)
-        if not campsite:
-            return jsonify({
-                'success': False, 
-                'message': 'Campsite not found'
-            }), 404
-        
-        # Log request
-        print(f"🌤️  Weather Request")
-        print(f"   Campsite: {campsite.name} (ID: {campsite_id})")
-        print(f"   Location: {float(campsite.latitude)}, {float(campsite.longitude)}")
-        print(f"   Days: {days}")
-        
-        # Call Open-Meteo API (Free weather Public API, no key or auth needed)
-        weather_api_url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            'latitude': float(campsite.latitude),
-            'longitude': float(campsite.longitude),
-            'daily': 'temperature_2m_max,temperature_2m_min,weathercode,precipitation_probability_mean,windspeed_10m_max',
-            'timezone': 'Asia/Jakarta',
-            'forecast_days': days
-        }
-        
-        # Make request to weather API
-        response = requests.get(weather_api_url, params=params, timeout=10)
-        
-        # Check response status
-        if response.status_code != 200:
-            print(f"❌ Open-Meteo API error: Status {response.status_code}")
-            print(f"   Response: {response.text[:200]}")
-            return jsonify({
-                'success': False, 
-                'message': f'Weather API returned status {response.status_code}'
-            }), 500
-        
-        # Parse weather data
-        weather_data = response.json()
-        
-        # Extract daily data
-        daily = weather_data.get('daily', {})
-        dates = daily.get('time', [])
-        temps_max = daily.get('temperature_2m_max', [])
-        temps_min = daily.get('temperature_2m_min', [])
-        weather_codes = daily.get('weathercode', [])
-        precipitation = daily.get('precipitation_probability_mean', [])
-        wind_speeds = daily.get('windspeed_10m_max', [])
-        
-        # Check if we got data
-        if not dates:
-            print(f"❌ No forecast data from API")
-            return jsonify({
-                'success': False, 
-                'message': 'No forecast data available'
-            }), 500
-        
-        # Format forecast data for Flutter
-        forecast = []
-        for i in range(len(dates)):
-            forecast.append({
-                'date': dates[i],
-                'temperature_max': round(temps_max[i], 1) if i < len(temps_max) else 25,
-                'temperature_min': round(temps_min[i], 1) if i < len(temps_min) else 20,
-                'weather_code': int(weather_codes[i]) if i < len(weather_codes) else 0,
-                'precipitation_probability': round(precipitation[i], 1) if i < len(precipitation) else 0,
-                'wind_speed': round(wind_speeds[i], 1) if i < len(wind_speeds) else 0,
-            })
-        
-        # Log success
-        print(f"✅ Successfully fetched {len(forecast)} days of forecast")
-        print(f"   Sample: {forecast[0] if forecast else 'No data'}")
-        
-        # Return formatted response
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        radius_km = request.args.get('radius_km', default=50, type=float)
+        limit = request.args.get('limit', default=20, type=int)
+
+        if lat is None or lon is None:
+            return jsonify({'success': False, 'message': 'lat and lon are required'}), 400
+        # float() accepts 'nan' and 'inf', which slip past the range checks below
+        if not all(math.isfinite(value) for value in (lat, lon, radius_km)):
+            return jsonify({'success': False, 'message': 'lat, lon and radius_km must be finite numbers'}), 400
+        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+            return jsonify({'success': False, 'message': 'lat/lon out of range'}), 400
+        if radius_km <= 0:
+            return jsonify({'success': False, 'message': 'radius_km must be positive'}), 400
+
+        radius_km = min(radius_km, 20000)
+        limit = max(1, min(limit, 100))
+
+        campsite_catalog.ensure_loaded()
+        results = []
+        for distance, campsite_id in campsite_geo_index.search(lat, lon, radius_km, limit):
+            campsite = campsite_catalog.campsites.get(campsite_id)
+            if campsite is None:
+                continue
+            results.append(dict(campsite, distance_km=round(distance, 3)))
+
         return jsonify({
             'success': True,
-            'campsite': {
-                'id': campsite.id,
-                'name': campsite.name,
-                'location': campsite.location_name
-            },
-            'forecast': forecast,
-            'total_days': len(forecast)
+            'campsites': results,
+            'total': len(results)
         }), 200
-        
-    except requests.Timeout:
-        print("❌ Weather API timeout (10s)")
-        return jsonify({
-            'success': False, 
-            'message': 'Weather API request timed out'
-        }), 504
-        
-    except requests.ConnectionError as e:
-        print(f"❌ Weather API connection error: {str(e)}")
-        return jsonify({
-            'success': False, 
-            'message': 'Could not connect to weather service'
-        }), 503
-        
-    except requests.RequestException as e:
-        print(f"❌ Weather API request error: {str(e)}")
-        return jsonify({
-            'success': False, 
-            'message': f'Weather API error: {str(e)}'
-        }), 500
-        
-    except KeyError as e:
-        print(f"❌ Missing key in weather data: {str(e)}")
-        return jsonify({
-            'success': False, 
-            'message': 'Invalid weather data format'
-        }), 500
-        
+
     except Exception as e:
-        print(f"❌ Unexpected error in weather endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            'success': False, 
-            'message': f'Server error: {str(e)}'
-        }), 500
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-def get_weather_description(code):
-    """Convert WMO weather code to description"""
-    weather_codes = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Foggy",
-        48: "Depositing rime fog",
-        51: "Light drizzle",
-        53: "Moderate drizzle",
-        55: "Dense drizzle",
-        61: "Slight rain",
-        63: "Moderate rain",
-        65: "Heavy rain",
-        71: "Slight snow",
-        73: "Moderate snow",
-        75: "Heavy snow",
-        80: "Slight rain showers",
-        81: "Moderate rain showers",
-        82: "Violent rain showers",
-        95: "Thunderstorm",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
-    }
-    return weather_codes.get(code, "Unknown")
+# Inverted index over campsite text for server-side search
+SEARCH_FIELD_WEIGHTS = {
+    'name': 3.0,
+    'facilities': 2.5,
+    'location_name': 2.0,
+    'description': 1.0
+}
 
-def calculate_camping_suitability(forecast):
-    """Calculate camping suitability score"""
-    score = 100
-    
-    # Temperature check
-    if forecast['temperature_max'] > 35 or forecast['temperature_min'] < 10:
-        score -= 30
-    
-    # Precipitation check
-    if forecast['precipitation_probability'] > 70:
-        score -= 40
-    elif forecast['precipitation_probability'] > 40:
-        score -= 20
-    
-    # Wind check
-    if forecast['wind_speed'] > 30:
-        score -= 20
-    
-    if score >= 80:
-        return "excellent"
-    elif score >= 60:
-        return "good"
-    elif score >= 40:
-        return "fair"
-    else:
-        return "poor"
+SEARCH_STOPWORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'in', 'is', 'near', 'of', 'on', 'or', 'the', 'to', 'with',
+    'dan', 'di', 'dengan', 'ke', 'untuk', 'yang'
+}
 
-def get_weather_recommendation(forecast):
-    """Get camping recommendation based on weather"""
-    if forecast['camping_suitability'] == 'excellent':
-        return "Perfect weather for camping!"
-    elif forecast['camping_suitability'] == 'good':
-        return "Good camping conditions"
-    elif forecast['camping_suitability'] == 'fair':
-        if forecast['precipitation_probability'] > 40:
-            return "Pack rain gear and waterproof equipment"
-        else:
-            return "Camping possible with proper preparation"
-    else:
-        return "Not recommended for camping. Consider rescheduling."
+def normalize_term(word):
+    """Lowercase word with a light plural strip (trails -> trail, views -> view)"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    if not text:
+        return []
+    text = re.sub(r'(?<=\w)-(?=\w)', '', text.lower())  # wi-fi -> wifi
+    return [normalize_term(w) for w in re.findall(r'[a-z0-9]+', text) if w not in SEARCH_STOPWORDS]
+
+def extract_facility_tags(facilities):
+    """'Toilet, Wi-Fi; Bonfire area' -> ['toilet', 'wifi', 'bonfire area']"""
+    if not facilities:
+        return []
+    tags = []
+    for part in re.split(r'[,;\n/]+', facilities):
+        tag = ' '.join(tokenize(part))
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+class CampsiteSearchIndex:
+    """
+    term -> {campsite_id: weighted term frequency}, ranked with BM25.
+    Campsites matching more query terms rank first; the last query term also
+    matches as a prefix (search as you type). Kept in sync with the campsite
+    catalog through its listeners, one campsite at a time.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_length = {}
+        self._tags = {}
+        self._vocabulary = []  # sorted terms, for prefix lookups
+        self._vocabulary_dirty = False
+
+    def _remove(self, campsite_id):
+        for term in self._doc_terms.pop(campsite_id, ()):
+            docs = self._postings.get(term)
+            if docs is not None:
+                docs.pop(campsite_id, None)
+                if not docs:
+                    del self._postings[term]
+                    self._vocabulary_dirty = True
+        self._doc_length.pop(campsite_id, None)
+        self._tags.pop(campsite_id, None)
+
+    def _add(self, campsite):
+        if not campsite['is_active']:
+            return
+
+        weights = {}
+        length = 0.0
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            for term in tokenize(campsite.get(field)):
+                weights[term] = weights.get(term, 0.0) + weight
+                length += weight
+
+        tags = extract_facility_tags(campsite.get('facilities'))
+        for tag in tags:
+            # Multi-word facilities are also searchable as one tag ("bonfire area")
+            if ' ' in tag:
+                weights[tag] = weights.get(tag, 0.0) + SEARCH_FIELD_WEIGHTS['facilities']
+
+        for term, weight in weights.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._vocabulary_dirty = True
+            self._postings[term][campsite['id']] = weight
+
+        self._doc_terms[campsite['id']] = set(weights)
+        self._doc_length[campsite['id']] = length
+        self._tags[campsite['id']] = tags
+
+    def on_catalog_change(self, event, campsites):
+        with self._lock:
+            if event == 'reset':
+                self._postings = {}
+                self._doc_terms = {}
+                self._doc_length = {}
+                self._tags = {}
+                self._vocabulary_dirty = True
+            for campsite in campsites:
+                self._remove(campsite['id'])
+                self._add(campsite)
+
+    def _expand_prefix(self, prefix):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def facility_tags(self, campsite_id):
+        return self._tags.get(campsite_id, [])
+
+    def search(self, query, limit, facility=None):
+        """[(score, matched_terms, campsite_id)], best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        facility = ' '.join(tokenize(facility)) if facility else None
+
+        with self._lock:
+            total_docs = len(self._doc_length)
+            if not total_docs or (not terms and not facility):
+                return []
+            avg_length = sum(self._doc_length.values()) / total_docs
+
+            scores = {}
+            matched = {}
+            for position, term in enumerate(terms):
+                expansions = [term] if term in self._postings else []
+                if position == len(terms) - 1 and len(term) >= 2:
+                    expansions = self._expand_prefix(term) or expansions
+
+                for expansion in expansions:
+                    docs = self._postings[expansion]
+                    idf = math.log(1 + (total_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for campsite_id, tf in docs.items():
+                        norm = self.K1 * (1 - self.B + self.B * self._doc_length[campsite_id] / avg_length)
+                        scores[campsite_id] = scores.get(campsite_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+                        matched.setdefault(campsite_id, set()).add(term)
+
+            if facility:
+                with_facility = {cid for cid, tags in self._tags.items() if facility in tags}
+                if not terms:
+                    scores = {cid: 0.0 for cid in with_facility}
+                else:
+                    scores = {cid: score for cid, score in scores.items() if cid in with_facility}
+
+            ranked = sorted(
+                ((score, len(matched.get(cid, ())), cid) for cid, score in scores.items()),
+                key=lambda item: (-item[1], -item[0], item[2])
+            )
+            return [(score, matched_count, cid) for score, matched_count, cid in ranked[:limit]]
+
+campsite_search_index = CampsiteSearchIndex()
+campsite_catalog.add_listener(campsite_search_index.on_catalog_change)
+
+# 2.8 Full-text search over campsite name, description, location and facilities
+@app.route('/api/campsites/search', methods=['GET'])
+@jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
+def search_campsites():
+    """
+    Query params:
+        - q (optional if facility given): e.g. "beach wifi", "bonfire Sukabumi"
+        - facility (optional): only campsites with this facility tag
+        - limit (optional): default 20, max 100
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        facility = request.args.get('facility', '').strip() or None
+        limit = max(1, min(request.args.get('limit', default=20, type=int), 100))
+
+        if not query and not facility:
+            return jsonify({'success': False, 'message': 'q or facility is required'}), 400
+
+        campsite_catalog.ensure_loaded()
+        total_terms = len(set(tokenize(query)))
+
+        results = []
+        for score, matched_terms, campsite_id in campsite_search_index.search(query, limit, facility):
+            campsite = campsite_catalog.campsites.get(campsite_id)
+            if campsite is None:
+                continue
+            results.append(dict(
+                campsite,
+                score=round(score, 4),
+                matched_all_terms=matched_terms == total_terms,
+                facility_tags=campsite_search_index.facility_tags(campsite_id)
+            ))
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'campsites': results,
+            'total': len(results)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
 # ============================================
-# 4. BOOKING ROUTES
+# 3. WEATHER ROUTES
 # ============================================
 
-from datetime import date
-from flask_jwt_extended import jwt_required, get_jwt
-import random
-import string
+WEATHER_DAILY_FIELDS = 'temperature_2m_max,temperature_2m_min,weathercode,precipitation_probability_mean,windspeed_10m_max'
+WEATHER_TIMEZONE = 'Asia/Jakarta'
+WEATHER_TIMEZONE_OFFSET = timedelta(hours=7)  # Asia/Jakarta (WIB), no daylight saving
 
-def generate_booking_code():
-    """Generate unique booking code"""
-    date_str = datetime.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices(string.digits, k=6))
-    return f"BKG{date_str}{random_str}"
+# In-process tier of the forecast cache (persistent tier is the weather_cache table)
+weather_memory_cache = TTLCache(
+    maxsize=app.config['WEATHER_MEMORY_CACHE_SIZE'],
+    ttl=app.config['WEATHER_CACHE_TTL']
+)
 
-# 4.1 Create a new campsite booking
-@app.route('/api/bookings', methods=['POST'])
-@jwt_required() # Authentication or login required
-def create_booking():
+# One shared HTTP session: connections to Open-Meteo are kept alive and reused
+weather_http = requests.Session()
+weather_http_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=1,  # one host
+    pool_maxsize=app.config['WEATHER_HTTP_POOL_SIZE'],
+    max_retries=1  # one retry of a failed connect, e.g. a kept-alive connection closed by the server
+)
+weather_http.mount('https://', weather_http_adapter)
+weather_http.mount('http://', weather_http_adapter)
+
+class WeatherAPIError(Exception):
+    """Open-Meteo answered, but not with usable forecast data"""
+
+class WeatherFetchPending(Exception):
+    """The forecast is still being fetched; the client should retry shortly"""
+
+class WeatherFetcherBusy(Exception):
+    """Too many upstream fetches are already running or waiting"""
+
+class WeatherFetcher:
+    """
+    Runs cache-miss lookups on its own thread pool, so a slow Open-Meteo ties up
+    at most `workers` threads instead of every request thread.
+    Identical lookups share one job; a request waits at most `wait` seconds for it,
+    and the job still finishes (and fills the caches) after the request gave up.
+    A group job covers several keys at once, and single lookups of those keys join it.
+    """
+
+    def __init__(self, workers, max_queue):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='weather')
+        self._max_jobs = workers + max_queue
+        self._jobs = {}  # key -> future of its result
+        self._running = 0  # jobs on the pool, a group job counts once
+        self._lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        with app.app_context():
+            return fn(*args)
+
+    def submit(self, key, fn, *args):
+        """Start a job (or join the running one with the same key) and return its future"""
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None:
+                return future
+            if self._running >= self._max_jobs:
+                raise WeatherFetcherBusy()
+            self._running += 1
+            future = self._jobs[key] = self._executor.submit(self._run, fn, *args)
+
+        future.add_done_callback(lambda _: self._forget([key]))
+        return future
+
+    def submit_group(self, keys, fn, *args):
+        """
+        Join the running jobs of `keys` and start one job for the keys that have none.
+        fn(new_keys, *args) returns {key: result}; every key gets a future of its own
+        result, so later lookups of single keys join the group job too.
+        Returns {key: future}.
+        """
+        with self._lock:
+            futures = {key: self._jobs[key] for key in keys if key in self._jobs}
+            new_keys = [key for key in keys if key not in futures]
+            if new_keys:
+                if self._running >= self._max_jobs:
+                    raise WeatherFetcherBusy()
+                self._running += 1
+                for key in new_keys:
+                    futures[key] = self._jobs[key] = Future()
+                job = self._executor.submit(self._run, fn, new_keys, *args)
+
+        if new_keys:
+            job.add_done_callback(lambda done: self._settle(done, new_keys, futures))
+        return futures
+
+    def _settle(self, job, keys, futures):
+        """Hand each key of a finished group job its share of the result"""
+        error = job.exception()
+        results = job.result() if error is None else {}
+        for key in keys:
+            if error is not None:
+                futures[key].set_exception(error)
+            else:
+                futures[key].set_result(results.get(key))
+        self._forget(keys)
+
+    def _forget(self, keys):
+        with self._lock:
+            self._running -= 1
+            for key in keys:
+                self._jobs.pop(key, None)
+
+    def do(self, key, fn, *args, wait=None):
+        future = self.submit(key, fn, *args)
+        try:
+            return future.result(timeout=app.config['WEATHER_FETCH_WAIT'] if wait is None else wait)
+        except FutureTimeoutError:
+            raise WeatherFetchPending()
+
+    def do_group(self, keys, fn, *args, wait=None):
+        """submit_group and wait for every key's result; returns {key: result}"""
+        futures = self.submit_group(keys, fn, *args)
+        _, not_done = wait_for_futures(
+            futures.values(), timeout=app.config['WEATHER_FETCH_WAIT'] if wait is None else wait
+        )
+        if not_done:
+            raise WeatherFetchPending()
+        return {key: future.result() for key, future in futures.items()}
+
+    @property
+    def queue_depth(self):
+        return self._running
+
+weather_fetcher = WeatherFetcher(
+    workers=app.config['WEATHER_FETCH_WORKERS'],
+    max_queue=app.config['WEATHER_FETCH_MAX_QUEUE']
+)
+
+def weather_retry_response(e):
+    """202 while the forecast is still being fetched, 503 when the fetch pool is full"""
+    if isinstance(e, WeatherFetchPending):
+        response = jsonify({'success': False, 'pending': True,
+                            'message': 'Weather forecast is being fetched, please retry shortly'})
+        response.status_code = 202
+    else:
+        response = jsonify({'success': False, 'message': 'Weather service is busy, please try again'})
+        response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+def forecast_today():
+    """Today's date in the forecast timezone, so cache keys line up with Open-Meteo dates"""
+    return (datetime.utcnow() + WEATHER_TIMEZONE_OFFSET).date()
+
+def format_daily_forecast(daily):
+    """Format Open-Meteo daily data for Flutter"""
+    dates = daily.get('time', [])
+    temps_max = daily.get('temperature_2m_max', [])
+    temps_min = daily.get('temperature_2m_min', [])
+    weather_codes = daily.get('weathercode', [])
+    precipitation = daily.get('precipitation_probability_mean', [])
+    wind_speeds = daily.get('windspeed_10m_max', [])
+
+    forecast = []
+    for i in range(len(dates)):
+        forecast.append({
+            'date': dates[i],
+            'temperature_max': round(temps_max[i], 1) if i < len(temps_max) and temps_max[i] is not None else 25,
+            'temperature_min': round(temps_min[i], 1) if i < len(temps_min) and temps_min[i] is not None else 20,
+            'weather_code': int(weather_codes[i]) if i < len(weather_codes) and weather_codes[i] is not None else 0,
+            'precipitation_probability': round(precipitation[i], 1) if i < len(precipitation) and precipitation[i] is not None else 0,
+            'wind_speed': round(wind_speeds[i], 1) if i < len(wind_speeds) and wind_speeds[i] is not None else 0,
+        })
+    return forecast
+
+def fetch_forecasts_from_api(coordinates, days):
+    """
+    Call Open-Meteo API (Free weather Public API, no key or auth needed)
+    for one or more (latitude, longitude) pairs in a single round-trip.
+    Returns one forecast list per coordinate, in the same order.
+    """
+    params = {
+        'latitude': ','.join(str(lat) for lat, _ in coordinates),
+        'longitude': ','.join(str(lon) for _, lon in coordinates),
+        'daily': WEATHER_DAILY_FIELDS,
+        'timezone': WEATHER_TIMEZONE,
+        'forecast_days': days
+    }
+
+    started = time.perf_counter()
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['campsite_id', 'check_in_date', 'check_out_date', 'num_people']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'message': f'{field} is required'}), 400
-        
-        # Get campsite
-        campsite = Campsite.query.get(data['campsite_id'])
-        if not campsite:
-            return jsonify({'success': False, 'message': 'Campsite not found'}), 404
-        
-        # Parse dates
-        check_in = datetime.strptime(data['check_in_date'], '%Y-%m-%d').date()
-        check_out = datetime.strptime(data['check_out_date'], '%Y-%m-%d').date()
+        response = weather_http.get(
+            app.config['WEATHER_API_URL'], params=params,
+            timeout=(app.config['WEATHER_CONNECT_TIMEOUT'], app.config['WEATHER_READ_TIMEOUT'])
+        )
+    except requests.RequestException as e:
+        kind = 'timeout' if isinstance(e, requests.Timeout) else \
+               'connection' if isinstance(e, requests.ConnectionError) else 'request'
+        upstream_request_duration.observe(time.perf_counter() - started, service='open_meteo', outcome=kind)
+        upstream_errors_total.inc(service='open_meteo', kind=kind)
+        logger.error('open_meteo_request_failed', extra={'kind': kind, 'error': str(e), 'locations': len(coordinates)})
+        raise
+
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        upstream_request_duration.observe(elapsed, service='open_meteo', outcome='http_error')
+        upstream_errors_total.inc(service='open_meteo', kind=f'http_{response.status_code}')
+        logger.error('open_meteo_http_error', extra={
+            'status': response.status_code, 'body': response.text[:200], 'locations': len(coordinates)
+        })
+        raise WeatherAPIError(f'Weather API returned status {response.status_code}')
+
+    upstream_request_duration.observe(elapsed, service='open_meteo', outcome='ok')
+    logger.info('open_meteo_request', extra={
+        'locations': len(coordinates), 'days': days, 'duration_ms': round(elapsed * 1000, 1)
+    })
+
+    # Open-Meteo returns an object for one location and a list for several
+    weather_data = response.json()
+    if isinstance(weather_data, dict):
+        weather_data = [weather_data]
+
+    if len(weather_data) != len(coordinates):
+        upstream_errors_total.inc(service='open_meteo', kind='invalid_response')
+        raise WeatherAPIError('Invalid weather data format')
+
+    forecasts = [format_daily_forecast(item.get('daily', {})) for item in weather_data]
+    if not all(forecasts):
+        upstream_errors_total.inc(service='open_meteo', kind='empty_forecast')
+        logger.error('open_meteo_empty_forecast', extra={'locations': len(coordinates)})
+        raise WeatherAPIError('No forecast data available')
+
+    return forecasts
+
+def campsite_coordinates(campsite):
+    """Coordinates used as upstream key; campsites at the same spot share one forecast"""
+    return (round(float(campsite.latitude), 4), round(float(campsite.longitude), 4))
+
+def load_cached_forecasts(campsite_ids, start_date, days):
+    """
+    Read forecasts from the weather_cache table (served by idx_weather_lookup).
+    Returns {campsite_id: (forecast, expires_at)} for campsites with every day
+    present and not past the stale window; other campsites are left out.
+    An expires_at in the past means the forecast is stale but still servable.
+    """
+    end_date = start_date + timedelta(days=days - 1)
+    rows = WeatherCache.query.filter(
+        WeatherCache.campsite_id.in_(campsite_ids),
+        WeatherCache.forecast_date >= start_date,
+        WeatherCache.forecast_date <= end_date,
+        WeatherCache.expires_at > datetime.now() - timedelta(seconds=app.config['WEATHER_STALE_TTL'])
+    ).order_by(WeatherCache.id).all()
+
+    # Newest row wins if the same day was cached more than once
+    by_campsite = {}
+    for row in rows:
+        by_campsite.setdefault(row.campsite_id, {})[row.forecast_date] = row
+
+    result = {}
+    for campsite_id, by_date in by_campsite.items():
+        if len(by_date) < days:
+            continue
+        ordered = [by_date[d] for d in sorted(by_date)]
+        result[campsite_id] = (
+            [row.to_forecast_dict() for row in ordered],
+            min(row.expires_at for row in ordered)
+        )
+    return result
+
+def forecast_expiry():
+    """
+    When a forecast fetched now expires. Each one gets a random share of
+    WEATHER_CACHE_TTL_JITTER taken off, so forecasts fetched together do not
+    all expire (and get refreshed) at the same moment.
+    """
+    ttl = app.config['WEATHER_CACHE_TTL']
+    ttl -= random.uniform(0, ttl * app.config['WEATHER_CACHE_TTL_JITTER'])
+    return datetime.now() + timedelta(seconds=ttl)
+
+def save_forecasts_to_cache(entries):
+    """
+    Replace the cached days of each (campsite, forecast) pair in one transaction.
+    Returns the expires_at of each entry, in the same order.
+    """
+    expiries = [forecast_expiry() for _ in entries]
+
+    try:
+        for (campsite, forecast), expires_at in zip(entries, expiries):
+            forecast_dates = [datetime.strptime(day['date'], '%Y-%m-%d').date() for day in forecast]
+
+            WeatherCache.query.filter(
+                WeatherCache.campsite_id == campsite.id,
+                WeatherCache.forecast_date.in_(forecast_dates)
+            ).delete(synchronize_session=False)
+
+            for forecast_date, day in zip(forecast_dates, forecast):
+                db.session.add(WeatherCache(
+                    campsite_id=campsite.id,
+                    latitude=campsite.latitude,
+                    longitude=campsite.longitude,
+                    forecast_date=forecast_date,
+                    temperature_min=day['temperature_min'],
+                    temperature_max=day['temperature_max'],
+                    temperature_avg=round((day['temperature_max'] + day['temperature_min']) / 2, 2),
+                    weather_code=day['weather_code'],
+                    weather_description=get_weather_description(day['weather_code']),
+                    precipitation_probability=day['precipitation_probability'],
+                    wind_speed=day['wind_speed'],
+                    api_response=day,
+                    expires_at=expires_at
+                ))
+
+        db.session.commit()
+    except Exception as e:
+        # A failed cache write must never fail the forecast request itself
+        db.session.rollback()
+        logger.warning('weather_cache_write_failed', extra={'error': str(e)})
+
+    return expiries
+
+def build_forecast_payload(campsite, forecast):
+    return {
+        'campsite': {
+            'id': campsite.id,
+            'name': campsite.name,
+            'location': campsite.location_name
+        },
+        'forecast': forecast,
+        'total_days': len(forecast)
+    }
+
+def remember_forecast_payload(cache_key, payload, expires_at):
+    """Keep (payload, expires_at) in process memory until it is past the stale window"""
+    ttl = (expires_at - datetime.now()).total_seconds() + app.config['WEATHER_STALE_TTL']
+    if ttl > 0:
+        weather_memory_cache.set(cache_key, (payload, expires_at), ttl=ttl)
+
+def record_forecast_lookup(tier, expires_at):
+    """Count a served forecast by cache tier, and how stale it was if it was past expires_at"""
+    staleness = (datetime.now() - expires_at).total_seconds()
+    if staleness > 0:
+        weather_cache_lookups.inc(tier=tier, result='stale')
+        weather_cache_staleness.observe(staleness)
+        return True
+    weather_cache_lookups.inc(tier=tier, result='hit' if tier != 'upstream' else 'miss')
+    return False
+
+def fetch_forecast_groups(campsites, start_date, days):
+    """
+    Fetch the forecasts of many campsites from Open-Meteo, one upstream call per
+    WEATHER_BATCH_SIZE locations, and write them to both cache tiers.
+    Returns {campsite_id: (payload, expires_at)}.
+    """
+    coordinates = sorted({campsite_coordinates(c) for c in campsites})
+    logger.info('weather_forecast_batch_fetch', extra={
+        'campsites': len(campsites), 'locations': len(coordinates), 'days': days
+    })
+
+    forecasts = []
+    batch_size = app.config['WEATHER_BATCH_SIZE']
+    for i in range(0, len(coordinates), batch_size):
+        forecasts.extend(fetch_forecasts_from_api(coordinates[i:i + batch_size], days))
+    by_coordinates = dict(zip(coordinates, forecasts))
+
+    entries = [(c, by_coordinates[campsite_coordinates(c)]) for c in campsites]
+    results = {}
+    for (campsite, forecast), expires_at in zip(entries, save_forecasts_to_cache(entries)):
+        payload = build_forecast_payload(campsite, forecast)
+        remember_forecast_payload((campsite.id, start_date, days), payload, expires_at)
+        results[campsite.id] = (payload, expires_at)
+    return results
+
+def load_forecast_payload(campsite_id, start_date, days):
+    """
+    Cache-miss path of get_forecast_payload: weather_cache table, then Open-Meteo.
+    Returns (payload, expires_at, tier), or None if the campsite does not exist.
+    """
+    campsite = Campsite.query.get(campsite_id)
+    if not campsite:
+        return None
+
+    cached = load_cached_forecasts([campsite.id], start_date, days).get(campsite.id)
+    if cached:
+        forecast, expires_at = cached
+        payload = build_forecast_payload(campsite, forecast)
+        remember_forecast_payload((campsite_id, start_date, days), payload, expires_at)
+        return payload, expires_at, 'database'
+
+    logger.info('weather_forecast_fetch', extra={
+        'campsite_id': campsite_id, 'latitude': float(campsite.latitude),
+        'longitude': float(campsite.longitude), 'days': days
+    })
+    payload, expires_at = fetch_forecast_groups([campsite], start_date, days)[campsite.id]
+    return payload, expires_at, 'upstream'
+
+def refresh_forecasts(campsite_ids, start_date, days):
+    """Fetcher job behind stale-while-revalidate: fetch again and overwrite both tiers"""
+    campsites = Campsite.query.filter(Campsite.id.in_(campsite_ids)).all()
+    if campsites:
+        fetch_forecast_groups(campsites, start_date, days)
+
+def revalidate_in_background(campsite_ids, start_date, days):
+    """Queue a refresh of stale forecasts without waiting for it"""
+    campsite_ids = tuple(sorted(campsite_ids))
+    try:
+        weather_fetcher.submit(('refresh', campsite_ids, start_date, days),
+                               refresh_forecasts, campsite_ids, start_date, days)
+    except WeatherFetcherBusy:
+        pass  # the next request (or the pre-warmer) will try again
+
+def get_forecast_payload(campsite_id, days):
+    """
+    Read-through forecast lookup: process memory -> weather_cache table -> Open-Meteo.
+    Misses run on the weather fetcher; concurrent misses for the same key share one job.
+    A stale forecast is returned right away while a refresh runs in the background.
+    Returns the response payload, or None if the campsite does not exist.
+    Raises WeatherFetchPending if the lookup did not finish in time.
+    """
+    start_date = forecast_today()
+    cache_key = (campsite_id, start_date, days)
+
+    entry = weather_memory_cache.get(cache_key)
+    if entry is not None:
+        payload, expires_at = entry
+        tier = 'memory'
+    else:
+        loaded = weather_fetcher.do(cache_key, load_forecast_payload, campsite_id, start_date, days)
+        if loaded is None:
+            return None
+        payload, expires_at, tier = loaded
+
+    if record_forecast_lookup(tier, expires_at):
+        revalidate_in_background([campsite_id], start_date, days)
+    return payload
+
+def load_forecast_group(cache_keys, start_date, days):
+    """
+    Group fetcher job of the batch endpoint, for the keys no other job is fetching.
+    Returns {cache_key: (payload, expires_at, tier)}, the shape load_forecast_payload returns.
+    """
+    campsite_ids = [campsite_id for campsite_id, _, _ in cache_keys]
+    campsites = Campsite.query.filter(Campsite.id.in_(campsite_ids)).all()
+    return {
+        (campsite_id, start_date, days): (payload, expires_at, 'upstream')
+        for campsite_id, (payload, expires_at) in fetch_forecast_groups(campsites, start_date, days).items()
+    }
+
+def get_forecast_payloads(campsites, days):
+    """
+    Batched read-through lookup for many campsites.
+    Misses are coalesced per campsite key with every other lookup in flight; the
+    rest are de-duplicated by coordinates and fetched in one upstream round-trip.
+    Stale forecasts are returned and refreshed together in the background.
+    Returns {campsite_id: payload}.
+    """
+    start_date = forecast_today()
+    payloads = {}
+    stale_ids = []
+
+    def serve(campsite_id, payload, expires_at, tier):
+        payloads[campsite_id] = payload
+        if record_forecast_lookup(tier, expires_at):
+            stale_ids.append(campsite_id)
+
+    pending = []
+    for campsite in campsites:
+        entry = weather_memory_cache.get((campsite.id, start_date, days))
+        if entry is not None:
+            serve(campsite.id, *entry, 'memory')
+        else:
+            pending.append(campsite)
+
+    if pending:
+        cached = load_cached_forecasts([c.id for c in pending], start_date, days)
+        missing = []
+        for campsite in pending:
+            if campsite.id in cached:
+                forecast, expires_at = cached[campsite.id]
+                payload = build_forecast_payload(campsite, forecast)
+                remember_forecast_payload((campsite.id, start_date, days), payload, expires_at)
+                serve(campsite.id, payload, expires_at, 'database')
+            else:
+                missing.append(campsite)
+
+        if missing:
+            cache_keys = [(c.id, start_date, days) for c in missing]
+            fetched = weather_fetcher.do_group(cache_keys, load_forecast_group, start_date, days)
+            for (campsite_id, _, _), loaded in fetched.items():
+                if loaded is not None:
+                    serve(campsite_id, *loaded)
+
+    if stale_ids:
+        revalidate_in_background(stale_ids, start_date, days)
+    return payloads
+
+def forecasts_due_for_refresh(start_date, days, refresh_before):
+    """
+    Active campsites whose cached forecast for the next `days` days is missing
+    or expires before `refresh_before`, soonest expiry first (missing ones first)
+    """
+    end_date = start_date + timedelta(days=days - 1)
+    expiry = db.session.query(
+        WeatherCache.campsite_id.label('campsite_id'),
+        db.func.min(WeatherCache.expires_at).label('expires_at'),
+        db.func.count(db.distinct(WeatherCache.forecast_date)).label('cached_days')
+    ).filter(
+        WeatherCache.forecast_date >= start_date,
+        WeatherCache.forecast_date <= end_date,
+        WeatherCache.expires_at > datetime.now()
+    ).group_by(WeatherCache.campsite_id).subquery()
+
+    rows = db.session.query(Campsite.id)\
+        .outerjoin(expiry, expiry.c.campsite_id == Campsite.id)\
+        .filter(
+            Campsite.is_active == True,
+            db.or_(
+                expiry.c.campsite_id.is_(None),
+                expiry.c.cached_days < days,
+                expiry.c.expires_at <= refresh_before
+            )
+        )\
+        .order_by(expiry.c.expires_at.is_(None).desc(), expiry.c.expires_at, Campsite.id)
+    return [row.id for row in rows]
+
+def prewarm_weather_forecasts():
+    """
+    Fetch forecasts of active campsites before they expire, so user requests
+    find them cached. At most WEATHER_PREWARM_MAX_LOCATIONS campsites per run;
+    the rest are picked up by the next run.
+    """
+    start_date = forecast_today()
+    days = app.config['WEATHER_PREWARM_DAYS']
+    refresh_before = datetime.now() + timedelta(seconds=app.config['WEATHER_REFRESH_AHEAD'])
+
+    due = forecasts_due_for_refresh(start_date, days, refresh_before)
+    due = due[:app.config['WEATHER_PREWARM_MAX_LOCATIONS']]
+    if not due:
+        return 0
+
+    campsites = Campsite.query.filter(Campsite.id.in_(due)).all()
+    fetch_forecast_groups(campsites, start_date, days)
+    return len(campsites)
+
+scheduler.add_job('prewarm_weather_forecasts', prewarm_weather_forecasts,
+                  app.config['WEATHER_PREWARM_INTERVAL'])
+
+# 3.1 Get weather forecast for a campsite location (also uses free Public API) [by campsite_id]
+@app.route('/api/weather/forecast', methods=['GET'])
+@login_required # Authentication or login required
+def get_weather_forecast():
+    """
+    Get weather forecast for a campsite location
+    Query params:
+        - campsite_id (required): ID of the campsite
+        - days (optional): Number of forecast days (default: 8, max: 16)
+    Forecasts are cached in memory and in the weather_cache table until they expire.
+    """
+    try:
+        # Get query parameters
+        campsite_id = request.args.get('campsite_id', type=int)
+        days = request.args.get('days', default=8, type=int)
         
-        # Validate dates
-        if check_in >= check_out:
+        # Validate parameters
+        if not campsite_id:
             return jsonify({
                 'success': False, 
-                'message': 'Check-out date must be after check-in date'
+                'message': 'campsite_id is required'
             }), 400
         
-        if check_in < date.today():
+        if days > 16:
+            days = 16  # Open-Meteo API maximum
+        if days < 1:
+            days = 1
+        
+        payload = get_forecast_payload(campsite_id, days)
+        if payload is None:
             return jsonify({
                 'success': False, 
-                'message': 'Check-in date cannot be in the past'
-            }), 400
+                'message': 'Campsite not found'
+            }), 404
         
-        # Calculate prices
-        total_nights = (check_out - check_in).days
-        price_per_night = float(campsite.price_per_night)
-        subtotal = price_per_night * total_nights
-        tax_amount = subtotal * 0.10
-        total_price = subtotal + tax_amount
+        # Return formatted response
+        return jsonify({'success': True, **payload}), 200
         
-        # Create booking
-        booking_code = generate_booking_code()
+    except (WeatherFetchPending, WeatherFetcherBusy) as e:
+        return weather_retry_response(e)
         
-        new_booking = Booking(
-            booking_code=booking_code,
-            user_id=user_id,
-            campsite_id=data['campsite_id'],
-            check_in_date=check_in,
-            check_out_date=check_out,
-            num_people=data['num_people'],
-            num_tents=data.get('num_tents', 1),
-            total_nights=total_nights,
-            price_per_night=price_per_night,
-            subtotal=subtotal,
-            tax_amount=tax_amount,
-            total_price=total_price,
-            booking_status='pending',
-            special_requests=data.get('special_requests', '')
-        )
+    except WeatherAPIError as e:
+        return jsonify({
+            'success': False, 
+            'message': str(e)
+        }), 500
         
-        db.session.add(new_booking)
-        db.session.commit()
+    except requests.Timeout:
+        return jsonify({
+            'success': False, 
+            'message': 'Weather API request timed out'
+        }), 504
         
+    except requests.ConnectionError:
         return jsonify({
-            'success': True,
-            'message': 'Booking created successfully',
-            'booking': new_booking.to_dict()
-        }), 201
+            'success': False, 
+            'message': 'Could not connect to weather service'
+        }), 503
+        
+    except requests.RequestException as e:
+        return jsonify({
+            'success': False, 
+            'message': f'Weather API error: {str(e)}'
+        }), 500
+        
+    except KeyError as e:
+        logger.error('weather_data_missing_key', extra={'key': str(e)})
+        return jsonify({
+            'success': False, 
+            'message': 'Invalid weather data format'
+        }), 500
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+        logger.exception('weather_forecast_failed')
+        return jsonify({
+            'success': False, 
+            'message': f'Server error: {str(e)}'
+        }), 500
+
+# 3.2 Get weather forecasts for many campsites in one request [by campsite_ids, default all active]
+@app.route('/api/weather/forecast/batch', methods=['GET'])
+@login_required # Authentication or login required
+def get_weather_forecast_batch():
+    """
+    Get weather forecasts for several campsites with one upstream round-trip
+    Query params:
+        - campsite_ids (optional): comma separated IDs (default: all active campsites)
+        - days (optional): Number of forecast days (default: 8, max: 16)
+    """
+    try:
+        days = request.args.get('days', default=8, type=int)
+        days = max(1, min(days, 16))  # Open-Meteo API maximum is 16
+
+        campsite_ids_param = request.args.get('campsite_ids', '').strip()
+        if campsite_ids_param:
+            try:
+                campsite_ids = [int(x) for x in campsite_ids_param.split(',') if x.strip()]
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'campsite_ids must be a comma separated list of integers'
+                }), 400
+
+            campsites = Campsite.query.filter(Campsite.id.in_(campsite_ids)).all()
+            found_ids = {c.id for c in campsites}
+            not_found = [cid for cid in campsite_ids if cid not in found_ids]
+        else:
+            campsites = Campsite.query.filter_by(is_active=True).all()
+            not_found = []
+
+        payloads = get_forecast_payloads(campsites, days)
+
+        return jsonify({
+            'success': True,
+            'forecasts': [payloads[c.id] for c in campsites],
+            'total_campsites': len(campsites),
+            'not_found': not_found
+        }), 200
+
+    except (WeatherFetchPending, WeatherFetcherBusy) as e:
+        return weather_retry_response(e)
+
+    except WeatherAPIError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+    except requests.Timeout:
+        return jsonify({'success': False, 'message': 'Weather API request timed out'}), 504
+
+    except requests.ConnectionError:
+        return jsonify({'success': False, 'message': 'Could not connect to weather service'}), 503
+
+    except requests.RequestException as e:
+        return jsonify({'success': False, 'message': f'Weather API error: {str(e)}'}), 500
+
+    except Exception as e:
+        logger.exception('weather_forecast_batch_failed')
+        return jsonify({'success': False, 'message': f'Server error: {str(e)}'}), 500
+
+def get_weather_description(code):
+    """Convert WMO weather code to description"""
+    weather_codes = {
+        0: "Clear sky",
+        1: "Mainly clear",
+        2: "Partly cloudy",
+        3: "Overcast",
+        45: "Foggy",
+        48: "Depositing rime fog",
+        51: "Light drizzle",
+        53: "Moderate drizzle",
+        55: "Dense drizzle",
+        61: "Slight rain",
+        63: "Moderate rain",
+        65: "Heavy rain",
+        71: "Slight snow",
+        73: "Moderate snow",
+        75: "Heavy snow",
+        80: "Slight rain showers",
+        81: "Moderate rain showers",
+        82: "Violent rain showers",
+        95: "Thunderstorm",
+        96: "Thunderstorm with slight hail",
+        99: "Thunderstorm with heavy hail"
+    }
+    return weather_codes.get(code, "Unknown")
+
+def calculate_camping_suitability(forecast):
+    """Calculate camping suitability score"""
+    score = 100
+    
+    # Temperature check
+    if forecast['temperature_max'] > 35 or forecast['temperature_min'] < 10:
+        score -= 30
+    
+    # Precipitation check
+    if forecast['precipitation_probability'] > 70:
+        score -= 40
+    elif forecast['precipitation_probability'] > 40:
+        score -= 20
+    
+    # Wind check
+    if forecast['wind_speed'] > 30:
+        score -= 20
+    
+    if score >= 80:
+        return "excellent"
+    elif score >= 60:
+        return "good"
+    elif score >= 40:
+        return "fair"
+    else:
+        return "poor"
+
+def get_weather_recommendation(forecast):
+    """Get camping recommendation based on weather"""
+    if forecast['camping_suitability'] == 'excellent':
+        return "Perfect weather for camping!"
+    elif forecast['camping_suitability'] == 'good':
+        return "Good camping conditions"
+    elif forecast['camping_suitability'] == 'fair':
+        if forecast['precipitation_probability'] > 40:
+            return "Pack rain gear and waterproof equipment"
+        else:
+            return "Camping possible with proper preparation"
+    else:
+        return "Not recommended for camping. Consider rescheduling."
+
+# ============================================
+# 4. BOOKING ROUTES
+# ============================================
+
+class BookingCodeAllocator:
+    """
+    Unique booking codes BKG<yyyymmdd><6 digits> without a database round-trip per code.
+
+    Each process reserves a block of sequence numbers for the day from the
+    booking_code_sequences table (one short transaction per block) and hands
+    them out from memory. The 6 digits are the sequence number run through a
+    multiplicative permutation mod 10^6, so codes are unique per day but not
+    consecutive. Numbers left in a block when the process exits are skipped.
+    """
+
+    MODULUS = 10 ** 6
+    MULTIPLIER = 737353  # coprime with 10, so x -> x * MULTIPLIER mod 10^6 is a bijection
+    OFFSET = 271828
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 0
+        self._end = 0
+        self.blocks_reserved = 0
+
+    def _reserve_block(self, day):
+        """Returns the first sequence number of a new block for `day`"""
+        table = BookingCodeSequence.__table__
+        for attempt in range(3):
+            try:
+                # Own connection/transaction: the block stays reserved even if the booking rolls back
+                with coordination_engine().begin() as connection:
+                    # Increment first: the UPDATE takes the row lock, so the value read
+                    # back afterwards belongs to this transaction alone
+                    updated = connection.execute(
+                        table.update().where(table.c.day == day)
+                             .values(next_value=table.c.next_value + self.block_size)
+                    ).rowcount
+
+                    if updated:
+                        start = connection.execute(
+                            db.select(table.c.next_value).where(table.c.day == day)
+                        ).scalar() - self.block_size
+                    else:
+                        connection.execute(table.insert().values(day=day, next_value=self.block_size))
+                        start = 0
+                self.blocks_reserved += 1
+                return start
+            except IntegrityError:
+                # Another worker created today's row first; increment it instead
+                if attempt == 2:
+                    raise
+
+    def scramble(self, sequence):
+        """Map a sequence number to the digit part of the code"""
+        low = (sequence % self.MODULUS * self.MULTIPLIER + self.OFFSET) % self.MODULUS
+        high = sequence // self.MODULUS  # only past a million codes a day, keeps codes unique
+        return f'{high or ""}{low:06d}'
+
+    def next_code(self):
+        with self._lock:
+            today = datetime.now().date()
+            if today != self._day or self._next >= self._end:
+                self._next = self._reserve_block(today)
+                self._end = self._next + self.block_size
+                self._day = today
+
+            sequence = self._next
+            self._next += 1
+
+        return f"BKG{today.strftime('%Y%m%d')}{self.scramble(sequence)}"
+
+booking_code_allocator = BookingCodeAllocator(app.config['BOOKING_CODE_BLOCK_SIZE'])
+
+def generate_booking_code():
+    """Generate unique booking code"""
+    return booking_code_allocator.next_code()
+
+# Idempotency-Key: retries of the same request get the first response back
+class IdempotencyConflict(Exception):
+    pass
+
+def idempotency_request_hash():
+    payload = json.dumps([request.method, request.path, request.get_json(silent=True)],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def claim_idempotency_key(user_id, key, request_hash):
+    """
+    Returns None when this request owns the key and should run, otherwise the
+    stored row (as a mapping) of the request that claimed it first.
+    Uses its own transactions on the coordination pool, so the claim is visible
+    to other workers at once.
+    """
+    table = IdempotencyKey.__table__
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=app.config['IDEMPOTENCY_KEY_TTL'])
+
+    try:
+        with coordination_engine().begin() as connection:
+            connection.execute(table.insert().values(
+                user_id=user_id, idem_key=key, request_hash=request_hash,
+                created_at=now, expires_at=expires_at
+            ))
+        return None
+    except IntegrityError:
+        pass
+
+    with coordination_engine().begin() as connection:
+        record = connection.execute(
+            db.select(table).where(table.c.user_id == user_id, table.c.idem_key == key)
+        ).mappings().first()
+        if record is None:
+            raise IdempotencyConflict('Idempotency-Key is being released, retry')
+
+        stale_cutoff = now - timedelta(seconds=app.config['IDEMPOTENCY_PROCESSING_TIMEOUT'])
+        abandoned = record['response_code'] is None and record['created_at'] < stale_cutoff
+        if record['expires_at'] > now and not abandoned:
+            return record
+
+        # Expired, or the first request died before storing a response: take the key over
+        taken = connection.execute(
+            table.update()
+                 .where(table.c.id == record['id'], table.c.created_at == record['created_at'])
+                 .values(request_hash=request_hash, response_code=None, response_body=None,
+                         created_at=now, expires_at=expires_at)
+        ).rowcount
+        if not taken:
+            raise IdempotencyConflict('A request with this Idempotency-Key is in progress')
+        return None
+
+def finish_idempotency_key(user_id, key, response):
+    table = IdempotencyKey.__table__
+    with coordination_engine().begin() as connection:
+        condition = (table.c.user_id == user_id) & (table.c.idem_key == key)
+        if response.status_code >= 500:
+            # Nothing was done; let the client retry with the same key
+            connection.execute(table.delete().where(condition))
+        else:
+            connection.execute(table.update().where(condition).values(
+                response_code=response.status_code,
+                response_body=response.get_data(as_text=True)
+            ))
+
+def idempotent_response(payload, status):
+    """
+    Build a route's JSON response. With an Idempotency-Key, also store it on the
+    key in the session's transaction, so it commits together with the route's
+    changes: call it before db.session.commit().
+    """
+    response = make_response(jsonify(payload), status)
+    claimed = g.get('idempotency_key')
+    if claimed is not None:
+        table = IdempotencyKey.__table__
+        user_id, key = claimed
+        db.session.execute(
+            table.update()
+                 .where(table.c.user_id == user_id, table.c.idem_key == key)
+                 .values(response_code=status, response_body=response.get_data(as_text=True))
+        )
+        g.idempotency_response_stored = True
+    return response
+
+def idempotent(fn):
+    """
+    Honour an optional Idempotency-Key header on a POST route (place it below
+    the auth decorator). The first request with a key runs and its response is
+    stored; retries with the same key and body get that response back without
+    running the route again. Routes with side effects build their success
+    response with idempotent_response() so it is stored in their own transaction.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key', '').strip()
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'success': False, 'message': 'Idempotency-Key is too long (max 255)'}), 400
+
+        user_id = int(get_jwt_identity())
+        request_hash = idempotency_request_hash()
+
+        try:
+            record = claim_idempotency_key(user_id, key, request_hash)
+        except IdempotencyConflict as e:
+            response = jsonify({'success': False, 'message': str(e)})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+
+        if record is not None:
+            if record['request_hash'] != request_hash:
+                return jsonify({
+                    'success': False,
+                    'message': 'Idempotency-Key was already used with a different request'
+                }), 422
+            if record['response_code'] is None:
+                response = jsonify({'success': False, 'message': 'A request with this Idempotency-Key is in progress'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+
+            response = Response(record['response_body'], status=record['response_code'], mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        g.idempotency_key = (user_id, key)
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            finish_idempotency_key(user_id, key, make_response('', 500))
+            raise
+
+        # Already committed with the route's changes, unless the route failed after storing it
+        if response.status_code >= 500 or not g.get('idempotency_response_stored'):
+            finish_idempotency_key(user_id, key, response)
+        return response
+
+    return wrapper
+
+# 4.1 Create a new campsite booking
+# Send an Idempotency-Key header to make retries safe
+@app.route('/api/bookings', methods=['POST'])
+@login_required # Authentication or login required
+@idempotent
+def create_booking():
+    try:
+        # Read identity from JWT
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['campsite_id', 'check_in_date', 'check_out_date', 'num_people']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'success': False, 'message': f'{field} is required'}), 400
+        
+        # Parse dates
+        check_in = datetime.strptime(data['check_in_date'], '%Y-%m-%d').date()
+        check_out = datetime.strptime(data['check_out_date'], '%Y-%m-%d').date()
+        
+        # Validate dates
+        if check_in >= check_out:
+            return jsonify({
+                'success': False, 
+                'message': 'Check-out date must be after check-in date'
+            }), 400
+        
+        if check_in < date.today():
+            return jsonify({
+                'success': False, 
+                'message': 'Check-in date cannot be in the past'
+            }), 400
+        
+        num_people = int(data['num_people'])
+        if num_people < 1:
+            return jsonify({'success': False, 'message': 'num_people must be at least 1'}), 400
+
+        # Get campsite and lock its row until commit, so concurrent bookings
+        # for the same campsite check capacity one at a time (no overselling)
+        campsite = Campsite.query.filter_by(id=data['campsite_id']).with_for_update().first()
+        if not campsite:
+            return jsonify({'success': False, 'message': 'Campsite not found'}), 404
+
+        # Capacity check against the per-night occupancy index
+        is_available, remaining = check_availability(campsite, check_in, check_out, num_people)
+        if not is_available:
+            return jsonify({
+                'success': False,
+                'message': f'Not enough capacity for these dates ({remaining} places left)'
+            }), 409
+        
+        # Calculate prices
+        total_nights = (check_out - check_in).days
+        price_per_night = float(campsite.price_per_night)
+        subtotal = price_per_night * total_nights
+        tax_amount = subtotal * 0.10
+        total_price = subtotal + tax_amount
+        
+        # Create booking
+        booking_code = generate_booking_code()
+        
+        new_booking = Booking(
+            booking_code=booking_code,
+            user_id=user_id,
+            campsite_id=data['campsite_id'],
+            check_in_date=check_in,
+            check_out_date=check_out,
+            num_people=num_people,
+            num_tents=data.get('num_tents', 1),
+            total_nights=total_nights,
+            price_per_night=price_per_night,
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            total_price=total_price,
+            booking_status='pending',
+            special_requests=data.get('special_requests', '')
+        )
+        
+        db.session.add(new_booking)
+        apply_booking_occupancy(new_booking, 1)
+        db.session.flush()
+
+        # Stored for Idempotency-Key retries in the same transaction as the booking
+        response = idempotent_response({
+            'success': True,
+            'message': 'Booking created successfully',
+            'booking': new_booking.to_dict()
+        }, 201)
+        db.session.commit()
+        invalidate_dashboard_summary()
+        invalidate_unread_count(user_id)  # after_booking_insert added a notification
+        
+        return response
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Booking fields of the list endpoints (same names and formats as Booking.to_dict)
+BOOKING_LIST_FIELDS = (
+    projected_field('id', Booking.id),
+    projected_field('booking_code', Booking.booking_code),
+    projected_field('user_id', Booking.user_id),
+    projected_field('campsite_id', Booking.campsite_id),
+    projected_field('check_in_date', Booking.check_in_date, convert=to_iso),
+    projected_field('check_out_date', Booking.check_out_date, convert=to_iso),
+    projected_field('num_people', Booking.num_people),
+    projected_field('num_tents', Booking.num_tents),
+    projected_field('total_nights', Booking.total_nights),
+    projected_field('price_per_night', Booking.price_per_night, convert=to_float),
+    projected_field('subtotal', Booking.subtotal, convert=to_float),
+    projected_field('tax_amount', Booking.tax_amount, convert=to_float),
+    projected_field('total_price', Booking.total_price, convert=to_float),
+    projected_field('booking_status', Booking.booking_status, Booking.check_out_date,
+                    convert=effective_booking_status),
+    projected_field('special_requests', Booking.special_requests),
+    projected_field('created_at', Booking.created_at, convert=to_iso)
+)
+
+my_booking_projection = Projection(
+    *BOOKING_LIST_FIELDS,
+    projected_field('campsite_name', Campsite.name),
+    projected_field('campsite_location', Campsite.location_name),
+    projected_field('campsite_image_url', Campsite.image_url)
+)
+
+booking_list_projection = Projection(
+    *BOOKING_LIST_FIELDS,
+    projected_field('campsite_name', Campsite.name)
+)
+
+def booking_rows_query(columns):
+    """SELECT of the given columns from bookings, with the campsite joined in"""
+    return db.session.query(*columns).select_from(Booking)\
+                     .join(Campsite, Campsite.id == Booking.campsite_id)
+
+# 4.2 Get list of bookings for logged in user (client) [by user_id from JWT, by bookings]
+# Query params: fields (optional) = comma separated subset of the booking fields
+@app.route('/api/bookings/my-bookings', methods=['GET'])
+@query_budget(2)
+@login_required # Authentication or login required
+@read_only
+def get_my_bookings():
+    try:
+        # Read identity from JWT
+        user_id = get_jwt_identity()
+
+        try:
+            fields = my_booking_projection.requested_fields()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        # Only the needed columns, campsite joined in the same SELECT
+        columns, serialize = my_booking_projection.plan(fields)
+        rows = booking_rows_query(columns)\
+                    .filter(Booking.user_id == user_id)\
+                    .order_by(Booking.created_at.desc())\
+                    .all()
+
+        return json_response({
+            'success': True,
+            'bookings': [serialize(row) for row in rows]
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 4.3 Get list of all bookings for admin management (admin only)
+# Query params: limit + cursor for keyset pages, stream=1 for a streamed full list,
+# fields (optional) = comma separated subset of the booking fields
+@app.route('/api/bookings/bookings-list', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_bookings_list():
+    try:
+        try:
+            limit, cursor = read_page_args()
+            fields = booking_list_projection.requested_fields()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        # Cursor columns are selected even if not requested
+        columns, serialize = booking_list_projection.plan(fields, extra_columns=(Booking.created_at, Booking.id))
+        query = booking_rows_query(columns)
+
+        # Streaming mode: rows are fetched from a server-side cursor in batches
+        if wants_stream():
+            rows = query.order_by(Booking.created_at.desc(), Booking.id.desc())\
+                        .yield_per(app.config['STREAM_BATCH_SIZE'])
+            return stream_json_list('bookings', rows, serialize)
+
+        if limit is not None:
+            try:
+                rows, next_cursor = keyset_page(query, Booking, limit, cursor)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+
+            return json_response({
+                'success': True,
+                'bookings': [serialize(row) for row in rows],
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            })
+
+        # No paging params: whole list (kept for existing clients)
+        rows = query.order_by(Booking.created_at.desc(), Booking.id.desc()).all()
+        
+        return json_response({
+            'success': True,
+            'bookings': [serialize(row) for row in rows]
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 4.4 Get total count of all bookings (admin only)
+@app.route('/api/admin/bookings/total', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def get_total_bookings():
+    try:
+        total_bookings = Booking.query.count()
+
+        return jsonify({
+            'success': True,
+            'total_bookings': total_bookings
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 4.5 Get total count of today's bookings (admin only) [by created_at date]
+@app.route('/api/admin/bookings/today', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def get_today_bookings():
+    try:
+        today_start, tomorrow_start = today_range()
+
+        # Range on created_at instead of DATE(created_at) so an index can be used
+        total_today_bookings = Booking.query.filter(
+            Booking.created_at >= today_start,
+            Booking.created_at < tomorrow_start
+        ).count()
+
+        return jsonify({
+            'success': True,
+            'total_today_bookings': total_today_bookings
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 4.6 Get detailed information of a specific booking (admin only) [by booking_id]
+@app.route('/api/admin/bookings/<int:booking_id>', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_booking_detail(booking_id):
+    booking = Booking.query.options(joinedload(Booking.campsite)).filter_by(id=booking_id).first()
+
+    if not booking:
+        return jsonify({
+            'success': False,
+            'message': 'Booking not found'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'booking': {
+            'id': booking.id,
+            'booking_code': booking.booking_code,
+            'booking_status': effective_booking_status(booking.booking_status, booking.check_out_date),
+            'campsite_id': booking.campsite_id,
+            'campsite_name': booking.campsite.name,
+            'check_in_date': booking.check_in_date.strftime('%Y-%m-%d'),
+            'check_out_date': booking.check_out_date.strftime('%Y-%m-%d'),
+            'num_people': booking.num_people,
+            'num_tents': booking.num_tents,
+            'price_per_night': booking.price_per_night,
+            'total_nights': booking.total_nights,
+            'subtotal': booking.subtotal,
+            'tax_amount': booking.tax_amount,
+            'total_price': booking.total_price,
+            'special_requests': booking.special_requests,
+            'created_at': booking.created_at.isoformat()
+        }
+    }), 200
+
+# 4.7 Update booking status (admin only) [by booking_id]
+@app.route('/api/admin/bookings/<int:booking_id>/status', methods=['PUT'])
+@admin_required # Admin authentication required
+def update_booking_status(booking_id):
+    try:
+        # Lock the booking row until commit, so concurrent changes of the same
+        # booking run one at a time and its nights/revenue are adjusted once
+        booking = Booking.query.filter_by(id=booking_id).with_for_update().first()
+        if not booking:
+            return jsonify({
+                'success': False,
+                'message': 'Booking not found'
+            }), 404
+
+        data = request.get_json()
+        new_status = data.get('booking_status')
+        current_status = booking.booking_status
+
+        # Cek apakah transisi diizinkan
+        if new_status not in BOOKING_STATUS_TRANSITIONS.get(current_status, []):
+            return jsonify({
+                'success': False,
+                'message': f'Cannot change status from {current_status} to {new_status}'
+            }), 400
+
+        # Update status only if it is still the one checked above (databases
+        # without row locks), then free the nights of cancelled/completed bookings
+        updated = Booking.query.filter(
+            Booking.id == booking.id,
+            Booking.booking_status == current_status
+        ).update({'booking_status': new_status}, synchronize_session=False)
+        if updated != 1:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': 'Booking status was changed by another request, please try again'
+            }), 409
+
+        if current_status in OCCUPYING_STATUSES and new_status not in OCCUPYING_STATUSES:
+            apply_booking_occupancy(booking, -1)
+        if (current_status in REVENUE_STATUSES) != (new_status in REVENUE_STATUSES):
+            apply_booking_revenue(booking, 1 if new_status in REVENUE_STATUSES else -1)
+        db.session.commit()
+        invalidate_dashboard_summary()
+
+        return jsonify({
+            'success': True,
+            'message': 'Booking status updated successfully',
+            'booking': booking.to_dict()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+# 4.8 Update the status of many bookings at once (admin only)
+def read_batch_items(data, id_field, value_field):
+    """
+    Items of a batch request as [(id, value)]. Accepts
+        {"items": [{"<id_field>": 1, "<value_field>": "..."}, ...]}
+    or the shorthand
+        {"<id_field>s": [1, 2, 3], "<value_field>": "..."}
+    Raises ValueError with a message when the body is malformed.
+    """
+    if 'items' in data:
+        if not isinstance(data['items'], list):
+            raise ValueError('items must be a list')
+        items = []
+        for item in data['items']:
+            if not isinstance(item, dict) or id_field not in item or value_field not in item:
+                raise ValueError(f'Every item needs {id_field} and {value_field}')
+            items.append((item[id_field], item[value_field]))
+    elif isinstance(data.get(f'{id_field}s'), list) and value_field in data:
+        items = [(item_id, data[value_field]) for item_id in data[f'{id_field}s']]
+    else:
+        raise ValueError(f'items or {id_field}s with {value_field} is required')
+
+    if not items:
+        raise ValueError('No items given')
+    if len(items) > app.config['BATCH_MAX_ITEMS']:
+        raise ValueError(f'At most {app.config["BATCH_MAX_ITEMS"]} items per request')
+    if not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id, _ in items):
+        raise ValueError(f'{id_field} must be an integer')
+    return items
+
+@app.route('/api/admin/bookings/status/batch', methods=['POST'])
+@admin_required # Admin authentication required
+def batch_update_booking_status():
+    """
+    Every item is checked against BOOKING_STATUS_TRANSITIONS; the valid ones are
+    applied together in one transaction with one UPDATE per (from, to) status
+    pair, and the occupancy index and revenue rollup are adjusted in bulk.
+    Invalid items are skipped and reported in `results`.
+    """
+    try:
+        try:
+            items = read_batch_items(request.get_json(silent=True) or {}, 'booking_id', 'booking_status')
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        bookings = {
+            booking.id: booking
+            for booking in Booking.query.filter(Booking.id.in_({booking_id for booking_id, _ in items}))
+                                         .with_for_update()
+        }
+
+        results = []
+        groups = {}  # (current_status, new_status) -> [booking]
+        seen = set()
+        for booking_id, new_status in items:
+            booking = bookings.get(booking_id)
+            result = {'booking_id': booking_id, 'booking_status': new_status, 'success': False}
+
+            if booking_id in seen:
+                result['message'] = 'Duplicate booking_id in this batch'
+            elif booking is None:
+                result['message'] = 'Booking not found'
+            elif new_status not in BOOKING_STATUS_TRANSITIONS.get(booking.booking_status, []):
+                result['message'] = f'Cannot change status from {booking.booking_status} to {new_status}'
+            else:
+                groups.setdefault((booking.booking_status, new_status), []).append(booking)
+                result.update(success=True, previous_status=booking.booking_status,
+                              message='Booking status updated successfully')
+
+            seen.add(booking_id)
+            results.append(result)
+
+        released = []
+        revenue_deltas = {}
+        for (current_status, new_status), group in groups.items():
+            Booking.query.filter(
+                Booking.id.in_([booking.id for booking in group]),
+                Booking.booking_status == current_status
+            ).update({'booking_status': new_status}, synchronize_session=False)
+
+            if current_status in OCCUPYING_STATUSES and new_status not in OCCUPYING_STATUSES:
+                released.extend(group)
+            if (current_status in REVENUE_STATUSES) != (new_status in REVENUE_STATUSES):
+                sign = 1 if new_status in REVENUE_STATUSES else -1
+                for key, (count, revenue) in booking_revenue_deltas(group, sign).items():
+                    totals = revenue_deltas.setdefault(key, [0, 0])
+                    totals[0] += count
+                    totals[1] += revenue
+
+        apply_occupancy_deltas(booking_occupancy_deltas(released, -1))
+        apply_revenue_deltas(revenue_deltas)
+        db.session.commit()
+
+        updated = sum(1 for result in results if result['success'])
+        if updated:
+            invalidate_dashboard_summary()
+
+        return jsonify({
+            'success': True,
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ============================================
+# 5. ADMIN ROUTES
+# ============================================
+
+# User fields of the admin user endpoints (same names and formats as User.to_dict)
+USER_FIELDS = (
+    projected_field('id', User.id),
+    projected_field('email', User.email),
+    projected_field('full_name', User.full_name),
+    projected_field('phone_number', User.phone_number),
+    projected_field('role', User.role),
+    projected_field('registration_status', User.registration_status),
+    projected_field('address', User.address),
+    projected_field('is_active', User.is_active),
+    projected_field('created_at', User.created_at, convert=to_iso)
+)
+
+pending_user_projection = Projection(
+    *USER_FIELDS,
+    projected_field('days_pending', User.created_at, convert=lambda created_at: (datetime.now() - created_at).days)
+)
+
+# 5.1 Get list of pending user registrations (admin only) [by registration_status]
+# Query params: fields (optional) = comma separated subset of the user fields
+@app.route('/api/admin/users/pending', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def get_pending_users():
+    try:
+        try:
+            fields = pending_user_projection.requested_fields()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        columns, serialize = pending_user_projection.plan(fields)
+        rows = db.session.query(*columns).select_from(User)\
+                         .filter(User.registration_status == 'pending')\
+                         .order_by(User.created_at.asc())\
+                         .all()
+        
+        return json_response({
+            'success': True,
+            'pending_users': [serialize(row) for row in rows]
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.2 Approve or reject a pending user registration (admin only) [by target_user_id]
+@app.route('/api/admin/users/<int:target_user_id>/approval', methods=['PUT'])
+@admin_required # Admin authentication required
+def approve_reject_user(target_user_id):
+    try:
+        target_user = User.query.get(target_user_id)
+        if not target_user:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+        
+        data = request.get_json()
+        action = data.get('action')  # 'approve' or 'reject'
+        
+        if action not in ['approve', 'reject']:
+            return jsonify({'success': False, 'message': 'Invalid action'}), 400
+        
+        if action == 'approve':
+            target_user.registration_status = 'approved'
+            message = 'User approved successfully'
+        else:
+            target_user.registration_status = 'rejected'
+            message = 'User rejected'
+        
+        db.session.commit()
+        invalidate_dashboard_summary()
+        invalidate_user_status(target_user.id)
+        if action == 'approve':
+            invalidate_unread_count(target_user.id)  # after_user_approval added a notification
+        
+        return jsonify({
+            'success': True,
+            'message': message
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.3 Get total count of registered users (including active and inactive) (admin only)
+# WILL COME BACK TO THIS LATER TO CONFIGURE BETWEEN ACTIVE/INACTIVE/TOTAL
+# IF NEED TO MONTIOR THE EXACT AND DETAILED AMOUNT OF USERS
+# ESPECIALLY FOR ADMIN PURPOSES AND FROM DASHBOARD VIEW
+@app.route('/api/admin/users/total', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def get_total_users():
+    try:
+        total_users = User.query.count()
+        return jsonify({
+            'success': True,
+            'total_users': total_users
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Booking count per user as one grouped aggregate (no COUNT per user)
+user_booking_counts = db.select(
+    Booking.user_id.label('user_id'),
+    db.func.count(Booking.id).label('total_bookings')
+).group_by(Booking.user_id).subquery()
+
+user_list_projection = Projection(
+    projected_field('id', User.id),
+    projected_field('name', User.full_name),
+    projected_field('email', User.email),
+    projected_field('status', User.is_active, convert=lambda is_active: 'active' if is_active else 'inactive'),
+    projected_field('role', User.role),
+    projected_field('joined', User.created_at, convert=lambda created_at: created_at.strftime('%Y-%m-%d')),
+    projected_field('bookings', db.func.coalesce(user_booking_counts.c.total_bookings, 0))
+)
+
+# 5.4 Get list of all registered users with their infos (including active and inactive) (admin only)
+# Active and inactive users included for admin monitoring
+# Query params: limit + cursor for keyset pages, stream=1 for a streamed full list,
+# fields (optional) = comma separated subset of the user list fields
+@app.route('/api/admin/users', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_all_users():
+    try:
+        try:
+            limit, cursor = read_page_args()
+            fields = user_list_projection.requested_fields()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        # Cursor columns are selected even if not requested
+        columns, serialize = user_list_projection.plan(fields, extra_columns=(User.created_at, User.id))
+        query = db.session.query(*columns).select_from(User)
+        if 'bookings' in fields:
+            query = query.outerjoin(user_booking_counts, user_booking_counts.c.user_id == User.id)
+
+        # Streaming mode: rows are fetched from a server-side cursor in batches
+        if wants_stream():
+            rows = query.order_by(User.created_at.desc(), User.id.desc())\
+                        .yield_per(app.config['STREAM_BATCH_SIZE'])
+            return stream_json_list('users', rows, serialize)
+
+        if limit is not None:
+            try:
+                rows, next_cursor = keyset_page(query, User, limit, cursor)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+
+            return json_response({
+                'success': True,
+                'users': [serialize(row) for row in rows],
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            })
+
+        # No paging params: whole list (kept for existing clients)
+        rows = query.order_by(User.created_at.desc(), User.id.desc()).all()
+        users_data = [serialize(row) for row in rows]
+
+        return json_response({
+            'success': True,
+            'total_users': len(users_data),
+            'users': users_data
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    
+# 5.5 Get detailed information of a specific user (admin only) [by user_id]
+@app.route('/api/admin/users/<int:user_id>', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def get_user_detail(user_id):
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+
+        # Hitung total bookings user
+        total_bookings = Booking.query.filter_by(user_id=user.id).count()
+
+        user_data = user.to_dict()
+        user_data['total_bookings'] = total_bookings
+
+        return jsonify({'success': True, 'user': user_data}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.6 Get background housekeeping jobs and their metrics (admin only)
+@app.route('/api/admin/housekeeping', methods=['GET'])
+@admin_required # Admin authentication required
+def get_housekeeping_status():
+    return jsonify({
+        'success': True,
+        'scheduler_running': scheduler.is_running(),
+        'scheduler_active': scheduler.is_active(),  # False: another worker runs the jobs
+        'jobs': scheduler.status()
+    }), 200
+
+# 5.7 Run a housekeeping job right now (admin only) [by job_name]
+@app.route('/api/admin/housekeeping/<job_name>/run', methods=['POST'])
+@admin_required # Admin authentication required
+def run_housekeeping_job(job_name):
+    if job_name not in scheduler.jobs:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+
+    rows = scheduler.run_job(job_name)
+
+    return jsonify({
+        'success': True,
+        'job': job_name,
+        'rows_processed': rows,
+        'metrics': scheduler.status()[job_name]
+    }), 200
+
+# 5.8 Get every admin dashboard number in one request (admin only)
+dashboard_cache = TTLCache(maxsize=1, ttl=app.config['DASHBOARD_CACHE_TTL'])
+
+def today_range():
+    """[start of today, start of tomorrow) as datetimes, for range filters on created_at"""
+    today_start = datetime.combine(date.today(), datetime.min.time())
+    return today_start, today_start + timedelta(days=1)
+
+def invalidate_dashboard_summary():
+    dashboard_cache.clear()
+
+def compute_dashboard_summary():
+    """All dashboard counters in a single SELECT of scalar subqueries"""
+    today_start, tomorrow_start = today_range()
+
+    def scalar(query):
+        return query.scalar_subquery()
+
+    row = db.session.query(
+        scalar(db.session.query(db.func.count(Campsite.id)).filter(Campsite.is_active == True)),
+        scalar(db.session.query(db.func.count(Booking.id))),
+        scalar(db.session.query(db.func.count(Booking.id)).filter(
+            Booking.created_at >= today_start,
+            Booking.created_at < tomorrow_start
+        )),
+        scalar(db.session.query(db.func.count(Booking.id)).filter(Booking.booking_status == 'pending')),
+        scalar(db.session.query(db.func.count(User.id))),
+        scalar(db.session.query(db.func.count(User.id)).filter(User.registration_status == 'pending')),
+        scalar(db.session.query(db.func.coalesce(db.func.sum(Booking.total_price), 0)).filter(
+            Booking.booking_status.in_(['confirmed', 'completed'])
+        ))
+    ).one()
+
+    return {
+        'total_campsites': row[0],
+        'total_bookings': row[1],
+        'total_today_bookings': row[2],
+        'pending_bookings': row[3],
+        'total_users': row[4],
+        'pending_approvals': row[5],
+        'total_revenue': float(row[6] or 0),
+        'generated_at': datetime.now().isoformat()
+    }
+
+@app.route('/api/admin/dashboard/summary', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_dashboard_summary():
+    try:
+        summary = dashboard_cache.get('summary')
+        if summary is None:
+            summary = compute_dashboard_summary()
+            dashboard_cache.set('summary', summary)
+
+        return jsonify({'success': True, **summary}), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.9 Activate or deactivate a user account (admin only) [by target_user_id]
+@app.route('/api/admin/users/<int:target_user_id>/status', methods=['PUT'])
+@admin_required # Admin authentication required
+def update_user_active_status(target_user_id):
+    try:
+        target_user = User.query.get(target_user_id)
+        if not target_user:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+
+        data = request.get_json()
+        is_active = data.get('is_active')
+
+        if not isinstance(is_active, bool):
+            return jsonify({'success': False, 'message': 'is_active must be true or false'}), 400
+
+        target_user.is_active = is_active
+        db.session.commit()
+        invalidate_user_status(target_user.id)
+
+        return jsonify({
+            'success': True,
+            'message': 'User activated' if is_active else 'User deactivated'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.10 Export booking summaries as CSV or NDJSON (admin only)
+BOOKING_EXPORT_COLUMNS = (
+    'id', 'booking_code', 'check_in_date', 'check_out_date', 'total_nights', 'num_people',
+    'total_price', 'booking_status', 'customer_name', 'customer_email', 'customer_phone',
+    'campsite_name', 'campsite_location', 'payment_status', 'payment_method', 'booking_date'
+)
+
+def export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (int, float, str)):
+        return str(value)  # Decimal
+    return value
+
+def build_booking_export_query(args):
+    """SELECT on view_booking_summary with the filters from the query string; raises ValueError"""
+    conditions = []
+    params = {}
+
+    date_field = args.get('date_field', 'check_in_date')
+    if date_field not in ('check_in_date', 'booking_date'):
+        raise ValueError('date_field must be check_in_date or booking_date')
+
+    if args.get('from'):
+        params['date_from'] = datetime.strptime(args['from'], '%Y-%m-%d').date()
+        conditions.append(f'v.{date_field} >= :date_from')
+    if args.get('to'):
+        # Inclusive end date; compared as "< next day" so it also works for the booking_date timestamp
+        params['date_to'] = datetime.strptime(args['to'], '%Y-%m-%d').date() + timedelta(days=1)
+        conditions.append(f'v.{date_field} < :date_to')
+
+    if args.get('status'):
+        statuses = [status.strip() for status in args['status'].split(',') if status.strip()]
+        invalid = [status for status in statuses if status not in BOOKING_STATUSES]
+        if invalid:
+            raise ValueError(f'Invalid status: {", ".join(invalid)}')
+        placeholders = []
+        for i, status in enumerate(statuses):
+            params[f'status_{i}'] = status
+            placeholders.append(f':status_{i}')
+        conditions.append(f'v.booking_status IN ({", ".join(placeholders)})')
+
+    join = ''
+    if args.get('campsite_id'):
+        # The view has no campsite_id column; filter through the bookings table
+        params['campsite_id'] = int(args['campsite_id'])
+        join = ' JOIN bookings b ON b.id = v.id'
+        conditions.append('b.campsite_id = :campsite_id')
+
+    sql = f'SELECT {", ".join("v." + column for column in BOOKING_EXPORT_COLUMNS)} FROM view_booking_summary v{join}'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY v.id'
+    return text(sql), params
+
+def stream_booking_export(statement, params, export_format):
+    """
+    Generator over a server-side cursor: one chunk per fetch, so memory stays
+    constant no matter how many rows match and the first bytes go out right away
+    """
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+
+    with read_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(statement, params)
+
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(BOOKING_EXPORT_COLUMNS)
+            yield buffer.getvalue()
+
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+
+            if export_format == 'csv':
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(
+                    json.dumps(dict(zip(BOOKING_EXPORT_COLUMNS, map(export_value, row)))) + '\n'
+                    for row in rows
+                )
+
+@app.route('/api/admin/bookings/export', methods=['GET'])
+@admin_required # Admin authentication required
+@read_only
+def export_bookings():
+    """
+    Query params:
+        - format: csv (default) or ndjson
+        - from, to (optional): YYYY-MM-DD, inclusive
+        - date_field (optional): check_in_date (default) or booking_date
+        - status (optional): one or more comma separated booking statuses
+        - campsite_id (optional)
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+
+        try:
+            statement, params = build_booking_export_query(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        extension, mimetype = ('csv', 'text/csv') if export_format == 'csv' else ('ndjson', 'application/x-ndjson')
+        filename = f'bookings_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
+        # No Content-Length: the body goes out with chunked transfer encoding as it is generated
+        return Response(
+            stream_with_context(stream_booking_export(statement, params, export_format)),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'no-store',
+                'X-Accel-Buffering': 'no'  # stop nginx from buffering the whole export
+            }
+        )
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 5.11 Approve or reject many pending user registrations at once (admin only)
+USER_APPROVAL_ACTIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+@app.route('/api/admin/users/approval/batch', methods=['POST'])
+@admin_required # Admin authentication required
+def batch_approve_reject_users():
+    """
+    Body: {"items": [{"user_id": 1, "action": "approve"}, ...]}
+       or {"user_ids": [1, 2, 3], "action": "approve"}
+    Valid items are applied in one transaction, one UPDATE per action.
+    """
+    try:
+        try:
+            items = read_batch_items(request.get_json(silent=True) or {}, 'user_id', 'action')
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        existing = {
+            row.id for row in db.session.query(User.id)
+                                        .filter(User.id.in_({user_id for user_id, _ in items}))
+                                        .with_for_update()
+        }
+
+        results = []
+        groups = {}  # registration_status -> [user_id]
+        seen = set()
+        for user_id, action in items:
+            result = {'user_id': user_id, 'action': action, 'success': False}
+
+            if user_id in seen:
+                result['message'] = 'Duplicate user_id in this batch'
+            elif user_id not in existing:
+                result['message'] = 'User not found'
+            elif action not in USER_APPROVAL_ACTIONS:
+                result['message'] = 'Invalid action'
+            else:
+                groups.setdefault(USER_APPROVAL_ACTIONS[action], []).append(user_id)
+                result.update(success=True, registration_status=USER_APPROVAL_ACTIONS[action],
+                              message='User approved successfully' if action == 'approve' else 'User rejected')
+
+            seen.add(user_id)
+            results.append(result)
+
+        for registration_status, user_ids in groups.items():
+            User.query.filter(User.id.in_(user_ids))\
+                      .update({'registration_status': registration_status}, synchronize_session=False)
+        db.session.commit()
+
+        updated_ids = [user_id for user_ids in groups.values() for user_id in user_ids]
+        for user_id in updated_ids:
+            invalidate_user_status(user_id)
+        for user_id in groups.get('approved', []):
+            invalidate_unread_count(user_id)  # after_user_approval added a notification
+        if updated_ids:
+            invalidate_dashboard_summary()
+
+        return jsonify({
+            'success': True,
+            'updated': len(updated_ids),
+            'failed': len(results) - len(updated_ids),
+            'results': results
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ============================================
+# 6. AVAILABILITY ROUTES
+# ============================================
+
+# Booking statuses that hold a place at the campsite (same as check_campsite_availability)
+OCCUPYING_STATUSES = ('pending', 'confirmed')
+
+def booking_nights(check_in, check_out):
+    """Nights covered by a stay: check-in night up to (not including) check-out day"""
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+def booking_occupancy_deltas(bookings, sign):
+    """{(campsite_id, night): [people, tents]} to add (sign=1) or remove (sign=-1) for these bookings"""
+    deltas = {}
+    for booking in bookings:
+        for night in booking_nights(booking.check_in_date, booking.check_out_date):
+            counts = deltas.setdefault((booking.campsite_id, night), [0, 0])
+            counts[0] += sign * booking.num_people
+            counts[1] += sign * (booking.num_tents or 1)
+    return deltas
+
+def apply_occupancy_deltas(deltas):
+    """
+    Apply booking_occupancy_deltas() to the occupancy index, locking every
+    affected row in one SELECT ... FOR UPDATE. Does not commit.
+    """
+    if not deltas:
+        return
+
+    rows = CampsiteOccupancy.query.filter(
+        db.tuple_(CampsiteOccupancy.campsite_id, CampsiteOccupancy.night_date).in_(list(deltas))
+    ).with_for_update().all()
+    existing = {(row.campsite_id, row.night_date): row for row in rows}
+
+    for (campsite_id, night), (people, tents) in deltas.items():
+        row = existing.get((campsite_id, night))
+        if row is None:
+            if people <= 0:
+                continue
+            row = CampsiteOccupancy(
+                campsite_id=campsite_id,
+                night_date=night,
+                booked_people=0,
+                booked_tents=0
+            )
+            db.session.add(row)
+        row.booked_people = max(0, row.booked_people + people)
+        row.booked_tents = max(0, row.booked_tents + tents)
+
+def apply_booking_occupancy(booking, sign):
+    """
+    Add (sign=1) or remove (sign=-1) a booking's people and tents from the
+    per-night occupancy index. Does not commit; the caller commits it together
+    with the booking change so both stay consistent.
+    """
+    apply_occupancy_deltas(booking_occupancy_deltas([booking], sign))
+
+def get_peak_occupancy(campsite_id, check_in, check_out):
+    """Highest number of booked people on any night of the stay"""
+    peak = db.session.query(db.func.max(CampsiteOccupancy.booked_people)).filter(
+        CampsiteOccupancy.campsite_id == campsite_id,
+        CampsiteOccupancy.night_date >= check_in,
+        CampsiteOccupancy.night_date < check_out
+    ).scalar()
+    return peak or 0
+
+def check_availability(campsite, check_in, check_out, num_people):
+    """Returns (is_available, remaining_capacity) for a stay"""
+    remaining = campsite.capacity - get_peak_occupancy(campsite.id, check_in, check_out)
+    return num_people <= remaining, max(0, remaining)
+
+def find_available_campsites(check_in, check_out, num_people):
+    """Active campsites with room for num_people on every night of the stay"""
+    peak = db.session.query(
+        CampsiteOccupancy.campsite_id.label('campsite_id'),
+        db.func.max(CampsiteOccupancy.booked_people).label('peak_people')
+    ).filter(
+        CampsiteOccupancy.night_date >= check_in,
+        CampsiteOccupancy.night_date < check_out
+    ).group_by(CampsiteOccupancy.campsite_id).subquery()
+
+    booked = db.func.coalesce(peak.c.peak_people, 0)
+    return db.session.query(Campsite, booked).outerjoin(
+        peak, peak.c.campsite_id == Campsite.id
+    ).filter(
+        Campsite.is_active == True,
+        Campsite.capacity - booked >= num_people
+    ).order_by(Campsite.id).all()
+
+def rebuild_occupancy_index():
+    """Recompute the whole occupancy index from pending/confirmed bookings"""
+    CampsiteOccupancy.query.delete(synchronize_session=False)
+
+    totals = {}
+    bookings = db.session.query(
+        Booking.campsite_id, Booking.check_in_date, Booking.check_out_date,
+        Booking.num_people, Booking.num_tents
+    ).filter(Booking.booking_status.in_(OCCUPYING_STATUSES))
+
+    for campsite_id, check_in, check_out, num_people, num_tents in bookings:
+        for night in booking_nights(check_in, check_out):
+            counts = totals.setdefault((campsite_id, night), [0, 0])
+            counts[0] += num_people
+            counts[1] += num_tents or 1
+
+    db.session.bulk_insert_mappings(CampsiteOccupancy, [
+        {'campsite_id': campsite_id, 'night_date': night, 'booked_people': people, 'booked_tents': tents}
+        for (campsite_id, night), (people, tents) in totals.items()
+    ])
+    db.session.commit()
+    return len(totals)
+
+def parse_stay_args(args):
+    """Read check_in, check_out and num_people query params; raises ValueError with a message"""
+    if not args.get('check_in') or not args.get('check_out'):
+        raise ValueError('check_in and check_out are required')
+
+    check_in = datetime.strptime(args['check_in'], '%Y-%m-%d').date()
+    check_out = datetime.strptime(args['check_out'], '%Y-%m-%d').date()
+    num_people = args.get('num_people', default=1, type=int)
+
+    if check_in >= check_out:
+        raise ValueError('Check-out date must be after check-in date')
+    if num_people < 1:
+        raise ValueError('num_people must be at least 1')
+
+    return check_in, check_out, num_people
+
+# 6.1 Check whether a campsite has room for a stay [by campsite_id]
+@app.route('/api/campsites/<int:campsite_id>/availability', methods=['GET'])
+@jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
+@read_only
+def get_campsite_availability(campsite_id):
+    """
+    Query params:
+        - check_in, check_out (required): YYYY-MM-DD
+        - num_people (optional): default 1
+    """
+    try:
+        try:
+            check_in, check_out, num_people = parse_stay_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        campsite = Campsite.query.get(campsite_id)
+        if not campsite or not campsite.is_active:
+            return jsonify({'success': False, 'message': 'Campsite not found'}), 404
+
+        is_available, remaining = check_availability(campsite, check_in, check_out, num_people)
+
+        return jsonify({
+            'success': True,
+            'campsite_id': campsite.id,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': check_out.isoformat(),
+            'num_people': num_people,
+            'capacity': campsite.capacity,
+            'remaining_capacity': remaining,
+            'is_available': is_available
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 6.2 Get per-night availability calendar of a campsite for one month [by campsite_id]
+@app.route('/api/campsites/<int:campsite_id>/availability/calendar', methods=['GET'])
+@jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
+@read_only
+def get_campsite_calendar(campsite_id):
+    """
+    Query params:
+        - month (optional): YYYY-MM (default: current month)
+    """
+    try:
+        month_param = request.args.get('month')
+        try:
+            month_start = datetime.strptime(month_param, '%Y-%m').date() if month_param \
+                else date.today().replace(day=1)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'month must be in YYYY-MM format'}), 400
+
+        next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+        campsite = Campsite.query.get(campsite_id)
+        if not campsite or not campsite.is_active:
+            return jsonify({'success': False, 'message': 'Campsite not found'}), 404
+
+        rows = CampsiteOccupancy.query.filter(
+            CampsiteOccupancy.campsite_id == campsite_id,
+            CampsiteOccupancy.night_date >= month_start,
+            CampsiteOccupancy.night_date < next_month
+        ).all()
+        by_night = {row.night_date: row for row in rows}
+
+        days = []
+        full_nights = []
+        for night in booking_nights(month_start, next_month):
+            row = by_night.get(night)
+            booked_people = row.booked_people if row else 0
+            is_full = booked_people >= campsite.capacity
+            if is_full:
+                full_nights.append(night.isoformat())
+            days.append({
+                'date': night.isoformat(),
+                'booked_people': booked_people,
+                'booked_tents': row.booked_tents if row else 0,
+                'remaining_capacity': max(0, campsite.capacity - booked_people),
+                'is_full': is_full
+            })
+
+        return jsonify({
+            'success': True,
+            'campsite_id': campsite.id,
+            'month': month_start.strftime('%Y-%m'),
+            'capacity': campsite.capacity,
+            'days': days,
+            'full_nights': full_nights
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 6.3 Search active campsites that have room for a group on the given dates
+@app.route('/api/campsites/available', methods=['GET'])
+@jwt_required(optional=True) # Whether logged in or not, can access and will result the same output
+@read_only
+def search_available_campsites():
+    """
+    Query params:
+        - check_in, check_out (required): YYYY-MM-DD
+        - num_people (optional): default 1
+    """
+    try:
+        try:
+            check_in, check_out, num_people = parse_stay_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        result = []
+        for campsite, booked_people in find_available_campsites(check_in, check_out, num_people):
+            campsite_dict = campsite.to_dict()
+            campsite_dict['remaining_capacity'] = campsite.capacity - booked_people
+            result.append(campsite_dict)
+
+        return jsonify({
+            'success': True,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': check_out.isoformat(),
+            'num_people': num_people,
+            'campsites': result
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# 6.4 Rebuild the occupancy index from bookings (admin only)
+@app.route('/api/admin/availability/rebuild', methods=['POST'])
+@admin_required # Admin authentication required
+def rebuild_availability():
+    try:
+        total_nights = rebuild_occupancy_index()
+
+        return jsonify({
+            'success': True,
+            'message': 'Occupancy index rebuilt',
+            'total_nights': total_nights
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ============================================
+# 7. REVENUE ROUTES
+# ============================================
+
+# Bookings that count as revenue. Reports read the per-day rollup table
+# instead of regrouping every booking like view_monthly_revenue does.
+REVENUE_STATUSES = ('confirmed', 'completed')
+REVENUE_PERIODS = ('day', 'week', 'month')
+
+def booking_revenue_day(booking):
+    return booking.created_at.date() if booking.created_at else date.today()
+
+def booking_revenue_deltas(bookings, sign):
+    """{(campsite_id, day): [bookings, revenue]} to add (sign=1) or remove (sign=-1) for these bookings"""
+    deltas = {}
+    for booking in bookings:
+        totals = deltas.setdefault((booking.campsite_id, booking_revenue_day(booking)), [0, 0])
+        totals[0] += sign
+        totals[1] += sign * booking.total_price
+    return deltas
+
+def apply_revenue_deltas(deltas):
+    """
+    Apply booking_revenue_deltas() to the rollup, locking every affected row
+    in one SELECT ... FOR UPDATE. Rows left with no bookings are deleted, as a
+    rebuild would not have them either. Does not commit.
+    """
+    if not deltas:
+        return
+
+    rows = RevenueDailyRollup.query.filter(
+        db.tuple_(RevenueDailyRollup.campsite_id, RevenueDailyRollup.day).in_(list(deltas))
+    ).with_for_update().all()
+    existing = {(row.campsite_id, row.day): row for row in rows}
+
+    for (campsite_id, day), (count, revenue) in deltas.items():
+        row = existing.get((campsite_id, day))
+        if row is None:
+            if count <= 0:
+                continue
+            row = RevenueDailyRollup(campsite_id=campsite_id, day=day, bookings=0, revenue=0)
+            db.session.add(row)
+        row.bookings = max(0, row.bookings + count)
+        row.revenue = max(0, (row.revenue or 0) + revenue)
+        if row.bookings == 0:
+            db.session.delete(row)
+
+def apply_booking_revenue(booking, sign):
+    """
+    Add (sign=1) or remove (sign=-1) a booking from the revenue rollup.
+    Does not commit; the caller commits it together with the status change.
+    """
+    apply_revenue_deltas(booking_revenue_deltas([booking], sign))
+
+def rebuild_revenue_rollup():
+    """Recompute the whole revenue rollup from confirmed/completed bookings"""
+    RevenueDailyRollup.query.delete(synchronize_session=False)
+
+    totals = {}
+    bookings = db.session.query(
+        Booking.campsite_id, Booking.created_at, Booking.total_price
+    ).filter(Booking.booking_status.in_(REVENUE_STATUSES)).yield_per(app.config['STREAM_BATCH_SIZE'])
+
+    for campsite_id, created_at, total_price in bookings:
+        day = created_at.date() if created_at else date.today()
+        counts = totals.setdefault((campsite_id, day), [0, 0])
+        counts[0] += 1
+        counts[1] += total_price
+
+    db.session.bulk_insert_mappings(RevenueDailyRollup, [
+        {'campsite_id': campsite_id, 'day': day, 'bookings': count, 'revenue': revenue}
+        for (campsite_id, day), (count, revenue) in totals.items()
+    ])
+    db.session.commit()
+    return len(totals)
+
+def period_start(day, period):
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'week':
+        return day - timedelta(days=day.weekday())  # Monday
+    return day
+
+def period_label(start, period):
+    if period == 'month':
+        return start.strftime('%Y-%m')
+    if period == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    return start.isoformat()
 
-# 4.2 Get list of bookings for logged in user (client) [by user_id from JWT, by bookings]
-@app.route('/api/bookings/my-bookings', methods=['GET'])
-@jwt_required() # Authentication or login required
-def get_my_bookings():
+def revenue_entry(bookings, revenue):
+    revenue = float(revenue or 0)
+    return {
+        'total_bookings': int(bookings or 0),
+        'total_revenue': round(revenue, 2),
+        'avg_booking_value': round(revenue / bookings, 2) if bookings else 0
+    }
+
+def parse_revenue_range(args):
+    """Optional from/to (YYYY-MM-DD, inclusive) as rollup filters; raises ValueError"""
+    filters = []
+    if args.get('from'):
+        filters.append(RevenueDailyRollup.day >= datetime.strptime(args['from'], '%Y-%m-%d').date())
+    if args.get('to'):
+        filters.append(RevenueDailyRollup.day <= datetime.strptime(args['to'], '%Y-%m-%d').date())
+    return filters
+
+# 7.1 Revenue per day, week or month (admin only)
+@app.route('/api/admin/revenue', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_revenue_report():
+    """
+    Query params:
+        - period: month (default), week or day
+        - from, to (optional): YYYY-MM-DD, inclusive
+        - campsite_id (optional): one campsite instead of all
+    """
     try:
-        # AUTO-COMPLETE EXPIRED BOOKINGS
-        auto_complete_expired_bookings()
+        period = request.args.get('period', 'month')
+        if period not in REVENUE_PERIODS:
+            return jsonify({'success': False, 'message': 'period must be day, week or month'}), 400
+
+        try:
+            filters = parse_revenue_range(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        campsite_id = request.args.get('campsite_id', type=int)
+        if campsite_id is not None:
+            filters.append(RevenueDailyRollup.campsite_id == campsite_id)
+
+        # The database sums campsites per day (at most one row per day);
+        # folding days into weeks/months is a single pass over that.
+        daily = db.session.query(
+            RevenueDailyRollup.day,
+            db.func.sum(RevenueDailyRollup.bookings),
+            db.func.sum(RevenueDailyRollup.revenue)
+        ).filter(*filters).group_by(RevenueDailyRollup.day).order_by(RevenueDailyRollup.day)
+
+        buckets = OrderedDict()
+        total_bookings = 0
+        total_revenue = 0
+        for day, bookings, revenue in daily:
+            start = period_start(day, period)
+            bucket = buckets.setdefault(start, [0, 0])
+            bucket[0] += bookings or 0
+            bucket[1] += revenue or 0
+            total_bookings += bookings or 0
+            total_revenue += revenue or 0
 
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        
-        bookings = Booking.query.filter_by(user_id=user_id)\
-                                .order_by(Booking.created_at.desc())\
-                                .all()
-        
-        result = []
-        for booking in bookings:
-            booking_dict = booking.to_dict()
-            booking_dict['campsite_name'] = booking.campsite.name
-            booking_dict['campsite_location'] = booking.campsite.location_name
-            booking_dict['campsite_image_url'] = booking.campsite.image_url
-            result.append(booking_dict)
-        
         return jsonify({
             'success': True,
-            'bookings': result
+            'period': period,
+            'revenue': [
+                dict(period=period_label(start, period), period_start=start.isoformat(), **revenue_entry(*totals))
+                for start, totals in buckets.items()
+            ],
+            'totals': revenue_entry(total_bookings, total_revenue)
         }), 200
-        
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# 4.3 Get list of all bookings for admin management (admin only)    
-@app.route('/api/bookings/bookings-list', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_bookings_list():
+# 7.2 Revenue per campsite, highest first (admin only)
+@app.route('/api/admin/revenue/campsites', methods=['GET'])
+@query_budget(2)
+@admin_required # Admin authentication required
+@read_only
+def get_revenue_by_campsite():
+    """
+    Query params:
+        - from, to (optional): YYYY-MM-DD, inclusive
+        - top (optional): only the N campsites with the most revenue
+    """
     try:
-        # Read identity from JWT
-        claims = get_jwt()
+        try:
+            filters = parse_revenue_range(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        top = request.args.get('top', type=int)
+        if top is not None and top < 1:
+            return jsonify({'success': False, 'message': 'top must be at least 1'}), 400
+
+        total_revenue = db.func.sum(RevenueDailyRollup.revenue)
+        query = db.session.query(
+            RevenueDailyRollup.campsite_id,
+            Campsite.name,
+            db.func.sum(RevenueDailyRollup.bookings),
+            total_revenue
+        ).join(Campsite, Campsite.id == RevenueDailyRollup.campsite_id)\
+         .filter(*filters)\
+         .group_by(RevenueDailyRollup.campsite_id, Campsite.name)\
+         .order_by(total_revenue.desc(), RevenueDailyRollup.campsite_id)
+
+        if top is not None:
+            query = query.limit(top)
 
-        # Admin check
-        if claims.get('role') != 'admin':
-            return jsonify({
-                'success': False,
-                'message': 'Access denied. Admin only.'
-            }), 403
-        
-        bookings = Booking.query.order_by(Booking.created_at.desc())\
-                                .all()
-        
-        result = []
-        for booking in bookings:
-            booking_dict = booking.to_dict()
-            booking_dict['campsite_name'] = booking.campsite.name
-            result.append(booking_dict)
-        
         return jsonify({
             'success': True,
-            'bookings': result
+            'campsites': [
+                dict(campsite_id=campsite_id, campsite_name=name, **revenue_entry(bookings, revenue))
+                for campsite_id, name, bookings, revenue in query
+            ]
         }), 200
-        
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# 4.4 Get total count of all bookings (admin only)
-@app.route('/api/admin/bookings/total', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_total_bookings():
+# 7.3 Rebuild the revenue rollup from bookings (admin only)
+@app.route('/api/admin/revenue/rebuild', methods=['POST'])
+@admin_required # Admin authentication required
+def rebuild_revenue():
     try:
-        # Read identity from JWT
-        claims = get_jwt()
-
-        # Admin check
-        if claims.get('role') != 'admin':
-            return jsonify({
-                'success': False,
-                'message': 'Access denied. Admin only.'
-            }), 403
-
-        total_bookings = Booking.query.count()
+        total_rows = rebuild_revenue_rollup()
 
         return jsonify({
             'success': True,
-            'total_bookings': total_bookings
+            'message': 'Revenue rollup rebuilt',
+            'total_rows': total_rows
         }), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-from datetime import datetime, date
+# ============================================
+# 8. NOTIFICATION ROUTES
+# ============================================
 
-# 4.5 Get total count of today's bookings (admin only) [by created_at date]
-@app.route('/api/admin/bookings/today', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_today_bookings():
-    try:
-        # Read identity from JWT
-        claims = get_jwt()
+# Notification fields of the list and push endpoints
+NOTIFICATION_FIELDS = (
+    projected_field('id', Notification.id),
+    projected_field('title', Notification.title),
+    projected_field('message', Notification.message),
+    projected_field('notification_type', Notification.notification_type),
+    projected_field('is_read', Notification.is_read, convert=bool),
+    projected_field('related_id', Notification.related_id),
+    projected_field('created_at', Notification.created_at, convert=to_iso),
+)
 
-        # Admin check
-        if claims.get('role') != 'admin':
-            return jsonify({
-                'success': False,
-                'message': 'Access denied. Admin only.'
-            }), 403
+notification_projection = Projection(*NOTIFICATION_FIELDS)
 
-        today = date.today() # Get today's date
+# Unread count per user id; this process's own changes drop the entry right away
+unread_count_cache = TTLCache(maxsize=10000, ttl=app.config['NOTIFICATION_UNREAD_CACHE_TTL'])
 
-        total_today_bookings = Booking.query.filter(
-            db.func.date(Booking.created_at) == today
-        ).count()
+def get_unread_count(user_id):
+    count = unread_count_cache.get(user_id)
+    if count is None:
+        count = db.session.query(db.func.count(Notification.id))\
+                          .filter(Notification.user_id == user_id, Notification.is_read == False)\
+                          .scalar()
+        unread_count_cache.set(user_id, count)
+    return count
 
-        return jsonify({
-            'success': True,
-            'total_today_bookings': total_today_bookings
-        }), 200
+def invalidate_unread_count(user_id):
+    """Call after notifications of a user were added or marked as read"""
+    unread_count_cache.delete(int(user_id))
 
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+# Push delivery. One poller thread per process reads the rows the triggers
+# add to notifications and hands them to the SSE / long-poll connections of
+# their users. A waiting connection holds no DB connection and issues no
+# queries: the poller runs one query per interval however many clients are
+# connected, and none at all while nobody is listening.
+class NotificationListener:
+    """Events for one SSE or long-poll connection"""
 
-# 4.6 Get detailed information of a specific booking (admin only) [by booking_id]
-# WILL COME BACK TO THIS LATER TO CHECK AGAIN OF THE USES OF THIS ROUTE WAS FOR PUBLIC OR ADMIN ONLY
-# BECAUSE IT HAS NO VERIFICATION OF USER ID OR JWT IDENTITY    
-@app.route('/api/admin/bookings/<int:booking_id>', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_booking_detail(booking_id):
-    booking = Booking.query.filter_by(id=booking_id).first()
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.last_id = 0  # highest notification id sent on this connection
+        self.overflowed = False
+        self._sent = set()
+        self._events = queue.Queue(maxsize=app.config['NOTIFICATION_QUEUE_SIZE'])
 
-    if not booking:
-        return jsonify({
-            'success': False,
-            'message': 'Booking not found'
-        }), 404
+    def push(self, notification):
+        try:
+            self._events.put_nowait(notification)
+        except queue.Full:
+            self.overflowed = True  # the connection is closed; the client catches up from the table
 
-    return jsonify({
-        'success': True,
-        'booking': {
-            'id': booking.id,
-            'booking_code': booking.booking_code,
-            'booking_status': booking.booking_status,
-            'campsite_id': booking.campsite_id,
-            'campsite_name': booking.campsite.name,
-            'check_in_date': booking.check_in_date.strftime('%Y-%m-%d'),
-            'check_out_date': booking.check_out_date.strftime('%Y-%m-%d'),
-            'num_people': booking.num_people,
-            'num_tents': booking.num_tents,
-            'price_per_night': booking.price_per_night,
-            'total_nights': booking.total_nights,
-            'subtotal': booking.subtotal,
-            'tax_amount': booking.tax_amount,
-            'total_price': booking.total_price,
-            'special_requests': booking.special_requests,
-            'created_at': booking.created_at.isoformat()
-        }
-    }), 200
+    def accept(self, events):
+        """Events not sent yet, oldest first (the backlog query and the poller can overlap)"""
+        fresh = sorted((item for item in events if item['id'] not in self._sent), key=lambda item: item['id'])
+        for item in fresh:
+            self._sent.add(item['id'])
+            self.last_id = max(self.last_id, item['id'])
+        return fresh
 
-# 4.7 Update booking status (admin only) [by booking_id]
-@app.route('/api/admin/bookings/<int:booking_id>/status', methods=['PUT'])
-@jwt_required() # Admin authentication required
-def update_booking_status(booking_id):
+    def wait(self, timeout):
+        """Events pushed within timeout seconds; [] if none arrived"""
+        try:
+            events = [self._events.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return self.accept(events)
+
+class NotificationHubFull(Exception):
+    """This process already holds max_listeners open streams and long-polls"""
+
+class NotificationHub:
+    """
+    Listeners per user id, fed by one poller thread started on first use.
+    Every listener is an open request holding a worker thread (or greenlet), so
+    subscribe refuses new ones past max_listeners.
+    """
+
+    def __init__(self, max_listeners):
+        self.max_listeners = max_listeners
+        self.last_id = None  # highest id the poller has seen; None while nobody listens
+        self._listeners = {}
+        self._gaps = {}  # id skipped by the poller -> monotonic time it stops being re-checked
+        self._lock = threading.Lock()
+        self._baseline_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def subscribe(self, user_id):
+        """
+        Register a listener for user_id. Rows committed before this call are
+        for the caller to read from the table (in a new transaction); later
+        ones reach the listener through the poller.
+        """
+        listener = NotificationListener(user_id)
+        with self._lock:
+            if sum(len(listeners) for listeners in self._listeners.values()) >= self.max_listeners:
+                raise NotificationHubFull()
+            self._listeners.setdefault(user_id, set()).add(listener)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='notification-poller', daemon=True)
+                self._thread.start()
+
+        try:
+            with self._baseline_lock:
+                if self.last_id is None:
+                    self.last_id = db.session.query(db.func.max(Notification.id)).scalar() or 0
+        except Exception:
+            self.unsubscribe(listener)
+            raise
+        self._wakeup.set()
+        return listener
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            listeners = self._listeners.get(listener.user_id)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[listener.user_id]
+
+    @property
+    def listener_count(self):
+        with self._lock:
+            return sum(len(listeners) for listeners in self._listeners.values())
+
+    def _loop(self):
+        while True:
+            with self._baseline_lock, self._lock:
+                if not self._listeners:
+                    self.last_id = None
+                    self._gaps.clear()
+                    self._wakeup.clear()
+            if self.last_id is None:
+                self._wakeup.wait()  # idle until the next subscribe
+                continue
+
+            try:
+                with app.app_context():
+                    full = self.poll()
+            except Exception as e:
+                full = False
+                logger.error('notification_poll_failed', extra={'error': str(e)})
+            if not full:
+                time.sleep(app.config['NOTIFICATION_POLL_INTERVAL'])
+
+    def poll(self):
+        """Deliver rows above last_id (and late commits of skipped ids); True if a full batch was read"""
+        batch_size = app.config['NOTIFICATION_POLL_BATCH_SIZE']
+        now = time.monotonic()
+        self._gaps = {row_id: until for row_id, until in self._gaps.items() if until > now}
+
+        condition = Notification.id > self.last_id
+        if self._gaps:
+            condition = db.or_(condition, Notification.id.in_(list(self._gaps)))
+
+        columns, serialize = notification_projection.plan(list(notification_projection.fields),
+                                                          extra_columns=(Notification.user_id,))
+        rows = db.session.query(*columns).filter(condition)\
+                         .order_by(Notification.id).limit(batch_size).all()
+
+        # An id can show up after a higher one when transactions commit out of order
+        gap_until = now + app.config['NOTIFICATION_GAP_TIMEOUT']
+        for row in rows:
+            if self._gaps.pop(row.id, None) is not None:
+                continue
+            if row.id - self.last_id <= batch_size:
+                self._gaps.update((row_id, gap_until) for row_id in range(self.last_id + 1, row.id))
+            self.last_id = row.id
+
+        delivered = 0
+        for row in rows:
+            invalidate_unread_count(row.user_id)
+            with self._lock:
+                listeners = list(self._listeners.get(row.user_id, ()))
+            notification = serialize(row)
+            for listener in listeners:
+                listener.push(notification)
+            delivered += len(listeners)
+        if delivered:
+            notifications_pushed_total.inc(delivered)
+
+        return len(rows) == batch_size
+
+notification_hub = NotificationHub(max_listeners=app.config['NOTIFICATION_MAX_LISTENERS'])
+
+def notification_hub_full_response():
+    response = jsonify({'success': False, 'message': 'Too many open notification connections, please try again'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '3'  # same as the SSE retry interval
+    return response
+
+def notification_backlog(user_id, after_id):
+    """Notifications of a user above after_id, oldest first"""
+    columns, serialize = notification_projection.plan(list(notification_projection.fields))
+    rows = db.session.query(*columns)\
+                     .filter(Notification.user_id == user_id, Notification.id > after_id)\
+                     .order_by(Notification.id)\
+                     .limit(app.config['PAGE_SIZE_MAX'])\
+                     .all()
+    return [serialize(row) for row in rows]
+
+def read_after_id():
+    """Last notification id the client has: ?after_id= or the SSE Last-Event-ID header"""
+    value = request.args.get('after_id') or request.headers.get('Last-Event-ID')
+    if value is None:
+        return None
     try:
-        # Read identity from JWT
-        claims = get_jwt()
+        return max(0, int(value))
+    except ValueError:
+        raise ValueError('after_id must be an integer')
 
-        # Admin check
-        if claims.get('role') != 'admin':
-            return jsonify({
-                'success': False,
-                'message': 'Access denied. Admin only.'
-            }), 403
+def open_listener(user_id, after_id):
+    """Subscribe, read the backlog above after_id, and give the DB connection back"""
+    listener = notification_hub.subscribe(user_id)
+    try:
+        db.session.close()
+        backlog = listener.accept(notification_backlog(user_id, after_id)) if after_id is not None else []
+        db.session.close()
+    except Exception:
+        notification_hub.unsubscribe(listener)
+        raise
+    if after_id is not None:
+        listener.last_id = max(listener.last_id, after_id)
+    return listener, backlog
 
-        booking = Booking.query.get(booking_id)
-        if not booking:
-            return jsonify({
-                'success': False,
-                'message': 'Booking not found'
-            }), 404
+def sse_event(notification):
+    return b'id: %d\nevent: notification\ndata: %s\n\n' % (notification['id'], dumps_json(notification))
 
-        data = request.get_json()
-        new_status = data.get('booking_status')
-        current_status = booking.booking_status
+# 8.1 Get notifications of the logged in user, newest first [by user_id from JWT]
+# Query params: limit + cursor for keyset pages, unread=1 for unread only,
+# fields (optional) = comma separated subset of the notification fields
+@app.route('/api/notifications', methods=['GET'])
+@query_budget(2)
+@login_required # Authentication or login required
+@read_only
+def get_notifications():
+    try:
+        user_id = int(get_jwt_identity())
 
-        # TRANSITION RULES VALIDATION
-        allowed_transitions = {
-            'pending': ['confirmed', 'cancelled'],
-            'confirmed': ['cancelled', 'completed'],
-            'cancelled': [],  # Cannot change
-            'completed': []   # Cannot change
-        }
+        try:
+            limit, cursor = read_page_args()
+            fields = notification_projection.requested_fields()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
 
-        # Cek apakah transisi diizinkan
-        if new_status not in allowed_transitions.get(current_status, []):
-            return jsonify({
-                'success': False,
-                'message': f'Cannot change status from {current_status} to {new_status}'
-            }), 400
+        columns, serialize = notification_projection.plan(
+            fields, extra_columns=(Notification.created_at, Notification.id))
+        query = db.session.query(*columns).filter(Notification.user_id == user_id)
+        if request.args.get('unread', '').lower() in ('1', 'true', 'yes'):
+            query = query.filter(Notification.is_read == False)
 
-        # Update status
-        booking.booking_status = new_status
-        db.session.commit()
+        try:
+            rows, next_cursor = keyset_page(query, Notification, limit or app.config['PAGE_SIZE_DEFAULT'], cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
 
-        return jsonify({
+        return json_response({
             'success': True,
-            'message': 'Booking status updated successfully',
-            'booking': booking.to_dict()
-        }), 200
+            'notifications': [serialize(row) for row in rows],
+            'limit': limit or app.config['PAGE_SIZE_DEFAULT'],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        })
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-
-# ============================================
-# 5. ADMIN ROUTES
-# ============================================
-
-# 5.1 Get list of pending user registrations (admin only) [by registration_status]
-@app.route('/api/admin/users/pending', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_pending_users():
+# 8.2 Get number of unread notifications of the logged in user [by user_id from JWT]
+@app.route('/api/notifications/unread-count', methods=['GET'])
+@query_budget(2)
+@login_required # Authentication or login required
+@read_only
+def get_unread_notification_count():
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-
-        print(get_jwt_identity)
-        
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-        
-        pending_users = User.query.filter_by(registration_status='pending')\
-                                  .order_by(User.created_at.asc())\
-                                  .all()
-        
-        result = []
-        for pending_user in pending_users:
-            user_dict = pending_user.to_dict()
-            # Calculate days pending
-            days_pending = (datetime.now() - pending_user.created_at).days
-            user_dict['days_pending'] = days_pending
-            result.append(user_dict)
-        
         return jsonify({
             'success': True,
-            'pending_users': result
+            'unread_count': get_unread_count(int(get_jwt_identity()))
         }), 200
-        
+
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# 5.2 Approve or reject a pending user registration (admin only) [by target_user_id]
-@app.route('/api/admin/users/<int:target_user_id>/approval', methods=['PUT'])
-@jwt_required() # Admin authentication required
-def approve_reject_user(target_user_id):
+# 8.3 Mark many notifications of the logged in user as read [by user_id from JWT]
+# Body: {"notification_ids": [1, 2, 3]} or {"all": true, "up_to_id": 42 (optional)}
+@app.route('/api/notifications/read', methods=['PUT'])
+@query_budget(3)
+@login_required # Authentication or login required
+def mark_notifications_read():
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        admin = User.query.get(user_id)
-        
-        # Admin check
-        if admin.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-        
-        target_user = User.query.get(target_user_id)
-        if not target_user:
-            return jsonify({'success': False, 'message': 'User not found'}), 404
-        
-        data = request.get_json()
-        action = data.get('action')  # 'approve' or 'reject'
-        
-        if action not in ['approve', 'reject']:
-            return jsonify({'success': False, 'message': 'Invalid action'}), 400
-        
-        if action == 'approve':
-            target_user.registration_status = 'approved'
-            message = 'User approved successfully'
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+
+        query = Notification.query.filter(Notification.user_id == user_id, Notification.is_read == False)
+        if data.get('all') is True:
+            up_to_id = data.get('up_to_id')
+            if up_to_id is not None:
+                if not isinstance(up_to_id, int) or isinstance(up_to_id, bool):
+                    return jsonify({'success': False, 'message': 'up_to_id must be an integer'}), 400
+                query = query.filter(Notification.id <= up_to_id)
         else:
-            target_user.registration_status = 'rejected'
-            message = 'User rejected'
-        
+            ids = data.get('notification_ids')
+            if not isinstance(ids, list) or not ids:
+                return jsonify({'success': False, 'message': 'notification_ids or all is required'}), 400
+            if len(ids) > app.config['BATCH_MAX_ITEMS']:
+                return jsonify({
+                    'success': False,
+                    'message': f'At most {app.config["BATCH_MAX_ITEMS"]} notification_ids per request'
+                }), 400
+            if not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in ids):
+                return jsonify({'success': False, 'message': 'notification_ids must be integers'}), 400
+            query = query.filter(Notification.id.in_(set(ids)))
+
+        # One UPDATE; rows of other users or already read are not touched
+        updated = query.update({'is_read': True}, synchronize_session=False)
         db.session.commit()
-        
+        invalidate_unread_count(user_id)
+
         return jsonify({
             'success': True,
-            'message': message
+            'updated': updated,
+            'unread_count': get_unread_count(user_id)
         }), 200
-        
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# 5.3 Get total count of registered users (including active and inactive) (admin only)
-# WILL COME BACK TO THIS LATER TO CONFIGURE BETWEEN ACTIVE/INACTIVE/TOTAL
-# IF NEED TO MONTIOR THE EXACT AND DETAILED AMOUNT OF USERS
-# ESPECIALLY FOR ADMIN PURPOSES AND FROM DASHBOARD VIEW
-@app.route('/api/admin/users/total', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_total_users():
+# 8.4 Stream new notifications of the logged in user as Server-Sent Events
+# Query params: after_id (optional, or the Last-Event-ID header on reconnect)
+# sends the missed ones first. The stream ends after NOTIFICATION_STREAM_MAX_AGE
+# or if the client falls behind; EventSource clients reconnect on their own.
+@app.route('/api/notifications/stream', methods=['GET'])
+@query_budget(3)
+@login_required # Authentication or login required
+def stream_notifications():
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        try:
+            after_id = read_after_id()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
 
-        # Admin check
-        if user.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+        listener, backlog = open_listener(int(get_jwt_identity()), after_id)
 
-        total_users = User.query.count()
-        return jsonify({
-            'success': True,
-            'total_users': total_users
-        }), 200
+        # Runs after the request context is gone: no session, no DB connection
+        def generate():
+            try:
+                yield b'retry: 3000\n\n'
+                for notification in backlog:
+                    yield sse_event(notification)
+                if len(backlog) >= app.config['PAGE_SIZE_MAX']:
+                    return  # more missed than one backlog query reads: the reconnect fetches the rest
+
+                deadline = time.monotonic() + app.config['NOTIFICATION_STREAM_MAX_AGE']
+                while not listener.overflowed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    events = listener.wait(min(app.config['NOTIFICATION_HEARTBEAT'], remaining))
+                    if not events:
+                        yield b': keep-alive\n\n'
+                    for notification in events:
+                        yield sse_event(notification)
+            finally:
+                notification_hub.unsubscribe(listener)
+
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+        return response
+
+    except NotificationHubFull:
+        return notification_hub_full_response()
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# 5.4 Get list of all registered users with their infos (including active and inactive) (admin only)
-# Active and inactive users included for admin monitoring
-@app.route('/api/admin/users', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_all_users():
+# 8.5 Long-poll for new notifications of the logged in user
+# Query params: after_id = highest notification id the client has (returned as last_id),
+# timeout (optional, seconds, at most NOTIFICATION_LONG_POLL_TIMEOUT)
+# Answers as soon as there is something newer, or with an empty list at the timeout.
+@app.route('/api/notifications/poll', methods=['GET'])
+@query_budget(3)
+@login_required # Authentication or login required
+def poll_notifications():
     try:
-        # Read identity from JWT
-        user_id = get_jwt_identity()
-        admin = User.query.get(user_id)
+        try:
+            after_id = read_after_id()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
 
-        # Admin check
-        if not admin or admin.role != 'admin':
-            return jsonify({
-                'success': False,
-                'message': 'Unauthorized'
-            }), 403
+        max_timeout = app.config['NOTIFICATION_LONG_POLL_TIMEOUT']
+        timeout = request.args.get('timeout', max_timeout, type=float)
+        timeout = max(0, min(timeout, max_timeout))
 
-        users = User.query.order_by(User.created_at.desc()).all()
-
-        users_data = []
-        for u in users:
-            users_data.append({
-                'id': u.id,
-                'name': u.full_name,
-                'email': u.email,
-                'status': 'active' if u.is_active else 'inactive',
-                'role': u.role,
-                'joined': u.created_at.strftime('%Y-%m-%d'),
-                'bookings': Booking.query.filter_by(user_id=u.id).count()
-            })
+        listener, events = open_listener(int(get_jwt_identity()), after_id)
+        try:
+            if not events:
+                events = listener.wait(timeout)
+        finally:
+            notification_hub.unsubscribe(listener)
 
-        return jsonify({
+        return json_response({
             'success': True,
-            'total_users': len(users_data),
-            'users': users_data
-        }), 200
+            'notifications': events,
+            'last_id': listener.last_id if events or after_id is not None else None
+        })
 
+    except NotificationHubFull:
+        return notification_hub_full_response()
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': str(e)
-        }), 500
-    
-# 5.5 Get detailed information of a specific user (admin only) [by user_id]
-@app.route('/api/admin/users/<int:user_id>', methods=['GET'])
-@jwt_required() # Admin authentication required
-def get_user_detail(user_id):
-    try:
-        # Read identity from JWT
-        admin_id = get_jwt_identity()
-        admin = User.query.get(admin_id)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ============================================
+# 9. MONITORING ROUTES
+# ============================================
 
-        # Admin check
-        if not admin or admin.role != 'admin':
-            return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+def collect_pool_stats():
+    stats = {}
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        name = bind_key or 'primary'
+        size = pool.size()
+        max_overflow = max(0, getattr(pool, '_max_overflow', 0))
+        stats.update({
+            (name, 'size'): size,
+            (name, 'checked_out'): pool.checkedout(),
+            (name, 'checked_in'): pool.checkedin(),
+            (name, 'overflow'): max(0, pool.overflow()),
+            (name, 'max_connections'): size + max_overflow
+        })
+    return stats
 
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'success': False, 'message': 'User not found'}), 404
+def collect_pool_utilization():
+    stats = collect_pool_stats()
+    return {
+        (name,): stats[(name, 'checked_out')] / stats[(name, 'max_connections')]
+        for name, state in stats
+        if state == 'max_connections' and stats[(name, state)]
+    }
 
-        # Hitung total bookings user
-        total_bookings = Booking.query.filter_by(user_id=user.id).count()
+metrics.gauge('db_pool_connections', 'SQLAlchemy connection pool state', ('engine', 'state'),
+              collect=collect_pool_stats)
+metrics.gauge('db_pool_utilization', 'Checked out connections / (pool size + max overflow)', ('engine',),
+              collect=collect_pool_utilization)
+metrics.gauge('password_hash_queue_depth', 'bcrypt jobs running or waiting',
+              collect=lambda: {(): password_hasher.queue_depth})
+metrics.gauge('weather_fetch_queue_depth', 'Weather lookups running or waiting on the fetcher pool',
+              collect=lambda: {(): weather_fetcher.queue_depth})
+metrics.gauge('notification_listeners', 'Open SSE / long-poll notification connections',
+              collect=lambda: {(): notification_hub.listener_count})
+metrics.gauge('cache_entries', 'Entries held in in-process caches', ('cache',), collect=lambda: {
+    ('weather_forecast',): len(weather_memory_cache),
+    ('user_status',): len(user_status_cache),
+    ('dashboard',): len(dashboard_cache),
+    ('notification_unread',): len(unread_count_cache)
+})
 
-        user_data = user.to_dict()
-        user_data['total_bookings'] = total_bookings
+# 9.1 Prometheus scrape endpoint
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
 
-        return jsonify({'success': True, 'user': user_data}), 200
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # ============================================
 # MAIN
 # ============================================
 
+# Start background housekeeping when the app is loaded (WSGI server or flask run).
+# Every worker process starts the scheduler and the SCHEDULER_LOCK_FILE flock picks
+# the one that runs the jobs; workers on other hosts need SCHEDULER_ENABLED=0 and
+# one `python app.py housekeeping` process instead.
+def start_background_jobs():
+    if app.config['SCHEDULER_ENABLED']:
+        scheduler.start(app.config['SCHEDULER_LOCK_FILE'])
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+        if not CampsiteOccupancy.query.first():
+            rebuild_occupancy_index()
+        if not RevenueDailyRollup.query.first():
+            rebuild_revenue_rollup()
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'housekeeping':
+        # Separate worker: only run the scheduled jobs
+        logger.info('housekeeping_worker_started')
+        scheduler.start(app.config['SCHEDULER_LOCK_FILE'])
+        try:
+            while scheduler.is_running():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            scheduler.stop()
+    else:
+        # Debug reloader imports this file twice; only start jobs in the serving child
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_background_jobs()
+        app.run(debug=True, host='0.0.0.0', port=5000)
+else:
+    # Loaded by a WSGI server or flask run
+    start_background_jobs()
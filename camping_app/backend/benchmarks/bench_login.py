@@ -0,0 +1,134 @@
+# Benchmark: login throughput and its impact on other endpoints
+#
+# Runs against a running backend (python app.py), for example:
+#   python benchmarks/bench_login.py --email admin@camping.com --password admin123
+#
+# Phase 1 measures GET /api/campsites latency with no login traffic.
+# Phase 2 fires concurrent logins while the same probe keeps running,
+# so the numbers show how much a login burst slows everything else down.
+# Run it once with the default settings and once with a different
+# PASSWORD_HASH_WORKERS / BCRYPT_ROUNDS to compare.
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+def summarize(latencies_ms):
+    return {
+        'count': len(latencies_ms),
+        'mean_ms': round(statistics.mean(latencies_ms), 2) if latencies_ms else None,
+        'p50_ms': percentile(latencies_ms, 50),
+        'p95_ms': percentile(latencies_ms, 95),
+        'p99_ms': percentile(latencies_ms, 99),
+    }
+
+
+def probe(base_url, stop, latencies):
+    """Keep calling a cheap endpoint and record its latency"""
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f'{base_url}/api/campsites', timeout=30)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def login_worker(base_url, email, password, count, results):
+    session = requests.Session()
+    for _ in range(count):
+        started = time.perf_counter()
+        response = session.post(
+            f'{base_url}/api/auth/login',
+            json={'email': email, 'password': password},
+            timeout=60
+        )
+        results.append((response.status_code, (time.perf_counter() - started) * 1000))
+
+
+def run_probe_only(base_url, seconds):
+    stop = threading.Event()
+    latencies = []
+    thread = threading.Thread(target=probe, args=(base_url, stop, latencies))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return summarize(latencies)
+
+
+def run_login_burst(base_url, email, password, concurrency, logins_per_worker):
+    stop = threading.Event()
+    probe_latencies = []
+    probe_thread = threading.Thread(target=probe, args=(base_url, stop, probe_latencies))
+    probe_thread.start()
+
+    results = []
+    workers = [
+        threading.Thread(target=login_worker, args=(base_url, email, password, logins_per_worker, results))
+        for _ in range(concurrency)
+    ]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    probe_thread.join()
+
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    ok = statuses.get('200', 0)
+    return {
+        'logins': summarize([latency for _, latency in results]),
+        'status_codes': statuses,
+        'login_throughput_per_s': round(ok / elapsed, 2) if elapsed else None,
+        'elapsed_s': round(elapsed, 2),
+        'other_endpoint_during_burst': summarize(probe_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login throughput / interference benchmark')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--logins-per-worker', type=int, default=5)
+    parser.add_argument('--baseline-seconds', type=float, default=5)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    report = {
+        'concurrency': args.concurrency,
+        'logins_per_worker': args.logins_per_worker,
+        'other_endpoint_baseline': run_probe_only(args.base_url, args.baseline_seconds),
+    }
+    report.update(run_login_burst(
+        args.base_url, args.email, args.password, args.concurrency, args.logins_per_worker
+    ))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
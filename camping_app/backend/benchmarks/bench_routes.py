@@ -0,0 +1,571 @@
+# Benchmark: every backend route, offline and reproducible
+#
+# Starts its own copy of the backend (flask run, threaded) against a MySQL
+# database seeded from camping_booking_db.sql plus generated data, with a
+# local stand-in for Open-Meteo, then drives each route and writes a JSON
+# report (throughput, p50/p95/p99 latency, SQL statements per request from
+# the X-SQL-Query-Count header). For example:
+#
+#   python benchmarks/bench_routes.py --database-url mysql+pymysql://root:@localhost/camping_bench \
+#       --concurrency 16 --requests 200 --output before.json
+#   ... change the code ...
+#   python benchmarks/bench_routes.py --database-url mysql+pymysql://root:@localhost/camping_bench \
+#       --concurrency 16 --requests 200 --output after.json --compare before.json
+#
+# The database named in --database-url is DROPPED and recreated on every run.
+# Same --seed, same data, same requests.
+#
+# With --replica-url (a second MySQL instance or database) the same data is
+# seeded there too and the backend gets it as DATABASE_REPLICA_URL, so the
+# read-only routes are measured against the replica. The two databases are
+# not replicated: writes made during the run only reach the primary.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import bcrypt
+import pymysql
+import requests
+from sqlalchemy.engine import make_url
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SQL_FILE = os.path.join(BACKEND_DIR, '..', '..', 'camping_booking_db.sql')
+DUMP_DATABASE = 'camping_booking_db'
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+CLIENT_EMAIL = 'bench-client@example.com'
+PASSWORD = 'bench-password'
+
+FACILITIES = ['Toilet', 'Wi-Fi', 'Bonfire area', 'Parking', 'Shower', 'Cafe', 'Beach access',
+              'Hiking trail', 'Electricity', 'Tent rental', 'Prayer room', 'Playground']
+NAME_WORDS = ['Pine', 'River', 'Sunrise', 'Forest', 'Beach', 'Mountain', 'Lake', 'Valley', 'Hill', 'Falls']
+LOCATIONS = ['Bandung', 'Bogor', 'Sukabumi', 'Garut', 'Pangandaran', 'Cianjur', 'Lembang', 'Subang']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+# --------------------------------------------
+# Database seeding
+# --------------------------------------------
+
+def read_sql_statements(path, database):
+    """Statements of a HeidiSQL/mysqldump file, honouring DELIMITER blocks (procedures, triggers)"""
+    delimiter = ';'
+    buffer = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.upper().startswith('DELIMITER '):
+                delimiter = stripped.split(None, 1)[1]
+                continue
+            if not buffer and (not stripped or stripped.startswith('--')):
+                continue
+
+            buffer.append(line)
+            if stripped.endswith(delimiter):
+                statement = ''.join(buffer).rstrip()[:-len(delimiter)].strip()
+                buffer = []
+                if statement:
+                    yield statement.replace(f'`{DUMP_DATABASE}`', f'`{database}`')
+
+
+def connect(url, database=None):
+    return pymysql.connect(
+        host=url.host or 'localhost',
+        port=url.port or 3306,
+        user=url.username or 'root',
+        password=url.password or '',
+        database=database,
+        autocommit=True,
+        charset='utf8mb4'
+    )
+
+
+def seed_database(url, sql_file, args):
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    with connect(url) as connection, connection.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS `{url.database}`')
+        for statement in read_sql_statements(sql_file, url.database):
+            cursor.execute(statement)
+
+    # Low work factor: seeding speed only, the server hashes with its own BCRYPT_ROUNDS
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+
+    with connect(url, url.database) as connection, connection.cursor() as cursor:
+        users = [(ADMIN_EMAIL, password_hash, 'Bench Admin', '0800000000', 'admin', 'approved')]
+        users.append((CLIENT_EMAIL, password_hash, 'Bench Client', '0800000001', 'client', 'approved'))
+        for i in range(args.users):
+            status = 'pending' if i % 5 == 0 else 'approved'
+            users.append((f'user{i}@example.com', password_hash, f'User {i}', f'08{i:09d}', 'client', status))
+        cursor.executemany(
+            'INSERT INTO users (email, password_hash, full_name, phone_number, role, registration_status, is_active) '
+            'VALUES (%s, %s, %s, %s, %s, %s, 1)', users
+        )
+
+        campsites = []
+        for i in range(args.campsites):
+            facilities = ', '.join(rng.sample(FACILITIES, rng.randint(2, 6)))
+            name = f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} Camp {i}'
+            location = f'{rng.choice(LOCATIONS)}, West Java'
+            campsites.append((
+                name, f'{name} near {location} with {facilities.lower()}', location,
+                round(rng.uniform(-7.8, -6.3), 6), round(rng.uniform(106.3, 108.6), 6),
+                rng.choice([20, 50, 100, 200]), rng.choice([75000, 100000, 150000, 250000]), facilities
+            ))
+        cursor.executemany(
+            'INSERT INTO campsites (name, description, location_name, latitude, longitude, capacity, '
+            'price_per_night, facilities, is_active) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1)', campsites
+        )
+
+        # Bookings over two past years and the coming months; user ids 2.. are clients
+        bookings = []
+        today = date.today()
+        for i in range(args.bookings):
+            check_in = today + timedelta(days=rng.randint(-700, 120))
+            nights = rng.randint(1, 4)
+            price = rng.choice([75000, 100000, 150000])
+            subtotal = price * nights
+            if check_in + timedelta(days=nights) < today:
+                status = rng.choice(['completed', 'completed', 'cancelled'])
+            else:
+                status = rng.choice(['pending', 'confirmed', 'confirmed', 'cancelled'])
+            created_at = datetime.combine(check_in - timedelta(days=rng.randint(1, 60)), datetime.min.time()) \
+                + timedelta(seconds=rng.randint(0, 86399))
+            bookings.append((
+                f'BKGSEED{i:010d}', rng.randint(2, 2 + args.users), rng.randint(1, args.campsites),
+                check_in, check_in + timedelta(days=nights), rng.randint(1, 4), nights,
+                price, subtotal, subtotal * 0.1, subtotal * 1.1, status, min(created_at, datetime.now())
+            ))
+        for start in range(0, len(bookings), 1000):
+            cursor.executemany(
+                'INSERT INTO bookings (booking_code, user_id, campsite_id, check_in_date, check_out_date, '
+                'num_people, total_nights, price_per_night, subtotal, tax_amount, total_price, booking_status, '
+                'created_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)',
+                bookings[start:start + 1000]
+            )
+
+    return round(time.perf_counter() - started, 2)
+
+
+# --------------------------------------------
+# Open-Meteo stand-in
+# --------------------------------------------
+
+class WeatherStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        latitudes = query.get('latitude', [''])[0].split(',')
+        days = int(query.get('forecast_days', ['7'])[0])
+        start = date.today()
+
+        locations = []
+        for i, _ in enumerate(latitudes):
+            locations.append({'daily': {
+                'time': [(start + timedelta(days=d)).isoformat() for d in range(days)],
+                'temperature_2m_max': [30.0 + (i + d) % 4 for d in range(days)],
+                'temperature_2m_min': [20.0 + (i + d) % 3 for d in range(days)],
+                'weathercode': [(i + d) % 4 for d in range(days)],
+                'precipitation_probability_mean': [(10 * (i + d)) % 100 for d in range(days)],
+                'windspeed_10m_max': [5.0 + d for d in range(days)],
+            }})
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        body = json.dumps(locations[0] if len(locations) == 1 else locations).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_weather_stub(latency_ms):
+    WeatherStubHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), WeatherStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --------------------------------------------
+# Backend process
+# --------------------------------------------
+
+def copy_tables(source_url, target_url, tables):
+    """Copy whole tables from the primary to the replica (stands in for replication)"""
+    with connect(source_url, source_url.database) as source, \
+            connect(target_url, target_url.database) as target, \
+            source.cursor() as read_cursor, target.cursor() as write_cursor:
+        for table in tables:
+            read_cursor.execute(f'SELECT * FROM `{table}`')
+            columns = ', '.join(f'`{column[0]}`' for column in read_cursor.description)
+            placeholders = ', '.join(['%s'] * len(read_cursor.description))
+            write_cursor.execute(f'DELETE FROM `{table}`')
+            while True:
+                rows = read_cursor.fetchmany(1000)
+                if not rows:
+                    break
+                write_cursor.executemany(f'INSERT INTO `{table}` ({columns}) VALUES ({placeholders})', rows)
+
+
+def start_backend(database_url, weather_url, port, log_path, replica_url=None):
+    # No housekeeping jobs: they would run at random points during the measured phases
+    env = dict(os.environ, DATABASE_URL=database_url, WEATHER_API_URL=weather_url, SCHEDULER_ENABLED='0')
+    if replica_url:
+        env['DATABASE_REPLICA_URL'] = replica_url
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--host', '127.0.0.1', '--port', str(port),
+         '--with-threads', '--no-reload', '--no-debugger'],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Backend exited with code {process.returncode}, see {log_path}')
+        try:
+            if requests.get(f'{base_url}/api/campsites', timeout=2).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError(f'Backend did not start within 60s, see {log_path}')
+
+
+# --------------------------------------------
+# Scenarios
+# --------------------------------------------
+
+class BenchContext:
+    """Tokens and ids shared by scenarios; write scenarios hand resources to later ones"""
+
+    def __init__(self, base_url, args):
+        self.base_url = base_url
+        self.args = args
+        self.rng_lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.admin = self.login(ADMIN_EMAIL)
+        self.client = self.login(CLIENT_EMAIL)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.created_bookings = []
+        self.pending_users = []
+        self.lock = threading.Lock()
+
+    def login(self, email):
+        response = requests.post(f'{self.base_url}/api/auth/login',
+                                 json={'email': email, 'password': PASSWORD}, timeout=60)
+        response.raise_for_status()
+        return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def campsite_id(self):
+        with self.rng_lock:
+            return self.rng.randint(1, self.args.campsites)
+
+    def booking_id(self):
+        with self.rng_lock:
+            return self.rng.randint(1, self.args.bookings)
+
+    def user_id(self):
+        with self.rng_lock:
+            return self.rng.randint(3, 2 + self.args.users)
+
+    def future_stay(self, i):
+        check_in = date.today() + timedelta(days=200 + i % 300)
+        return check_in.isoformat(), (check_in + timedelta(days=1)).isoformat()
+
+    def take(self, items):
+        with self.lock:
+            return items.pop() if items else None
+
+
+def scenario(name, method, path, auth=None, body=None, headers=None, write=False, after=None):
+    return {'name': name, 'method': method, 'path': path, 'auth': auth, 'body': body,
+            'headers': headers, 'write': write, 'after': after}
+
+
+def remember_booking(ctx, response):
+    if response.status_code == 201:
+        with ctx.lock:
+            ctx.created_bookings.append(response.json()['booking']['id'])
+
+
+def remember_pending_users(ctx):
+    response = requests.get(f'{ctx.base_url}/api/admin/users/pending', headers=ctx.admin, timeout=60)
+    ctx.pending_users = [user['id'] for user in response.json().get('pending_users', [])]
+
+
+def build_scenarios():
+    today = date.today()
+    in_month = (today + timedelta(days=30)).isoformat()
+    out_month = (today + timedelta(days=32)).isoformat()
+    month = (today + timedelta(days=30)).strftime('%Y-%m')
+
+    return [
+        # 1. Auth
+        scenario('auth.register', 'POST', lambda c, i: '/api/auth/register', write=True,
+                 body=lambda c, i: {'email': f'bench-{c.run_id}-{i}@example.com', 'password': PASSWORD,
+                                    'full_name': f'Bench {i}', 'phone_number': f'09{i:09d}'}),
+        scenario('auth.login', 'POST', lambda c, i: '/api/auth/login',
+                 body=lambda c, i: {'email': CLIENT_EMAIL, 'password': PASSWORD}),
+        scenario('auth.profile', 'GET', lambda c, i: '/api/auth/profile', auth='client'),
+
+        # 2. Campsites
+        scenario('campsites.list', 'GET', lambda c, i: '/api/campsites'),
+        scenario('campsites.detail', 'GET', lambda c, i: f'/api/campsites/{c.campsite_id()}'),
+        scenario('campsites.total', 'GET', lambda c, i: '/api/admin/campsites/total', auth='admin'),
+        scenario('campsites.nearby', 'GET', lambda c, i: '/api/campsites/nearby?lat=-6.9&lon=107.6&radius_km=50'),
+        scenario('campsites.search', 'GET', lambda c, i: '/api/campsites/search?q=' + ['beach wifi', 'bonfire sukabumi', 'pine', 'shower park'][i % 4]),
+        scenario('campsites.create', 'POST', lambda c, i: '/api/admin/campsites', auth='admin', write=True,
+                 body=lambda c, i: {'name': f'Bench Camp {c.run_id} {i}', 'location_name': 'Bandung, West Java',
+                                    'latitude': -6.9, 'longitude': 107.6, 'capacity': 50, 'price_per_night': 100000,
+                                    'description': 'Created by the benchmark', 'facilities': 'Toilet, Wi-Fi'}),
+        scenario('campsites.update', 'PUT', lambda c, i: f'/api/admin/campsites/{c.campsite_id()}', auth='admin', write=True,
+                 body=lambda c, i: {'price_per_night': 100000 + (i % 5) * 25000}),
+
+        # 3. Weather
+        scenario('weather.forecast', 'GET', lambda c, i: f'/api/weather/forecast?campsite_id={c.campsite_id()}&days=7', auth='client'),
+        scenario('weather.batch', 'GET', lambda c, i: '/api/weather/forecast/batch?days=7', auth='client'),
+
+        # 6. Availability
+        scenario('availability.check', 'GET',
+                 lambda c, i: f'/api/campsites/{c.campsite_id()}/availability?check_in={in_month}&check_out={out_month}'),
+        scenario('availability.calendar', 'GET', lambda c, i: f'/api/campsites/{c.campsite_id()}/availability/calendar?month={month}'),
+        scenario('availability.search', 'GET', lambda c, i: f'/api/campsites/available?check_in={in_month}&check_out={out_month}&num_people=2'),
+
+        # 4. Bookings
+        scenario('bookings.create', 'POST', lambda c, i: '/api/bookings', auth='client', write=True,
+                 body=lambda c, i: dict(zip(('check_in_date', 'check_out_date'), c.future_stay(i)),
+                                        campsite_id=c.campsite_id(), num_people=1),
+                 headers=lambda c, i: {'Idempotency-Key': f'bench-{c.run_id}-{i}'},
+                 after=remember_booking),
+        scenario('bookings.mine', 'GET', lambda c, i: '/api/bookings/my-bookings', auth='client'),
+        scenario('bookings.list_page', 'GET', lambda c, i: '/api/bookings/bookings-list?limit=50', auth='admin'),
+        scenario('bookings.total', 'GET', lambda c, i: '/api/admin/bookings/total', auth='admin'),
+        scenario('bookings.today', 'GET', lambda c, i: '/api/admin/bookings/today', auth='admin'),
+        scenario('bookings.detail', 'GET', lambda c, i: f'/api/admin/bookings/{c.booking_id()}', auth='admin'),
+        scenario('bookings.status', 'PUT', lambda c, i: f'/api/admin/bookings/{c.take(c.created_bookings) or 0}/status',
+                 auth='admin', write=True, body=lambda c, i: {'booking_status': 'confirmed'}),
+        scenario('bookings.export_csv', 'GET', lambda c, i: '/api/admin/bookings/export?format=csv&status=confirmed', auth='admin'),
+
+        # 5. Admin
+        scenario('admin.users_pending', 'GET', lambda c, i: '/api/admin/users/pending', auth='admin'),
+        scenario('admin.user_approval', 'PUT', lambda c, i: f'/api/admin/users/{c.take(c.pending_users) or 0}/approval',
+                 auth='admin', write=True, body=lambda c, i: {'action': 'approve'}),
+        scenario('admin.users_total', 'GET', lambda c, i: '/api/admin/users/total', auth='admin'),
+        scenario('admin.users_page', 'GET', lambda c, i: '/api/admin/users?limit=50', auth='admin'),
+        scenario('admin.user_detail', 'GET', lambda c, i: f'/api/admin/users/{c.user_id()}', auth='admin'),
+        scenario('admin.user_status', 'PUT', lambda c, i: f'/api/admin/users/{c.user_id()}/status', auth='admin',
+                 write=True, body=lambda c, i: {'is_active': True}),
+        scenario('admin.dashboard', 'GET', lambda c, i: '/api/admin/dashboard/summary', auth='admin'),
+        scenario('admin.housekeeping', 'GET', lambda c, i: '/api/admin/housekeeping', auth='admin'),
+        scenario('admin.revenue_month', 'GET', lambda c, i: '/api/admin/revenue?period=month', auth='admin'),
+        scenario('admin.revenue_week', 'GET', lambda c, i: '/api/admin/revenue?period=week', auth='admin'),
+        scenario('admin.revenue_top', 'GET', lambda c, i: '/api/admin/revenue/campsites?top=10', auth='admin'),
+
+        # 8. Notifications (the SSE stream is left out: it stays open)
+        scenario('notifications.list', 'GET', lambda c, i: '/api/notifications?limit=50', auth='client'),
+        scenario('notifications.unread_count', 'GET', lambda c, i: '/api/notifications/unread-count', auth='client'),
+        scenario('notifications.poll', 'GET', lambda c, i: '/api/notifications/poll?after_id=0&timeout=0', auth='client'),
+        scenario('notifications.read', 'PUT', lambda c, i: '/api/notifications/read', auth='client', write=True,
+                 body=lambda c, i: {'all': True}),
+
+        # 9. Monitoring
+        scenario('metrics', 'GET', lambda c, i: '/metrics'),
+    ]
+
+
+def run_scenario(ctx, spec, total, concurrency, record=True):
+    local = threading.local()
+    latencies = []
+    sql_counts = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def one(i):
+        headers = dict(getattr(ctx, spec['auth']) if spec['auth'] else {})
+        if spec['headers']:
+            headers.update(spec['headers'](ctx, i))
+        kwargs = {'headers': headers, 'timeout': 120}
+        if spec['body']:
+            kwargs['json'] = spec['body'](ctx, i)
+        path = spec['path'](ctx, i)
+
+        started = time.perf_counter()
+        response = session().request(spec['method'], ctx.base_url + path, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000  # body fully read (stream=False)
+
+        if spec['after']:
+            spec['after'](ctx, response)
+        with lock:
+            latencies.append(elapsed)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if 'X-SQL-Query-Count' in response.headers:
+                sql_counts.append(int(response.headers['X-SQL-Query-Count']))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    if not record:
+        return None
+
+    errors = sum(count for status, count in statuses.items() if int(status) >= 500)
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'status_codes': statuses,
+        'server_errors': errors,
+        'throughput_per_s': round(total / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.mean(latencies), 2) if latencies else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': round(max(latencies), 2) if latencies else None,
+        'sql_queries_mean': round(statistics.mean(sql_counts), 2) if sql_counts else None,
+        'sql_queries_max': max(sql_counts) if sql_counts else None,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\n{'route':<26}{'p95 ms (before -> after)':>30}{'req/s (before -> after)':>30}{'SQL/request':>18}")
+    for name, after in report['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            continue
+        p95 = f"{before['p95_ms']} -> {after['p95_ms']}"
+        throughput = f"{before['throughput_per_s']} -> {after['throughput_per_s']}"
+        sql = f"{before['sql_queries_mean']} -> {after['sql_queries_mean']}"
+        print(f'{name:<26}{p95:>30}{throughput:>30}{sql:>18}')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of every backend route')
+    parser.add_argument('--database-url', default='mysql+pymysql://root:@localhost/camping_bench',
+                        help='MySQL database to DROP, recreate and seed')
+    parser.add_argument('--replica-url', help='second database for read-only routes, seeded with the same data')
+    parser.add_argument('--sql-file', default=DEFAULT_SQL_FILE)
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the database from the previous run')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for generated data and request params')
+    parser.add_argument('--campsites', type=int, default=200)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--bookings', type=int, default=50000)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--weather-latency-ms', type=float, default=150, help='simulated Open-Meteo latency')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--warmup', type=int, default=10, help='unrecorded requests per read route')
+    parser.add_argument('--routes', help='comma separated name prefixes to run, e.g. campsites,admin.revenue')
+    parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'bench_routes_server.log'))
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Print a comparison with an earlier JSON report')
+    args = parser.parse_args()
+
+    url = make_url(args.database_url)
+    replica_url = make_url(args.replica_url) if args.replica_url else None
+    for option, database_url in (('--database-url', url), ('--replica-url', replica_url)):
+        if database_url is not None and database_url.database == DUMP_DATABASE:
+            parser.error(f'refusing to drop {DUMP_DATABASE}; point {option} at a scratch database')
+
+    seed_seconds = None
+    if not args.skip_seed:
+        print(f'Seeding {url.database} ...', file=sys.stderr)
+        seed_seconds = seed_database(url, args.sql_file, args)
+        if replica_url is not None:
+            print(f'Seeding replica {replica_url.database} ...', file=sys.stderr)
+            seed_seconds += seed_database(replica_url, args.sql_file, args)
+
+    weather = start_weather_stub(args.weather_latency_ms)
+    weather_url = f'http://127.0.0.1:{weather.server_address[1]}/v1/forecast'
+    process, base_url = start_backend(args.database_url, weather_url, args.port, args.server_log, args.replica_url)
+
+    try:
+        ctx = BenchContext(base_url, args)
+        # Derived tables are not in the dump data; build them from the seeded bookings
+        requests.post(f'{base_url}/api/admin/availability/rebuild', headers=ctx.admin, timeout=600)
+        requests.post(f'{base_url}/api/admin/revenue/rebuild', headers=ctx.admin, timeout=600)
+        if replica_url is not None:
+            copy_tables(url, replica_url, ('campsite_occupancy', 'revenue_daily_rollup'))
+
+        prefixes = [p.strip() for p in args.routes.split(',')] if args.routes else None
+        results = {}
+        for spec in build_scenarios():
+            if prefixes and not any(spec['name'].startswith(p) for p in prefixes):
+                continue
+            if spec['name'] == 'admin.user_approval':
+                remember_pending_users(ctx)
+            if args.warmup and not spec['write']:
+                run_scenario(ctx, spec, args.warmup, args.concurrency, record=False)
+
+            print(f"  {spec['name']}", file=sys.stderr)
+            results[spec['name']] = run_scenario(ctx, spec, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        weather.shutdown()
+
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'seed_seconds': seed_seconds,
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'server_log')},
+        },
+        'routes': results,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+# Benchmark: CPU per row of the list endpoints' serialization
+#
+# Runs in-process against a scratch database (SQLite by default), for example:
+#   python benchmarks/bench_serialization.py --rows 20000 --repeat 5
+#   python benchmarks/bench_serialization.py --database-url mysql+pymysql://root:@localhost/camping_bench
+#
+# For the admin booking list it compares:
+#   - to_dict:    ORM objects (campsite joined) -> Booking.to_dict() -> json.dumps, like the old route
+#   - projection: only the needed columns as row tuples -> Projection -> dumps_json (orjson if installed)
+#   - projection with ?fields=id,booking_code,booking_status,check_in_date
+# The report shows CPU time (process_time) and wall time per row for each path.
+# Bookings are generated only when the database has fewer than --rows of them.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser(description='List endpoint serialization micro-benchmark')
+parser.add_argument('--database-url',
+                    default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_serialization.db'))
+parser.add_argument('--rows', type=int, default=20000)
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--output', help='Write results as JSON to this file')
+args = parser.parse_args()
+
+# app.py reads the database URL at import time
+os.environ['DATABASE_URL'] = args.database_url
+os.environ.pop('DATABASE_REPLICA_URL', None)
+os.environ['SCHEDULER_ENABLED'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app import (app, db, orjson, Booking, Campsite, User, booking_list_projection,  # noqa: E402
+                 booking_rows_query, dumps_json)
+
+
+def seed(rows):
+    existing = Booking.query.count()
+    if existing >= rows:
+        return 0
+
+    user = User.query.filter_by(email='bench-serialization@example.com').first()
+    if user is None:
+        user = User(email='bench-serialization@example.com', password_hash='-', full_name='Bench',
+                    role='client', registration_status='approved')
+        db.session.add(user)
+    campsite = Campsite(name='Bench Camp', location_name='Bandung', latitude=-6.9, longitude=107.6,
+                        capacity=100, price_per_night=100000, description='x' * 500)
+    db.session.add(campsite)
+    db.session.flush()
+
+    today = date.today()
+    for i in range(existing, rows):
+        check_in = today + timedelta(days=i % 365)
+        db.session.add(Booking(
+            booking_code=f'BENCHSER{i:010d}', user_id=user.id, campsite_id=campsite.id,
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=2), num_people=2,
+            total_nights=2, price_per_night=100000, subtotal=200000, tax_amount=20000, total_price=220000,
+            booking_status='confirmed', special_requests='Quiet spot near the river, please. ' * 5
+        ))
+    db.session.commit()
+    return rows - existing
+
+
+def to_dict_path():
+    bookings = Booking.query.options(joinedload(Booking.campsite))\
+                            .order_by(Booking.created_at.desc(), Booking.id.desc()).all()
+    items = []
+    for booking in bookings:
+        item = booking.to_dict()
+        item['campsite_name'] = booking.campsite.name
+        items.append(item)
+    return json.dumps({'success': True, 'bookings': items}).encode('utf-8')
+
+
+def projection_path(fields=None):
+    names = fields or list(booking_list_projection.fields)
+    columns, serialize = booking_list_projection.plan(names, extra_columns=(Booking.created_at, Booking.id))
+    rows = booking_rows_query(columns).order_by(Booking.created_at.desc(), Booking.id.desc()).all()
+    return dumps_json({'success': True, 'bookings': [serialize(row) for row in rows]})
+
+
+def measure(fn, repeat):
+    fn()  # warm-up: statement compilation and caches
+    db.session.expire_all()
+    cpu = []
+    wall = []
+    size = 0
+    for _ in range(repeat):
+        db.session.expunge_all()  # the ORM path must build its objects again every time
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        size = len(fn())
+        cpu.append(time.process_time() - cpu_started)
+        wall.append(time.perf_counter() - wall_started)
+    return {'cpu_s': min(cpu), 'wall_s': min(wall), 'bytes': size}
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        seeded = seed(args.rows)
+        rows = Booking.query.count()
+        database = db.engine.url.render_as_string(hide_password=True)
+
+        paths = {
+            'to_dict': to_dict_path,
+            'projection': projection_path,
+            'projection_sparse_fields': lambda: projection_path(
+                ['id', 'booking_code', 'booking_status', 'check_in_date']),
+        }
+        results = {name: measure(fn, args.repeat) for name, fn in paths.items()}
+
+    baseline = results['to_dict']['cpu_s']
+    for result in results.values():
+        result['cpu_us_per_row'] = round(result['cpu_s'] / rows * 1e6, 2)
+        result['wall_us_per_row'] = round(result['wall_s'] / rows * 1e6, 2)
+        result['cpu_vs_to_dict'] = round(result['cpu_s'] / baseline, 3) if baseline else None
+        result['cpu_s'] = round(result['cpu_s'], 4)
+        result['wall_s'] = round(result['wall_s'], 4)
+
+    report = {
+        'database': database,
+        'rows': rows,
+        'rows_seeded': seeded,
+        'repeat': args.repeat,
+        'json_encoder': 'orjson' if orjson is not None else 'json',
+        'paths': results,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
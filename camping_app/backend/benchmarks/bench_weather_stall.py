@@ -0,0 +1,152 @@
+# Benchmark: other endpoints while the weather upstream is stalled
+#
+# Starts the backend (flask run, threaded) and a local Open-Meteo stand-in that
+# answers only after --weather-latency-ms, against a database seeded by
+# bench_routes.py, for example:
+#
+#   python benchmarks/bench_routes.py --database-url mysql+pymysql://root:@localhost/camping_bench --requests 1
+#   python benchmarks/bench_weather_stall.py --database-url mysql+pymysql://root:@localhost/camping_bench
+#
+# Phase 1 measures GET /api/campsites and /api/bookings/my-bookings with no
+# weather traffic. Phase 2 keeps the same probes running while many clients
+# ask for forecasts that are not cached yet, so every one of them waits on the
+# slow stand-in. The probe numbers of both phases should be about the same;
+# the weather requests should answer 202 (or 503 once the fetch pool is full)
+# within WEATHER_FETCH_WAIT instead of hanging for the full upstream latency.
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+
+from bench_routes import CLIENT_EMAIL, PASSWORD, percentile, start_backend, start_weather_stub
+
+PROBES = ['/api/campsites', '/api/bookings/my-bookings']
+
+
+def summarize(latencies_ms):
+    return {
+        'count': len(latencies_ms),
+        'mean_ms': round(statistics.mean(latencies_ms), 2) if latencies_ms else None,
+        'p50_ms': percentile(latencies_ms, 50),
+        'p95_ms': percentile(latencies_ms, 95),
+        'p99_ms': percentile(latencies_ms, 99),
+        'max_ms': round(max(latencies_ms), 2) if latencies_ms else None,
+    }
+
+
+def probe(base_url, headers, path, stop, latencies):
+    """Keep calling one endpoint and record its latency"""
+    session = requests.Session()
+    session.headers.update(headers)
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f'{base_url}{path}', timeout=60)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run_probes(base_url, headers, stop):
+    latencies = {path: [] for path in PROBES}
+    threads = [threading.Thread(target=probe, args=(base_url, headers, path, stop, latencies[path]))
+               for path in PROBES]
+    for thread in threads:
+        thread.start()
+    return threads, latencies
+
+
+def weather_worker(base_url, headers, campsites, requests_per_worker, offset, results):
+    session = requests.Session()
+    session.headers.update(headers)
+    for i in range(requests_per_worker):
+        # A new (campsite, days) pair each time, so every request misses the cache
+        campsite_id = 1 + (offset + i) % campsites
+        days = 1 + (offset + i) // campsites % 16
+        started = time.perf_counter()
+        response = session.get(f'{base_url}/api/weather/forecast',
+                               params={'campsite_id': campsite_id, 'days': days}, timeout=120)
+        results.append((response.status_code, (time.perf_counter() - started) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endpoint latency while the weather upstream is stalled')
+    parser.add_argument('--database-url', default='mysql+pymysql://root:@localhost/camping_bench',
+                        help='a database seeded by bench_routes.py')
+    parser.add_argument('--campsites', type=int, default=200, help='campsites in the seeded database')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--weather-latency-ms', type=float, default=8000, help='stand-in response delay')
+    parser.add_argument('--baseline-seconds', type=float, default=5)
+    parser.add_argument('--weather-clients', type=int, default=64)
+    parser.add_argument('--weather-requests', type=int, default=4, help='requests per weather client')
+    parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'bench_weather_stall_server.log'))
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    weather = start_weather_stub(args.weather_latency_ms)
+    weather_url = f'http://127.0.0.1:{weather.server_address[1]}/v1/forecast'
+    process, base_url = start_backend(args.database_url, weather_url, args.port, args.server_log)
+
+    try:
+        response = requests.post(f'{base_url}/api/auth/login',
+                                 json={'email': CLIENT_EMAIL, 'password': PASSWORD}, timeout=60)
+        response.raise_for_status()
+        headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+        stop = threading.Event()
+        threads, baseline = run_probes(base_url, headers, stop)
+        time.sleep(args.baseline_seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        stop = threading.Event()
+        threads, stalled = run_probes(base_url, headers, stop)
+        results = []
+        workers = [
+            threading.Thread(target=weather_worker,
+                             args=(base_url, headers, args.campsites, args.weather_requests,
+                                   i * args.weather_requests, results))
+            for i in range(args.weather_clients)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        weather.shutdown()
+
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    report = {
+        'weather_latency_ms': args.weather_latency_ms,
+        'weather_clients': args.weather_clients,
+        'baseline': {path: summarize(latencies) for path, latencies in baseline.items()},
+        'while_weather_stalled': {path: summarize(latencies) for path, latencies in stalled.items()},
+        'weather': {
+            'status_codes': statuses,
+            'elapsed_s': round(elapsed, 2),
+            'latency': summarize([latency for _, latency in results]),
+        },
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# Load test: concurrent bookings against one campsite
+#
+# Runs against a running backend (python app.py), for example:
+#   python benchmarks/load_test_bookings.py --email client@example.com --password secret \
+#       --campsite-id 1 --bookings 300 --concurrency 100
+#
+# Every booking asks for the same night, so only `remaining capacity`
+# of them can succeed. Each booking is also sent a second time with the
+# same Idempotency-Key, like a mobile client retrying after a timeout.
+# The report shows throughput, the status codes, and checks that
+#   - no more people were booked than there was room for (oversell = 0)
+#   - every retry got the first response back instead of a new booking
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+def summarize(latencies_ms):
+    return {
+        'count': len(latencies_ms),
+        'mean_ms': round(statistics.mean(latencies_ms), 2) if latencies_ms else None,
+        'p50_ms': percentile(latencies_ms, 50),
+        'p95_ms': percentile(latencies_ms, 95),
+        'p99_ms': percentile(latencies_ms, 99),
+    }
+
+
+def login(base_url, email, password):
+    response = requests.post(f'{base_url}/api/auth/login', json={'email': email, 'password': password}, timeout=60)
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+def remaining_capacity(base_url, campsite_id, check_in, check_out):
+    response = requests.get(
+        f'{base_url}/api/campsites/{campsite_id}/availability',
+        params={'check_in': check_in, 'check_out': check_out},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()['remaining_capacity']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent booking / oversell load test')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True, help='an approved client account')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--campsite-id', type=int, required=True)
+    parser.add_argument('--bookings', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--check-in', help='YYYY-MM-DD, default: a day one year from now')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    check_in = date.fromisoformat(args.check_in) if args.check_in else date.today() + timedelta(days=365)
+    check_out = check_in + timedelta(days=1)
+    token = login(args.base_url, args.email, args.password)
+    remaining_before = remaining_capacity(args.base_url, args.campsite_id, check_in.isoformat(), check_out.isoformat())
+
+    local = threading.local()
+    lock = threading.Lock()
+    first_responses = {}
+    retry_results = []
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.headers['Authorization'] = f'Bearer {token}'
+        return local.session
+
+    def book(key):
+        started = time.perf_counter()
+        response = session().post(
+            f'{args.base_url}/api/bookings',
+            json={
+                'campsite_id': args.campsite_id,
+                'check_in_date': check_in.isoformat(),
+                'check_out_date': check_out.isoformat(),
+                'num_people': 1,
+            },
+            headers={'Idempotency-Key': key},
+            timeout=60
+        )
+        return response, (time.perf_counter() - started) * 1000
+
+    def first_attempt(key):
+        response, latency = book(key)
+        with lock:
+            first_responses[key] = (response.status_code, response.text, latency)
+
+    def retry(key):
+        response, latency = book(key)
+        with lock:
+            retry_results.append((key, response, latency))
+
+    keys = [str(uuid.uuid4()) for _ in range(args.bookings)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(first_attempt, keys))
+    elapsed = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(retry, keys))
+
+    statuses = {}
+    for status, _, _ in first_responses.values():
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    created = statuses.get('201', 0)
+    replays_matching = sum(
+        1 for key, response, _ in retry_results
+        if response.headers.get('Idempotent-Replayed') == 'true'
+        and response.status_code == first_responses[key][0]
+        and response.text == first_responses[key][1]
+    )
+    remaining_after = remaining_capacity(args.base_url, args.campsite_id, check_in.isoformat(), check_out.isoformat())
+
+    report = {
+        'campsite_id': args.campsite_id,
+        'check_in_date': check_in.isoformat(),
+        'bookings_attempted': args.bookings,
+        'concurrency': args.concurrency,
+        'remaining_capacity_before': remaining_before,
+        'remaining_capacity_after': remaining_after,
+        'created': created,
+        'status_codes': statuses,
+        'oversell': max(0, created - remaining_before),
+        'capacity_accounting_ok': remaining_before - created == remaining_after,
+        'throughput_per_s': round(args.bookings / elapsed, 2) if elapsed else None,
+        'elapsed_s': round(elapsed, 2),
+        'latency': summarize([latency for _, _, latency in first_responses.values()]),
+        'retries': len(retry_results),
+        'retries_replayed': replays_matching,
+        'retry_latency': summarize([latency for _, _, latency in retry_results]),
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+# Production server config: gunicorn -c gunicorn.conf.py app:app
+#
+# Notification streams (/api/notifications/stream) and long-polls
+# (/api/notifications/poll) stay open for minutes while idle. On sync or
+# thread workers each one pins a thread, so use gevent workers: an idle
+# connection is a parked greenlet. The gevent worker monkey-patches the
+# stdlib before it imports app.py; PyMySQL and requests are pure Python
+# and yield on socket I/O, and bcrypt hashing is moved to real OS threads
+# (see PasswordHasher).
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gevent'
+
+# Open connections per worker. Keep it above the app's NOTIFICATION_MAX_LISTENERS
+# so past that cap ordinary API requests still get in (streams get a 503).
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Streams end on their own after NOTIFICATION_STREAM_MAX_AGE; a worker is only
+# killed if it stops answering gunicorn's heartbeat altogether.
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
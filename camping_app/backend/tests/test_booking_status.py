@@ -0,0 +1,116 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from conftest import add_campsite, backend, create_booking
+
+
+def occupancy():
+    """Occupancy index as {(campsite_id, night): (people, tents)}, zero rows left out"""
+    with backend.app.app_context():
+        return {
+            (row.campsite_id, row.night_date): (row.booked_people, row.booked_tents)
+            for row in backend.CampsiteOccupancy.query.all()
+            if row.booked_people or row.booked_tents
+        }
+
+
+def revenue_rollup():
+    """Revenue rollup as {(campsite_id, day): (bookings, revenue)}"""
+    with backend.app.app_context():
+        return {
+            (row.campsite_id, row.day): (row.bookings, float(row.revenue))
+            for row in backend.RevenueDailyRollup.query.all()
+        }
+
+
+def rebuilt():
+    """What occupancy() and revenue_rollup() should be, recomputed from the bookings"""
+    with backend.app.app_context():
+        backend.rebuild_occupancy_index()
+        backend.rebuild_revenue_rollup()
+    return occupancy(), revenue_rollup()
+
+
+def set_status(client, headers, booking_id, status):
+    return client.put(f'/api/admin/bookings/{booking_id}/status', headers=headers, json={'booking_status': status})
+
+
+def test_status_change_updates_occupancy_and_revenue(client, admin_headers, client_headers):
+    campsite_id = add_campsite()
+    booking_id = create_booking(client, client_headers, campsite_id, num_people=3)
+
+    assert set_status(client, admin_headers, booking_id, 'confirmed').status_code == 200
+    assert list(revenue_rollup().values()) == [(1, 220000.0)]
+
+    assert set_status(client, admin_headers, booking_id, 'cancelled').status_code == 200
+    assert occupancy() == {}
+    assert revenue_rollup() == {}  # no zero row left behind
+
+    response = client.get('/api/admin/revenue?period=day', headers=admin_headers)
+    assert response.get_json()['revenue'] == []
+    assert set_status(client, admin_headers, booking_id, 'confirmed').status_code == 400
+
+
+@pytest.mark.parametrize('new_status', ['cancelled', 'completed'])
+def test_concurrent_status_changes_apply_once(app, admin_headers, client_headers, new_status):
+    """Two admins make the same transition at once: nights and revenue are released once"""
+    client = app.test_client()
+    campsite_id = add_campsite()
+    # Stays on the same nights and day: a double release would show up in their totals
+    create_booking(client, client_headers, campsite_id, num_people=4)
+    kept = create_booking(client, client_headers, campsite_id, num_people=4)
+    assert set_status(client, admin_headers, kept, 'confirmed').status_code == 200
+
+    raced = []
+    for _ in range(5):
+        booking_id = create_booking(client, client_headers, campsite_id, num_people=2)
+        assert set_status(client, admin_headers, booking_id, 'confirmed').status_code == 200
+        raced.append(booking_id)
+
+    for booking_id in raced:
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        def change():
+            thread_client = app.test_client()
+            barrier.wait()
+            statuses.append(set_status(thread_client, admin_headers, booking_id, new_status).status_code)
+
+        threads = [threading.Thread(target=change) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert statuses.count(200) == 1, statuses
+
+    applied_occupancy, applied_revenue = occupancy(), revenue_rollup()
+    expected_occupancy, expected_revenue = rebuilt()
+    assert applied_occupancy == expected_occupancy
+    assert applied_revenue == expected_revenue
+    assert set(people for people, _ in applied_occupancy.values()) == {8}
+
+
+def test_auto_complete_frees_nights(client, admin_headers, client_headers):
+    campsite_id = add_campsite()
+    past = create_booking(client, client_headers, campsite_id, num_people=3)
+    create_booking(client, client_headers, campsite_id, num_people=2)
+    assert set_status(client, admin_headers, past, 'confirmed').status_code == 200
+
+    # Move the first stay into the past (bookings cannot be made there)
+    with backend.app.app_context():
+        booking = backend.db.session.get(backend.Booking, past)
+        booking.check_in_date -= timedelta(days=40)
+        booking.check_out_date -= timedelta(days=40)
+        backend.db.session.commit()
+    expected_revenue = rebuilt()[1]
+
+    with backend.app.app_context():
+        assert backend.auto_complete_expired_bookings() == 1
+
+    applied_occupancy, applied_revenue = occupancy(), revenue_rollup()
+    assert set(people for people, _ in applied_occupancy.values()) == {2}
+    assert applied_revenue == expected_revenue
+    assert (applied_occupancy, applied_revenue) == rebuilt()
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from conftest import add_campsite, backend, create_booking
+
+
+@pytest.fixture
+def route_calls(monkeypatch):
+    """Counts the times the my-bookings view actually runs"""
+    calls = []
+    view = backend.app.view_functions['get_my_bookings']
+
+    def counting_view(*args, **kwargs):
+        calls.append(1)
+        return view(*args, **kwargs)
+
+    monkeypatch.setitem(backend.app.view_functions, 'get_my_bookings', counting_view)
+    return calls
+
+
+def write_from_another_worker(sql):
+    """A committed write through an engine of its own, as another worker process makes it"""
+    engine = create_engine(backend.app.config['SQLALCHEMY_DATABASE_URI'])
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(sql))
+    finally:
+        engine.dispose()
+
+
+def get_my_bookings(client, headers, etag=None):
+    headers = dict(headers, **{'Accept-Encoding': 'gzip'})
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get('/api/bookings/my-bookings', headers=headers)
+
+
+def test_unchanged_body_is_answered_304_without_running_the_route(client, client_headers, route_calls):
+    create_booking(client, client_headers, add_campsite())
+    first = get_my_bookings(client, client_headers)
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.headers['Last-Modified']
+    assert len(route_calls) == 1
+
+    again = get_my_bookings(client, client_headers, first.headers['ETag'])
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert len(route_calls) == 1
+
+
+def test_write_by_another_worker_is_seen(client, client_headers, route_calls):
+    create_booking(client, client_headers, add_campsite())
+    first = get_my_bookings(client, client_headers)
+
+    write_from_another_worker('UPDATE bookings SET num_people = 5')
+
+    after = get_my_bookings(client, client_headers, first.headers['ETag'])
+    assert after.status_code == 200
+    assert after.headers['ETag'] != first.headers['ETag']
+    assert len(route_calls) == 2
+
+
+def test_write_through_the_api_is_seen(client, client_headers, route_calls):
+    campsite_id = add_campsite()
+    create_booking(client, client_headers, campsite_id)
+    first = get_my_bookings(client, client_headers)
+
+    create_booking(client, client_headers, campsite_id, offset_days=60)
+    after = get_my_bookings(client, client_headers, first.headers['ETag'])
+    assert after.status_code == 200
+    assert len(after.get_json()['bookings']) == 2
+
+
+def test_unchanged_body_still_gets_304_without_the_shortcut(client, client_headers, route_calls, monkeypatch):
+    monkeypatch.setitem(backend.app.config, 'CONDITIONAL_GET_SHORTCUT', False)
+    create_booking(client, client_headers, add_campsite())
+    first = get_my_bookings(client, client_headers)
+
+    again = get_my_bookings(client, client_headers, first.headers['ETag'])
+    assert again.status_code == 304
+    assert len(route_calls) == 2  # the route ran and the body hash decided
+
+
+def test_purging_old_versions_keeps_cached_answers(client, client_headers, route_calls):
+    campsite_id = add_campsite()
+    create_booking(client, client_headers, campsite_id)
+    create_booking(client, client_headers, campsite_id, offset_days=60)
+    first = get_my_bookings(client, client_headers)
+
+    with backend.app.app_context():
+        assert backend.purge_data_changes() > 0
+        assert backend.DataChange.query.count() == 1
+
+    again = get_my_bookings(client, client_headers, first.headers['ETag'])
+    assert again.status_code == 304
+    assert len(route_calls) == 1
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from sqlalchemy import event
+
+from conftest import add_campsite, backend, stay
+
+
+def post_booking(client, headers, campsite_id, key):
+    check_in, check_out = stay()
+    return client.post('/api/bookings', headers=dict(headers, **{'Idempotency-Key': key}), json={
+        'campsite_id': campsite_id,
+        'check_in_date': check_in,
+        'check_out_date': check_out,
+        'num_people': 2,
+    })
+
+
+def booking_count():
+    with backend.app.app_context():
+        return backend.Booking.query.count()
+
+
+def test_retry_gets_the_first_response(client, client_headers):
+    campsite_id = add_campsite()
+
+    first = post_booking(client, client_headers, campsite_id, 'retry-1')
+    retry = post_booking(client, client_headers, campsite_id, 'retry-1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_data() == first.get_data()
+    assert booking_count() == 1
+
+
+def test_response_is_stored_with_the_booking(client, client_headers, monkeypatch):
+    """Nothing after the booking commit is needed to finish the key"""
+    campsite_id = add_campsite()
+
+    def process_died(*args, **kwargs):
+        raise RuntimeError('worker killed')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(backend, 'finish_idempotency_key', process_died)
+        first = post_booking(client, client_headers, campsite_id, 'retry-2')
+    assert first.status_code == 201
+
+    # Even once the in-progress window has passed, a retry is a replay
+    with backend.app.app_context():
+        record = backend.IdempotencyKey.query.filter_by(idem_key='retry-2').one()
+        assert record.response_code == 201
+        record.created_at -= timedelta(seconds=backend.app.config['IDEMPOTENCY_PROCESSING_TIMEOUT'] + 1)
+        backend.db.session.commit()
+
+    retry = post_booking(client, client_headers, campsite_id, 'retry-2')
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_data() == first.get_data()
+    assert booking_count() == 1
+
+
+def test_client_error_is_replayed_too(client, client_headers):
+    missing = post_booking(client, client_headers, 999, 'retry-3')
+    replay = post_booking(client, client_headers, 999, 'retry-3')
+
+    assert missing.status_code == replay.status_code == 404
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_booking_holds_one_primary_connection_at_a_time(client, client_headers):
+    """Key claims and code blocks must not wait on the main pool for a second connection"""
+    campsite_id = add_campsite()
+    in_use = {'now': 0, 'peak': 0}
+
+    def checked_out(*args):
+        in_use['now'] += 1
+        in_use['peak'] = max(in_use['peak'], in_use['now'])
+
+    def checked_in(*args):
+        in_use['now'] -= 1
+
+    with backend.app.app_context():
+        engine = backend.db.engine
+    event.listen(engine, 'checkout', checked_out)
+    event.listen(engine, 'checkin', checked_in)
+    try:
+        response = post_booking(client, client_headers, campsite_id, 'pool-1')
+    finally:
+        event.remove(engine, 'checkout', checked_out)
+        event.remove(engine, 'checkin', checked_in)
+
+    assert response.status_code == 201
+    assert in_use['peak'] == 1
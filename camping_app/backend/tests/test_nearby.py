@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import add_campsite
+
+
+@pytest.mark.parametrize('query', [
+    'lat=nan&lon=107.6',
+    'lat=-6.9&lon=inf',
+    'lat=-6.9&lon=107.6&radius_km=nan',
+    'lat=-6.9&lon=107.6&radius_km=inf',
+    'lat=-6.9&lon=107.6&radius_km=-inf',
+])
+def test_non_finite_coordinates_are_rejected(client, query):
+    add_campsite()
+
+    response = client.get(f'/api/campsites/nearby?{query}')
+
+    assert response.status_code == 400, response.get_json()
+
+
+def test_nearby_campsites_are_found(client):
+    campsite_id = add_campsite()
+
+    response = client.get('/api/campsites/nearby?lat=-6.9&lon=107.6&radius_km=5')
+
+    assert response.status_code == 200, response.get_json()
+    assert [c['id'] for c in response.get_json()['campsites']] == [campsite_id]
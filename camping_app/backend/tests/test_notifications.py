@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import backend
+
+
+@pytest.fixture
+def held_listener(app, monkeypatch):
+    """Fills the hub: a cap of one with one listener already open"""
+    monkeypatch.setattr(backend.notification_hub, 'max_listeners', 1)
+    with backend.app.app_context():
+        listener = backend.notification_hub.subscribe(0)
+    yield listener
+    backend.notification_hub.unsubscribe(listener)
+
+
+def test_poll_past_the_cap_answers_503_with_retry_after(client, client_headers, held_listener):
+    response = client.get('/api/notifications/poll?after_id=0&timeout=0', headers=client_headers)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert backend.notification_hub.listener_count == 1
+
+
+def test_stream_past_the_cap_answers_503_with_retry_after(client, client_headers, held_listener):
+    response = client.get('/api/notifications/stream', headers=client_headers)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert backend.notification_hub.listener_count == 1
+
+
+def test_poll_is_served_again_once_a_listener_leaves(client, client_headers, held_listener):
+    backend.notification_hub.unsubscribe(held_listener)
+
+    response = client.get('/api/notifications/poll?after_id=0&timeout=0', headers=client_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['notifications'] == []
+    assert backend.notification_hub.listener_count == 0
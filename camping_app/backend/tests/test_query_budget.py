@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import add_campsite, add_user, auth_headers, backend, create_booking
+
+# Routes declared with @query_budget, called the way clients call them. With
+# several users, campsites and bookings, a per-row query (N+1) goes over budget.
+BUDGETED_ROUTES = [
+    ('client', '/api/auth/profile'),
+    ('client', '/api/bookings/my-bookings'),
+    ('admin', '/api/bookings/bookings-list'),
+    ('admin', '/api/bookings/bookings-list?limit=4'),
+    ('admin', '/api/admin/bookings/{booking_id}'),
+    ('admin', '/api/admin/users'),
+    ('admin', '/api/admin/users?limit=2'),
+    ('admin', '/api/admin/dashboard/summary'),
+    ('admin', '/api/admin/revenue?period=day'),
+    ('admin', '/api/admin/revenue/campsites'),
+    ('client', '/api/notifications?limit=2'),
+    ('client', '/api/notifications/unread-count'),
+    ('client', '/api/notifications/poll?after_id=0&timeout=0'),
+]
+
+
+@pytest.fixture
+def seeded(app, client, admin_headers):
+    """Three clients with a booking at each of three campsites, half of them confirmed"""
+    app.config['SQL_QUERY_BUDGET_STRICT'] = True
+    campsites = [add_campsite(f'Camp {i}') for i in range(3)]
+    clients = [add_user(f'client{i}@example.com') for i in range(3)]
+    booking_ids = []
+    for user_id in clients:
+        headers = auth_headers(user_id, 'client')
+        for offset, campsite_id in enumerate(campsites):
+            booking_ids.append(create_booking(client, headers, campsite_id, offset_days=30 + offset))
+    for booking_id in booking_ids[::2]:
+        response = client.put(f'/api/admin/bookings/{booking_id}/status', headers=admin_headers,
+                              json={'booking_status': 'confirmed'})
+        assert response.status_code == 200
+
+    with backend.app.app_context():
+        backend.db.session.add_all([
+            backend.Notification(user_id=clients[0], title=f'Notice {i}', message='Hello',
+                                 notification_type='system')
+            for i in range(5)
+        ])
+        backend.db.session.commit()
+
+    return {
+        'admin': admin_headers,
+        'client': auth_headers(clients[0], 'client'),
+        'booking_id': booking_ids[0],
+    }
+
+
+@pytest.mark.parametrize('role, path', BUDGETED_ROUTES)
+def test_route_stays_within_query_budget(client, seeded, role, path):
+    # Cold caches: the budget has to cover the authorization lookup too
+    for name in ('user_status_cache', 'dashboard_cache', 'unread_count_cache', 'conditional_get_cache'):
+        getattr(backend, name).clear()
+
+    response = client.get(path.format(**seeded), headers=seeded[role])
+
+    assert response.status_code == 200, response.get_json()
+    assert 'X-SQL-Query-Budget' in response.headers, 'route has no @query_budget'
+    assert int(response.headers['X-SQL-Query-Count']) <= int(response.headers['X-SQL-Query-Budget'])
+
+
+def test_mark_notifications_read_stays_within_query_budget(client, seeded):
+    backend.user_status_cache.clear()
+
+    response = client.put('/api/notifications/read', headers=seeded['client'], json={'all': True})
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['updated'] == 5
+    assert int(response.headers['X-SQL-Query-Count']) <= int(response.headers['X-SQL-Query-Budget'])
+
+
+def test_strict_mode_fails_a_route_over_budget(client, seeded, monkeypatch):
+    # An N+1 loop in my-bookings: one extra statement per booking
+    projection_plan = backend.my_booking_projection.plan
+
+    def plan_with_extra_queries(*args, **kwargs):
+        columns, serialize = projection_plan(*args, **kwargs)
+
+        def serialize_with_query(row):
+            backend.db.session.query(backend.Campsite).first()
+            return serialize(row)
+        return columns, serialize_with_query
+
+    monkeypatch.setattr(backend.my_booking_projection, 'plan', plan_with_extra_queries)
+
+    response = client.get('/api/bookings/my-bookings', headers=seeded['client'])
+
+    assert response.status_code == 500
+    assert 'Query budget exceeded' in response.get_json()['message']
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from conftest import backend
+
+
+def test_one_process_runs_the_jobs_and_another_takes_over(tmp_path):
+    """Two workers share the lock file: one runs the jobs, the other stands by"""
+    lock_file = str(tmp_path / 'scheduler.lock')
+    first, standby = backend.BackgroundScheduler(), backend.BackgroundScheduler()
+
+    first.start(lock_file)
+    standby.start(lock_file)
+    try:
+        assert first.is_active()
+        assert standby.is_running() and not standby.is_active()
+
+        first.stop()
+        assert standby.is_active()
+    finally:
+        first.stop()
+        standby.stop()
+
+
+def test_jobs_start_when_a_wsgi_server_loads_the_app(tmp_path):
+    """Imported as a module (gunicorn, flask run), the app starts its scheduler"""
+    env = dict(os.environ, SCHEDULER_ENABLED='1', SCHEDULER_LOCK_FILE=str(tmp_path / 'scheduler.lock'),
+               DATABASE_URL='sqlite:///' + str(tmp_path / 'worker.db'))
+    worker = subprocess.run(
+        [sys.executable, '-c', 'import app; print(app.scheduler.is_active())'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, timeout=60
+    )
+
+    assert worker.returncode == 0, worker.stderr
+    assert worker.stdout.strip().splitlines()[-1] == 'True'
@@ -0,0 +1,119 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from conftest import add_campsite, backend
+
+
+class FakeOpenMeteo:
+    """Stands in for weather_http; a call blocks until `released` is set"""
+
+    def __init__(self, released=True):
+        self.released = threading.Event()
+        if released:
+            self.released.set()
+        self.calls = []  # latitudes asked for, one list per call
+        self.called = threading.Semaphore(0)  # released once per call
+
+    def get(self, url, params=None, timeout=None):
+        latitudes = params['latitude'].split(',')
+        self.calls.append(latitudes)
+        self.called.release()
+        assert self.released.wait(timeout=5), 'upstream call was never released'
+        return FakeResponse(len(latitudes), params['forecast_days'])
+
+
+class FakeResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, locations, days):
+        self.locations = locations
+        self.days = days
+
+    def json(self):
+        start = backend.forecast_today()
+        days = [(start + timedelta(days=i)).isoformat() for i in range(self.days)]
+        location = {'daily': {
+            'time': days,
+            'temperature_2m_max': [30.0] * self.days,
+            'temperature_2m_min': [20.0] * self.days,
+            'weathercode': [1] * self.days,
+            'precipitation_probability_mean': [10] * self.days,
+            'windspeed_10m_max': [5.0] * self.days,
+        }}
+        # Open-Meteo answers an object for one location and a list for several
+        return location if self.locations == 1 else [location] * self.locations
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Futures of every fetch job started during the test"""
+    futures = []
+    submit = backend.weather_fetcher.submit
+
+    def recording_submit(*args, **kwargs):
+        future = submit(*args, **kwargs)
+        futures.append(future)
+        return future
+
+    monkeypatch.setattr(backend.weather_fetcher, 'submit', recording_submit)
+    return futures
+
+
+def test_cold_cache_lookup_answers_with_the_forecast(client, client_headers, monkeypatch):
+    monkeypatch.setattr(backend, 'weather_http', FakeOpenMeteo())
+    campsite_id = add_campsite()
+
+    response = client.get(f'/api/weather/forecast?campsite_id={campsite_id}&days=3', headers=client_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert len(response.get_json()['forecast']) == 3
+
+
+def test_stalled_upstream_answers_202_with_retry_after(client, client_headers, monkeypatch, fetches):
+    upstream = FakeOpenMeteo(released=False)
+    monkeypatch.setattr(backend, 'weather_http', upstream)
+    monkeypatch.setitem(backend.app.config, 'WEATHER_FETCH_WAIT', 0.05)
+    campsite_id = add_campsite()
+
+    response = client.get(f'/api/weather/forecast?campsite_id={campsite_id}&days=3', headers=client_headers)
+
+    assert response.status_code == 202
+    assert response.headers['Retry-After'] == '1'
+
+    # The fetch finishes in the background and fills the cache for the retry
+    upstream.released.set()
+    for future in fetches:
+        future.result(timeout=5)
+    response = client.get(f'/api/weather/forecast?campsite_id={campsite_id}&days=3', headers=client_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['forecast']) == 3
+
+
+def test_overlapping_batches_share_the_fetch_of_common_campsites(app, client_headers, monkeypatch):
+    upstream = FakeOpenMeteo(released=False)
+    monkeypatch.setattr(backend, 'weather_http', upstream)
+    monkeypatch.setitem(backend.app.config, 'WEATHER_FETCH_WAIT', 5)
+    first, common, second = (add_campsite(f'Camp {i}', latitude=-6.0 - i) for i in range(3))
+    responses = {}
+
+    def get_batch(name, ids):
+        responses[name] = app.test_client().get(
+            f'/api/weather/forecast/batch?campsite_ids={ids[0]},{ids[1]}&days=3', headers=client_headers)
+
+    threads = [threading.Thread(target=get_batch, args=('a', (first, common))),
+               threading.Thread(target=get_batch, args=('b', (common, second)))]
+    for thread in threads:
+        thread.start()
+        assert upstream.called.acquire(timeout=5), 'batch did not reach the upstream'
+    upstream.released.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert responses['a'].status_code == responses['b'].status_code == 200
+    # The second batch joined the first one's fetch of `common` and only went upstream for `second`
+    assert sorted(len(latitudes) for latitudes in upstream.calls) == [1, 2]
+    assert {f['campsite']['id'] for f in responses['b'].get_json()['forecasts']} == {common, second}
@@ -578,23 +578,35 @@ class ApiService {
   // ============================================
 
   /// Get weather forecast
+  ///
+  /// The server answers 202 while a forecast is still being fetched and 503
+  /// when the weather service is busy; both are retried after Retry-After.
   Future<Map<String, dynamic>> getWeatherForecast(
     int campsiteId, {
     int days = 7,
+    int maxAttempts = 5,
   }) async {
     try {
       final url = Uri.parse(
         '$baseUrl/weather/forecast?campsite_id=$campsiteId&days=$days',
       );
 
-      final response = await http.get(url, headers: _getHeaders());
+      for (var attempt = 1; ; attempt++) {
+        final response = await http.get(url, headers: _getHeaders());
 
-      final data = jsonDecode(response.body);
+        final data = jsonDecode(response.body);
 
-      if (response.statusCode == 200 && data['success'] == true) {
-        return data;
-      } else {
-        throw Exception(data['message'] ?? 'Failed to get weather forecast');
+        if (response.statusCode == 200 && data['success'] == true) {
+          return data;
+        }
+
+        final retryable = response.statusCode == 202 || response.statusCode == 503;
+        if (!retryable || attempt >= maxAttempts) {
+          throw Exception(data['message'] ?? 'Failed to get weather forecast');
+        }
+
+        final retryAfter = int.tryParse(response.headers['retry-after'] ?? '') ?? 1;
+        await Future.delayed(Duration(seconds: retryAfter));
       }
     } catch (e) {
       throw Exception('Weather forecast error: $e');
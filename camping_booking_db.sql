@@ -40,6 +40,15 @@ CREATE TABLE IF NOT EXISTS `admin_logs` (
 
 -- Dumping data for table camping_booking_db.admin_logs: ~0 rows (approximately)
 
+-- Dumping structure for table camping_booking_db.booking_code_sequences
+CREATE TABLE IF NOT EXISTS `booking_code_sequences` (
+  `day` date NOT NULL,
+  `next_value` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Dumping data for table camping_booking_db.booking_code_sequences: ~0 rows (approximately)
+
 -- Dumping structure for table camping_booking_db.bookings
 CREATE TABLE IF NOT EXISTS `bookings` (
   `id` int NOT NULL AUTO_INCREMENT,
@@ -95,6 +104,19 @@ BEGIN
 END//
 DELIMITER ;
 
+-- Dumping structure for table camping_booking_db.campsite_occupancy
+CREATE TABLE IF NOT EXISTS `campsite_occupancy` (
+  `campsite_id` int NOT NULL,
+  `night_date` date NOT NULL,
+  `booked_people` int NOT NULL DEFAULT '0',
+  `booked_tents` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`campsite_id`,`night_date`),
+  KEY `idx_night` (`night_date`),
+  CONSTRAINT `campsite_occupancy_ibfk_1` FOREIGN KEY (`campsite_id`) REFERENCES `campsites` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Dumping data for table camping_booking_db.campsite_occupancy: ~0 rows (approximately)
+
 -- Dumping structure for table camping_booking_db.campsites
 CREATE TABLE IF NOT EXISTS `campsites` (
   `id` int NOT NULL AUTO_INCREMENT,
@@ -161,6 +183,15 @@ BEGIN
 END//
 DELIMITER ;
 
+-- Dumping structure for table camping_booking_db.data_changes
+CREATE TABLE IF NOT EXISTS `data_changes` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `changed_at` datetime NOT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Dumping data for table camping_booking_db.data_changes: ~0 rows (approximately)
+
 -- Dumping structure for procedure camping_booking_db.generate_booking_code
 DELIMITER //
 CREATE PROCEDURE `generate_booking_code`(
@@ -184,6 +215,24 @@ BEGIN
 END//
 DELIMITER ;
 
+-- Dumping structure for table camping_booking_db.idempotency_keys
+CREATE TABLE IF NOT EXISTS `idempotency_keys` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `user_id` int NOT NULL,
+  `idem_key` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `request_hash` char(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci NOT NULL,
+  `response_code` int DEFAULT NULL,
+  `response_body` mediumtext CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci,
+  `created_at` datetime NOT NULL,
+  `expires_at` datetime NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_user_idem_key` (`user_id`,`idem_key`),
+  KEY `idx_idempotency_expires` (`expires_at`),
+  CONSTRAINT `idempotency_keys_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Dumping data for table camping_booking_db.idempotency_keys: ~0 rows (approximately)
+
 -- Dumping structure for table camping_booking_db.notifications
 CREATE TABLE IF NOT EXISTS `notifications` (
   `id` int NOT NULL AUTO_INCREMENT,
@@ -198,6 +247,8 @@ CREATE TABLE IF NOT EXISTS `notifications` (
   KEY `idx_user` (`user_id`),
   KEY `idx_read` (`is_read`),
   KEY `idx_type` (`notification_type`),
+  KEY `idx_user_created` (`user_id`,`created_at`),
+  KEY `idx_user_read` (`user_id`,`is_read`),
   CONSTRAINT `notifications_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=5 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -232,6 +283,19 @@ CREATE TABLE IF NOT EXISTS `payments` (
 
 -- Dumping data for table camping_booking_db.payments: ~0 rows (approximately)
 
+-- Dumping structure for table camping_booking_db.revenue_daily_rollup
+CREATE TABLE IF NOT EXISTS `revenue_daily_rollup` (
+  `campsite_id` int NOT NULL,
+  `day` date NOT NULL,
+  `bookings` int NOT NULL DEFAULT '0',
+  `revenue` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`campsite_id`,`day`),
+  KEY `idx_revenue_day` (`day`),
+  CONSTRAINT `revenue_daily_rollup_ibfk_1` FOREIGN KEY (`campsite_id`) REFERENCES `campsites` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Dumping data for table camping_booking_db.revenue_daily_rollup: ~0 rows (approximately)
+
 -- Dumping structure for table camping_booking_db.reviews
 CREATE TABLE IF NOT EXISTS `reviews` (
   `id` int NOT NULL AUTO_INCREMENT,